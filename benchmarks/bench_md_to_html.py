@@ -0,0 +1,66 @@
+"""
+Markdown -> HTML throughput: the in-process _md_to_html against the awk
+converter publish used to run once per note (tests/fixtures/md_to_html.awk).
+
+    python benchmarks/bench_md_to_html.py [--notes N] [--repeat R]
+
+Notes are the fixture corpus in tests/fixtures/md, cycled up to N. awk is
+skipped if it isn't on PATH.
+"""
+import argparse
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from org.commands.system.publish import _md_to_html  # noqa: E402
+
+FIXTURES = ROOT / "tests" / "fixtures"
+
+def load_corpus() -> list[str]:
+    docs = []
+    for path in sorted((FIXTURES / "md").glob("*.md")):
+        with open(path, encoding="utf-8", newline="") as f:
+            docs.append(f.read())
+    return docs
+
+def run_awk(script: str, md: str) -> str:
+    return subprocess.run(["awk", script], input=md, text=True, capture_output=True, check=True).stdout
+
+def best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def report(label: str, secs: float, notes: list[str]) -> None:
+    size = sum(len(md.encode("utf-8")) for md in notes)
+    print(f"{label:<8} {secs * 1000:9.1f} ms  {len(notes) / secs:10.0f} notes/s  {size / secs / 1e6:8.2f} MB/s")
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--notes", type=int, default=2000, help="notes to convert (default 2000)")
+    ap.add_argument("--repeat", type=int, default=3, help="runs per converter, best is reported (default 3)")
+    args = ap.parse_args()
+
+    corpus = load_corpus()
+    notes = [corpus[i % len(corpus)] for i in range(args.notes)]
+    print(f"{len(notes)} notes from {len(corpus)} fixtures, best of {args.repeat}")
+
+    report("python", best_of(args.repeat, lambda: [_md_to_html(md) for md in notes]), notes)
+
+    if shutil.which("awk") is None:
+        print("awk      (not on PATH, skipped)")
+        return
+    script = (FIXTURES / "md_to_html.awk").read_text(encoding="utf-8")
+    report("awk", best_of(args.repeat, lambda: [run_awk(script, md) for md in notes]), notes)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+`org report` on a large synthetic workspace.
+
+    python benchmarks/bench_report.py [--todos N] [--events N] [--repeat R] [--src DIR]
+                                      [--workspace DIR] [--out FILE]
+
+Builds a workspace (todos with mixed statuses, tags and deadlines around
+the report day, one-off and recurring events, a .project_hierarchy),
+validates it once, then times cmd_report in-process for a fixed day. The
+random picks are seeded so the output is the same from run to run; --out
+keeps it, to diff between trees.
+
+To compare before/after, run it once per tree with --src pointing at the
+other checkout's src/ (e.g. `git worktree add /tmp/before <rev>` and
+--src /tmp/before/src). Give both runs the same --workspace (built on the
+first run, reused after) so they read the same db: items that tie in the
+report's ordering come out in db order, which differs between builds.
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+REPORT_DAY = date(2026, 10, 19)
+
+TAGS = ["work", "home", "alpha", "beta", "gamma", "general", "misc"]
+PATTERNS = ["^1d", "^1d@wd1,2,3,4,5", "^1w", "^2w", "^1m", "^1y", "^1d~wd6,7", "^1m@m1,15"]
+HIERARCHY = "work\n alpha*\n  beta\nhome\n gamma\n"
+
+def org(src: Path, ws: Path, *args: str, stdin: str = "") -> None:
+    env = dict(os.environ, PYTHONPATH=str(src))
+    subprocess.run(
+        [sys.executable, "-m", "org.org", *args],
+        cwd=ws, env=env, input=stdin, text=True,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True,
+    )
+
+def build_workspace(ws: Path, src: Path, todos: int, events: int) -> None:
+    rng = random.Random(4)
+    ws.mkdir(parents=True)
+    (ws / ".config.json").write_text('{"name": "bench"}', encoding="utf-8")
+    org(src, ws, "init", stdin="bench\n")
+    (ws / ".project_hierarchy").write_text(HIERARCHY, encoding="utf-8")
+
+    def tags() -> str:
+        return " ".join(f"#{t}" for t in rng.sample(TAGS, rng.randint(0, 3)))
+
+    per_file = 250
+    for f in range(0, todos, per_file):
+        out = []
+        for i in range(f, min(f + per_file, todos)):
+            parts = [tags(), f"!{rng.randint(1, 4)}"]
+            if rng.random() < 0.6:
+                parts.append(f"%{REPORT_DAY + timedelta(days=rng.randint(-60, 60)):%Y%m%d}")
+            if rng.random() < 0.3:
+                parts.append(f"={rng.choice(['done', 'blocked', 'inprogress'])}")
+            out.append(f"* t: todo {i} // " + " ".join(p for p in parts if p))
+        (ws / f"t{f // per_file}.td").write_text("\n".join(out) + "\n", encoding="utf-8")
+
+    for f in range(0, events, per_file):
+        out = []
+        for i in range(f, min(f + per_file, events)):
+            start = datetime.combine(REPORT_DAY, datetime.min.time()) + timedelta(
+                days=rng.randint(-400, 30), minutes=rng.choice([0, 0, 9 * 60, 13 * 60 + 30])
+            )
+            stamp = f">{start:%Y%m%d}" if start.time() == datetime.min.time() else f">{start:%Y%m%dT%H%M}"
+            pattern = rng.choice(PATTERNS) if rng.random() < 0.3 else ""
+            out.append(f"* e: event {i} // {stamp} {pattern} {tags()}".rstrip())
+        (ws / f"e{f // per_file}.ev").write_text("\n".join(out) + "\n", encoding="utf-8")
+
+    # validate once so .org.db is filled in
+    org(src, ws, "tags")
+
+def bench_report(ws: Path, src: Path, repeat: int) -> tuple[float, str]:
+    os.chdir(ws)
+    sys.path.insert(0, str(src))
+    from org.org import get_db, cmd_report
+
+    c = get_db([Path(".org.db")]).cursor()
+    best = float("inf")
+    output = ""
+    for _ in range(repeat):
+        random.seed(1)
+        buf = io.StringIO()
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(buf):
+            cmd_report(c, REPORT_DAY.isoformat())
+        best = min(best, time.perf_counter() - t0)
+        output = buf.getvalue()
+    return best, output
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--todos", type=int, default=8000, help="todos (default 8000)")
+    ap.add_argument("--events", type=int, default=8000, help="events (default 8000)")
+    ap.add_argument("--repeat", type=int, default=5, help="reports to time, best is reported (default 5)")
+    ap.add_argument("--src", type=Path, default=ROOT / "src", help="src/ of the tree to measure (default this one)")
+    ap.add_argument("--workspace", type=Path, help="build the workspace here, or reuse it if it's there")
+    ap.add_argument("--out", type=Path, help="write the report output here")
+    args = ap.parse_args()
+    src = args.src.resolve()
+    out = args.out.resolve() if args.out else None
+
+    with tempfile.TemporaryDirectory(prefix="org-bench-report-") as tmp:
+        ws = args.workspace.resolve() if args.workspace else Path(tmp) / "ws"
+        if ws.exists():
+            print(f"reusing {ws}, from {src}")
+        else:
+            t0 = time.perf_counter()
+            build_workspace(ws, src, args.todos, args.events)
+            print(f"{args.todos} todos, {args.events} events (built in {time.perf_counter() - t0:.1f}s) from {src}")
+
+        secs, output = bench_report(ws, src, args.repeat)
+        print(f"org report {REPORT_DAY}: {secs * 1000:.1f} ms (best of {args.repeat}), {len(output.splitlines())} lines")
+        if out is not None:
+            out.write_text(output, encoding="utf-8")
+
+if __name__ == "__main__":
+    main()
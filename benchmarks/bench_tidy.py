@@ -0,0 +1,207 @@
+"""
+`org tidy` on a large synthetic workspace.
+
+    python benchmarks/bench_tidy.py [--notes N] [--lines N] [--groups N] [--repeat R] [--src DIR]
+
+Builds a workspace (notes dumped at the top level with mtimes spread over
+a few years, a few with clashing titles, .td/.ev files full of lines,
+--groups `_group` dirs whose tags a share of the items carry), then:
+
+  - times the read-only planning pieces in-process: get_tagsets,
+    bucket_files, bucket_lines and, where the tree has them,
+    NameAllocator and build_plan;
+  - times `org tidy` end to end on a fresh copy, first on the messy
+    workspace and then again once everything is in place (this includes
+    the validation passes around tidy, which dominate at these sizes);
+  - times bucket_files and process_files for notes on a copy that's
+    already tidy, the same calls in every tree: before planning existed
+    process_files moved files itself, so only a workspace where nothing
+    has to move compares like for like. The copy is tidied by this
+    checkout (older trees' `org tidy` can fail on it), so every tree
+    measures the same layout.
+
+To compare before/after, run it once per tree with --src pointing at the
+other checkout's src/ (e.g. `git worktree add /tmp/before <rev>` and
+--src /tmp/before/src), with a python that tree runs on. Pieces a tree
+doesn't have are reported as n/a.
+"""
+import argparse
+import inspect
+import os
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def org(src: Path, ws: Path, *args: str, stdin: str = "") -> None:
+    env = dict(os.environ, PYTHONPATH=str(src))
+    subprocess.run(
+        [sys.executable, "-m", "org.org", *args],
+        cwd=ws, env=env, input=stdin, text=True,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True,
+    )
+
+def build_workspace(ws: Path, src: Path, notes: int, lines: int, groups: int) -> None:
+    rng = random.Random(0)
+    ws.mkdir(parents=True)
+    (ws / ".config.json").write_text('{"name": "bench"}', encoding="utf-8")
+    org(src, ws, "init", stdin="bench\n")
+
+    group_tags = [f"proj{g}" for g in range(groups)]
+    for g, tag in enumerate(group_tags):
+        d = ws / f"_group{g}"
+        d.mkdir()
+        (d / ".tagset").write_text(tag + "\n", encoding="utf-8")
+
+    def tags() -> str:
+        picked = [rng.choice(["misc", "reading", "work", "home"])]
+        if group_tags and rng.random() < 0.2:
+            picked.append(rng.choice(group_tags))
+        return ", ".join(picked)
+
+    epoch = datetime(2023, 1, 1).timestamp()
+    for i in range(notes):
+        # every 10th title repeats, so tidy has to allocate suffixed names
+        title = f"note {i // 10}" if i % 10 == 0 else f"note {i}"
+        p = ws / f"n{i}.txt"
+        p.write_text(f"---\ntitle: {title}\ntags: [{tags()}]\n---\n\nbody {i}\n", encoding="utf-8")
+        mtime = epoch + rng.randint(0, 3 * 365) * 86400
+        os.utime(p, (mtime, mtime))
+
+    start = datetime(2023, 1, 1)
+    per_file = 250
+    for kind, prefix in (("td", "t"), ("ev", "e")):
+        for f in range(0, lines, per_file):
+            out = []
+            for j in range(f, min(f + per_file, lines)):
+                day = start + timedelta(days=rng.randint(0, 3 * 365))
+                if kind == "td":
+                    out.append(f"* t: task {j} // #{tags().replace(', ', ' #')} !{rng.randint(1, 4)} %{day:%Y%m%d}")
+                else:
+                    out.append(f"* e: event {j} // >{day:%Y%m%dT%H%M} #{tags().replace(', ', ' #')}")
+            (ws / f"{prefix}{f // per_file}.{kind}").write_text("\n".join(out) + "\n", encoding="utf-8")
+
+    # validate once so .org.db is filled in
+    org(src, ws, "tags")
+
+def best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def row(label: str, secs: float | None) -> None:
+    print(f"  {label:<28} {'n/a' if secs is None else f'{secs * 1000:.1f} ms':>13}")
+
+def bench_planning(ws: Path, src: Path, repeat: int) -> None:
+    # tidy reads the workspace root from the cwd at import time
+    os.chdir(ws)
+    sys.path.insert(0, str(src))
+    from org.commands import tidy
+
+    conn = sqlite3.connect(".org.db", isolation_level=None)
+    c = conn.cursor()
+    tagsets = tidy.get_tagsets()
+
+    print("planning (in-process, best of %d):" % repeat)
+    row("get_tagsets", best_of(repeat, tidy.get_tagsets))
+    row("bucket_files .txt", best_of(repeat, lambda: tidy.bucket_files(c, ".txt", tagsets)))
+    row("bucket_lines .td", best_of(repeat, lambda: tidy.bucket_lines(c, ".td", tagsets, 100)))
+    row("bucket_lines .ev", best_of(repeat, lambda: tidy.bucket_lines(c, ".ev", tagsets, 100)))
+
+    if hasattr(tidy, "NameAllocator"):
+        def allocate():
+            names = tidy.NameAllocator()
+            for i in range(5000):
+                names.allocate(ws, f"note_{i // 10}", ".txt", str(i))
+        row("NameAllocator 5000 names", best_of(repeat, allocate))
+    else:
+        row("NameAllocator 5000 names", None)
+
+    if hasattr(tidy, "build_plan"):
+        row("build_plan", best_of(repeat, lambda: tidy.build_plan(c, 100, True)))
+    else:
+        row("build_plan", None)
+    conn.close()
+
+def bench_end_to_end(ws: Path, src: Path, repeat: int, scratch: Path) -> None:
+    print("org tidy (subprocess, best of %d):" % repeat)
+    first = again = float("inf")
+    for k in range(repeat):
+        copy = scratch / f"run{k}"
+        shutil.copytree(ws, copy, symlinks=True)
+        try:
+            t0 = time.perf_counter()
+            org(src, copy, "tidy")
+            first = min(first, time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            org(src, copy, "tidy")
+            again = min(again, time.perf_counter() - t0)
+        except subprocess.CalledProcessError as e:
+            # older trees can fail tidying this workspace outright
+            print(f"  tidy failed (exit {e.returncode}), skipping end-to-end timings")
+            return
+        finally:
+            shutil.rmtree(copy)
+    row("messy workspace", first)
+    row("already tidy", again)
+
+def bench_process_files(ws: Path, src: Path, repeat: int, scratch: Path) -> None:
+    from org.commands import tidy
+
+    print("notes already in place (in-process, best of %d):" % repeat)
+    copy = scratch / "tidy"
+    shutil.copytree(ws, copy, symlinks=True)
+    org(ROOT / "src", copy, "tidy")
+
+    # tidy took its ROOT from the cwd it was imported in (the messy workspace)
+    os.chdir(copy)
+    tidy.ROOT = copy
+    conn = sqlite3.connect(".org.db", isolation_level=None)
+    c = conn.cursor()
+    tagsets = tidy.get_tagsets()
+    buckets = tidy.bucket_files(c, ".txt", tagsets)
+
+    # newer trees pass process_files the NameAllocator its moves claim names from
+    if "names" in inspect.signature(tidy.process_files).parameters:
+        process = lambda b: tidy.process_files(".txt", b, 100, tidy.NameAllocator())
+    else:
+        process = lambda b: tidy.process_files(".txt", b, 100)
+
+    row("process_files .txt", best_of(repeat, lambda: process(buckets)))
+    row("bucket_files + process_files", best_of(repeat, lambda: process(tidy.bucket_files(c, ".txt", tagsets))))
+    conn.close()
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--notes", type=int, default=5000, help="notes (default 5000)")
+    ap.add_argument("--lines", type=int, default=5000, help="todo lines and event lines, each (default 5000)")
+    ap.add_argument("--groups", type=int, default=20, help="_group dirs (default 20)")
+    ap.add_argument("--repeat", type=int, default=3, help="runs per measurement, best is reported (default 3)")
+    ap.add_argument("--src", type=Path, default=ROOT / "src", help="src/ of the tree to measure (default this one)")
+    args = ap.parse_args()
+    src = args.src.resolve()
+
+    with tempfile.TemporaryDirectory(prefix="org-bench-tidy-") as tmp:
+        ws = Path(tmp) / "ws"
+        t0 = time.perf_counter()
+        build_workspace(ws, src, args.notes, args.lines, args.groups)
+        print(
+            f"{args.notes} notes, {args.lines} todos, {args.lines} events, {args.groups} groups "
+            f"(built in {time.perf_counter() - t0:.1f}s) from {src}"
+        )
+        bench_end_to_end(ws, src, args.repeat, Path(tmp))
+        bench_planning(ws, src, args.repeat)
+        bench_process_files(ws, src, args.repeat, Path(tmp))
+
+if __name__ == "__main__":
+    main()
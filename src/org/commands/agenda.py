@@ -0,0 +1,144 @@
+import typing as tp
+from .system.cli_helpers import flow_line, add_interval, parse_duration
+from .system.occurrences import occurrences_between
+
+def find_overlaps(spans: list[tuple[tp.Any, tp.Any]]) -> set[int]:
+    """
+    Indices of spans (start, end) that overlap at least one other span.
+    Spans touching end-to-start don't count.
+
+    Sweep in start order keeping the furthest end seen in the current run
+    of overlapping spans: anything starting before that end overlaps the
+    span that reached it (which is still open), so a run with more than one
+    member is all clashes. O(n log n) for the sort, one pass after that.
+    """
+    order = sorted(range(len(spans)), key=lambda i: spans[i][0])
+    clashing: set[int] = set()
+
+    run: list[int] = []
+    run_end = None
+    for i in order:
+        start, end = spans[i]
+        if run and start < run_end:
+            run.append(i)
+            run_end = max(run_end, end)
+            continue
+        if len(run) > 1:
+            clashing.update(run)
+        run = [i]
+        run_end = end
+    if len(run) > 1:
+        clashing.update(run)
+
+    return clashing
+
+def cmd_agenda(c, *args):
+    """
+    org agenda [--week | --month | --from YYYY-MM-DD [--to YYYY-MM-DD]]
+
+    One-off and recurring events over a range (default: today + 6 days),
+    in start order. Timed events that overlap another are flagged; all-day
+    events never count as a clash.
+
+    Layout:
+      *  Event name.........Mon 20 Oct, 09:00-10:00, #tag, ~/file.ev
+      !  Clashing event.....Mon 20 Oct, 09:30-11:00, overlap, ~/file.ev
+    """
+    import sys
+    import json
+    from datetime import date, datetime, time, timedelta
+    from shutil import get_terminal_size
+
+    USAGE = "Usage: org agenda [--week | --month | --from YYYY-MM-DD [--to YYYY-MM-DD]]"
+
+    today = date.today()
+    span = "week"
+    range_from: date | None = None
+    range_to: date | None = None
+
+    def parse_day(flag: str, raw: str | None) -> date:
+        try:
+            return date.fromisoformat(raw or "")
+        except ValueError:
+            sys.exit(f"{flag} needs a date like 2025-01-31 (got {raw!r})\n{USAGE}")
+
+    rest = list(args)
+    while rest:
+        a = rest.pop(0)
+        flag, eq, val = a.partition("=")
+        if flag in ("--week", "--month") and not eq:
+            span = flag[2:]
+        elif flag in ("--from", "--to"):
+            raw = val if eq else (rest.pop(0) if rest else None)
+            if flag == "--from":
+                range_from = parse_day(flag, raw)
+            else:
+                range_to = parse_day(flag, raw)
+        else:
+            sys.exit(f"Unknown option for agenda: {a}\n{USAGE}")
+
+    start = range_from or today
+    if range_to is not None:
+        end = range_to
+    elif span == "month":
+        end = add_interval(start, 1, "m") - timedelta(days=1)
+    else:
+        end = start + timedelta(days=6)
+
+    if end < start:
+        sys.exit(f"--to is before --from\n{USAGE}")
+
+    term_w = get_terminal_size((80, 24)).columns
+
+    heading = f"=  AGENDA {start:%a %d %b} - {end:%a %d %b %Y}"
+    rem = term_w - len(heading)
+    print()
+    print(heading + " " + "=" * (rem - 1))
+
+    instances = list(occurrences_between(c, start, end))
+    if not instances:
+        print("\n(no events)")
+        return
+
+    # clash check over timed instances only; one-offs use their end, or
+    # the same default length a pattern without +duration gets
+    timed: list[int] = []
+    spans: list[tuple[datetime, datetime]] = []
+    ends: list[datetime | None] = []
+    for n, (s, ee, row) in enumerate(instances):
+        if ee is None and row["end"]:
+            try:
+                ee = datetime.fromisoformat(row["end"])
+            except ValueError:
+                ee = None
+        ends.append(ee)
+
+        if s.time() == time(0, 0) and (ee is None or ee - s >= timedelta(days=1)):
+            continue
+        timed.append(n)
+        spans.append((s, ee if ee is not None and ee > s else s + parse_duration(None, True)))
+
+    clashing = {timed[i] for i in find_overlaps(spans)}
+
+    def format_line(n: int) -> str:
+        s, _ee, row = instances[n]
+        ee = ends[n]
+        meta_parts: list[str] = [s.strftime("%a %d %b")]
+        if s.time() != time(0, 0):
+            meta_parts.append(f"{s:%H:%M}" + (f"-{ee:%H:%M}" if ee and ee > s else ""))
+        if n in clashing:
+            meta_parts.append("overlap")
+        tags = json.loads(row["tags"]) if row["tags"] else []
+        if tags:
+            meta_parts.append(" ".join(f"#{t}" for t in tags))
+        meta_parts.append(f"~/{row['path']}")
+        line = flow_line(row["event"], ", ".join(meta_parts), term_w)
+        if n in clashing and line.startswith("*"):
+            line = "!" + line[1:]
+        return line
+
+    for n in range(len(instances)):
+        print(format_line(n))
+
+    if clashing:
+        print(f"\n{len(clashing)} overlapping event(s) marked with !")
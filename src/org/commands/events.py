@@ -1,5 +1,6 @@
 import typing as tp
-from .system.cli_helpers import flow_line, generate_instances_for_date, parse_pattern
+from .system.cli_helpers import flow_line
+from .system.occurrences import occurrences_between
 
 def cmd_events(c, *args):
     """
@@ -58,17 +59,8 @@ def cmd_events(c, *args):
         meta = ", ".join(meta_parts)
         return flow_line(event_text, meta, term_w)
 
-    # ---- fetch all events ----
-    rows = c.execute("""
-        SELECT event, start, pattern, tags, path, status, priority, creation
-          FROM all_events
-         WHERE valid = 1
-        ORDER BY creation DESC
-    """).fetchall()
-
-    # ---- collect all instances for today ----
-    instances: list[tuple[datetime, tp.Optional[datetime], str, str, list[str]]] = []
-    for row in rows:
+    # ---- today's instances, already in start order ----
+    for s, ee, row in occurrences_between(c, today, today):
         tags = json.loads(row["tags"]) if row["tags"] else []
 
         # legacy tag filter
@@ -83,23 +75,6 @@ def cmd_events(c, *args):
         if "file" in prop_filters and Path(row["path"]).name != prop_filters["file"]:
             continue
 
-        path_str = row["path"]
-        start_raw = row["start"]
-        start_dt = datetime.fromisoformat(start_raw) if isinstance(start_raw, str) else start_raw
-
-        if row["pattern"]:
-            pat = parse_pattern(row["pattern"])
-            for s, ee in generate_instances_for_date(pat, start_dt, today):
-                instances.append((s, ee, row["event"], path_str, tags))
-        else:
-            if start_dt.date() == today:
-                instances.append((start_dt, None, row["event"], path_str, tags))
-
-    # ---- sort by start time ----
-    instances.sort(key=lambda inst: inst[0])
-
-    # ---- print ----
-    for s, ee, event_text, path_str, tags in instances:
         time_label = f"{s:%H:%M}" + (f"-{ee:%H:%M}" if ee else "")
         tags_str = ", ".join(tags) if tags else "-"
-        print(format_event_line(event_text, time_label, tags_str, path_str))
+        print(format_event_line(row["event"], time_label, tags_str, row["path"]))
@@ -0,0 +1,299 @@
+import sys
+import json
+import typing as tp
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+from .system.cli_helpers import parse_pattern, generate_instances_between, CompiledPattern
+from .system.occurrences import occurrence_horizon
+
+# ----------------------------
+# iCalendar (RFC 5545)
+# ----------------------------
+#
+# One VEVENT per one-off event. A patterned event becomes one VEVENT with
+# an RRULE when the rule means exactly what org would show (see
+# pattern_rrule); anything else is expanded into one VEVENT per instance.
+# Everything is yielded line by line, so nothing holds the calendar.
+#
+# Times are floating (no TZID), same as the .ev files. An instance at
+# 00:00 lasting whole days is an all-day (VALUE=DATE) event.
+
+ICS_PRODID = "-//org//org export ics//EN"
+_ICS_DAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+_ALL_WEEKDAYS = sum(1 << n for n in range(1, 8))
+_ALL_MONTHDAYS = sum(1 << n for n in range(1, 32))
+_FREQS = {"d": "DAILY", "w": "WEEKLY", "m": "MONTHLY", "y": "YEARLY"}
+
+# how far past range_start to look for a series' first instance
+_FIRST_INSTANCE_SEARCH = timedelta(days=5 * 366)
+
+def ics_escape(text: str) -> str:
+    return (
+        text.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+def ics_fold(line: str) -> str:
+    """
+    Fold a content line at 75 octets (continuations start with a space),
+    never inside a UTF-8 character. Returns it CRLF-terminated.
+    """
+    if len(line) <= 75 and line.isascii():
+        return line + "\r\n"
+    out: list[str] = []
+    chunk: list[str] = []
+    size = 0
+    limit = 75
+    for ch in line:
+        n = len(ch.encode("utf-8"))
+        if size + n > limit:
+            out.append("".join(chunk))
+            chunk, size, limit = [], 0, 74
+        chunk.append(ch)
+        size += n
+    out.append("".join(chunk))
+    return "\r\n ".join(out) + "\r\n"
+
+def _bit_list(bits: int, lo: int, hi: int) -> list[int]:
+    return [n for n in range(lo, hi + 1) if bits >> n & 1]
+
+def pattern_rrule(pat: CompiledPattern, start_dt: datetime) -> str | None:
+    """
+    The RRULE (without DTSTART/UNTIL) for a pattern, or None if there is
+    no rule with the same instances, in which case the caller expands.
+
+    Only date starts (00:00) translate. With a time on the start, org
+    counts periods from midnight, which no RRULE reproduces. Then:
+      - one d/w/m/y interval, not anchored;
+      - @wd and ~wd on 1d or Nw, @m and ~m on 1d, nothing else on m/y;
+      - @h/@n only with valid, distinct values;
+      - months only for days 1-28 and years not from Feb 29, since org
+        clamps those days where a rule would skip the month.
+    """
+    if start_dt.time() != time(0, 0) or pat.anchored or pat.never:
+        return None
+    if len(pat.intervals) != 1:
+        return None
+    n, unit = pat.intervals[0]
+    if unit not in _FREQS or n < 1:
+        return None
+
+    weekdays = (pat.weekdays if pat.weekdays is not None else _ALL_WEEKDAYS) & ~pat.excluded_weekdays
+    monthdays = (pat.monthdays if pat.monthdays is not None else _ALL_MONTHDAYS) & ~pat.excluded_monthdays
+    has_wd = weekdays != _ALL_WEEKDAYS
+    has_md = monthdays != _ALL_MONTHDAYS
+
+    parts = [f"FREQ={_FREQS[unit]}"]
+    if n > 1:
+        parts.append(f"INTERVAL={n}")
+
+    if unit == "d":
+        # @wd turns the period into a week block, which only coincides
+        # with the days for 1d
+        if n != 1 and (has_wd or has_md or pat.weekdays is not None):
+            return None
+    elif unit == "w":
+        if has_md:
+            return None
+        if pat.weekdays is None:
+            # one instance a week, on the start's weekday; ~wd either
+            # always or never hits it
+            if not weekdays >> start_dt.isoweekday() & 1:
+                return None
+            has_wd = False
+        else:
+            # any of the days in the week block from each period start,
+            # i.e. org's weeks run from the series start's weekday
+            has_wd = True
+            parts.append(f"WKST={_ICS_DAYS[start_dt.isoweekday() - 1]}")
+    else:
+        if has_wd or has_md or pat.weekdays is not None or pat.monthdays is not None:
+            return None
+        if unit == "m" and start_dt.day > 28:
+            return None
+        if unit == "y" and (start_dt.month, start_dt.day) == (2, 29):
+            return None
+
+    if has_wd:
+        if not weekdays:
+            return None
+        parts.append("BYDAY=" + ",".join(_ICS_DAYS[d - 1] for d in _bit_list(weekdays, 1, 7)))
+    if has_md:
+        if not monthdays:
+            return None
+        parts.append("BYMONTHDAY=" + ",".join(str(d) for d in _bit_list(monthdays, 1, 31)))
+
+    if pat.hours is not None or pat.minutes is not None:
+        hours = pat.hours if pat.hours is not None else (start_dt.hour,)
+        minutes = pat.minutes if pat.minutes is not None else (start_dt.minute,)
+        if not hours or not minutes:
+            return None
+        if len(set(hours)) != len(hours) or len(set(minutes)) != len(minutes):
+            return None
+        if not all(0 <= h <= 23 for h in hours) or not all(0 <= m <= 59 for m in minutes):
+            return None
+        parts.append("BYHOUR=" + ",".join(str(h) for h in sorted(hours)))
+        parts.append("BYMINUTE=" + ",".join(str(m) for m in sorted(minutes)))
+
+    return ";".join(parts)
+
+def _ics_when(s: datetime, e: datetime | None) -> tuple[list[str], bool]:
+    """DTSTART/DTEND lines for one instance, and whether it's all-day."""
+    all_day = s.time() == time(0, 0) and (e is None or (e > s and (e - s) % timedelta(days=1) == timedelta()))
+    if all_day:
+        e = e or s + timedelta(days=1)
+        return [f"DTSTART;VALUE=DATE:{s:%Y%m%d}", f"DTEND;VALUE=DATE:{e:%Y%m%d}"], True
+    lines = [f"DTSTART:{s:%Y%m%dT%H%M%S}"]
+    if e is not None and e > s:
+        lines.append(f"DTEND:{e:%Y%m%dT%H%M%S}")
+    return lines, False
+
+def _ics_vevent(uid: str, stamp: str, row, when: list[str], rrule: str | None = None) -> tp.Iterator[str]:
+    yield "BEGIN:VEVENT"
+    yield f"UID:{uid}"
+    yield f"DTSTAMP:{stamp}"
+    yield from when
+    if rrule:
+        yield f"RRULE:{rrule}"
+    yield f"SUMMARY:{ics_escape(row['event'])}"
+    tags = json.loads(row["tags"]) if row["tags"] else []
+    if tags:
+        yield "CATEGORIES:" + ",".join(ics_escape(t) for t in tags)
+    yield f"DESCRIPTION:{ics_escape('~/' + row['path'])}"
+    yield "END:VEVENT"
+
+def ics_lines(c, range_start: date | None, range_end: date | None, expand_until: date) -> tp.Iterator[str]:
+    """
+    Unfolded content lines of a VCALENDAR with every valid event that
+    has an instance in range_start..range_end (inclusive, None = open).
+    Patterns that can't be an RRULE are expanded up to range_end, or
+    expand_until when the range is open-ended.
+    """
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    where = ["valid = 1"]
+    params: list[str] = []
+    if range_start is not None:
+        where.append("(has_pattern = 1 OR start_key >= ?)")
+        params.append(range_start.isoformat())
+    if range_end is not None:
+        where.append("start_key < ?")
+        params.append((range_end + timedelta(days=1)).isoformat())
+
+    yield "BEGIN:VCALENDAR"
+    yield "VERSION:2.0"
+    yield f"PRODID:{ICS_PRODID}"
+    yield "CALSCALE:GREGORIAN"
+
+    # iterate the cursor rather than fetchall: one row in memory at a time
+    for row in c.execute(f"""
+        SELECT id, event, start, end, pattern, tags, path
+          FROM all_events
+         WHERE {" AND ".join(where)}
+      ORDER BY start_key, id
+    """, params):
+        start_dt = datetime.fromisoformat(row["start"])
+
+        if not row["pattern"]:
+            end_dt = datetime.fromisoformat(row["end"]) if row["end"] else None
+            when, _ = _ics_when(start_dt, end_dt)
+            yield from _ics_vevent(f"{row['id']}@org", stamp, row, when)
+            continue
+
+        pat = parse_pattern(row["pattern"])
+        lo = max(range_start or start_dt.date(), start_dt.date())
+        hi = range_end or expand_until
+        rrule = pattern_rrule(pat, start_dt)
+
+        if rrule is not None:
+            # DTSTART has to be an instance; the first one in range is
+            first = next(iter(generate_instances_between(pat, start_dt, lo, min(hi, lo + _FIRST_INSTANCE_SEARCH))), None)
+            if first is None:
+                continue
+            when, all_day = _ics_when(*first)
+            if range_end is not None:
+                rrule += f";UNTIL={range_end:%Y%m%d}" if all_day else f";UNTIL={range_end:%Y%m%d}T235959"
+            yield from _ics_vevent(f"{row['id']}@org", stamp, row, when, rrule)
+            continue
+
+        for s, e in generate_instances_between(pat, start_dt, lo, hi):
+            when, _ = _ics_when(s, e)
+            yield from _ics_vevent(f"{row['id']}-{s:%Y%m%dT%H%M%S}@org", stamp, row, when)
+
+    yield "END:VCALENDAR"
+
+def write_ics(lines: tp.Iterable[str], out: tp.TextIO) -> int:
+    """Fold and write content lines with CRLF endings. Returns VEVENT count."""
+    events = 0
+    for line in lines:
+        if line == "BEGIN:VEVENT":
+            events += 1
+        out.write(ics_fold(line))
+    return events
+
+# ----------------------------
+# Command
+# ----------------------------
+
+def cmd_export(c, *args):
+    """
+    org export ics [--from YYYY-MM-DD] [--to YYYY-MM-DD] [--out PATH]
+
+    Events as an iCalendar file (stdout unless --out). Without --to,
+    patterns that can't be written as an RRULE are expanded up to the
+    end of the occurrence horizon ("occurrence_horizon" in .config.json).
+    """
+    USAGE = "Usage: org export ics [--from YYYY-MM-DD] [--to YYYY-MM-DD] [--out PATH]"
+
+    rest = list(args)
+    if not rest or rest[0] != "ics":
+        sys.exit(f"Nothing to export as {rest[0]!r}\n{USAGE}" if rest else USAGE)
+    rest.pop(0)
+
+    range_from: date | None = None
+    range_to: date | None = None
+    out_path: str | None = None
+
+    while rest:
+        a = rest.pop(0)
+        flag, eq, val = a.partition("=")
+        if flag not in ("--from", "--to", "--out"):
+            sys.exit(f"Unknown option for export: {a}\n{USAGE}")
+        raw = val if eq else (rest.pop(0) if rest else "")
+        if flag == "--out":
+            if not raw:
+                sys.exit(f"--out needs a path\n{USAGE}")
+            out_path = raw
+            continue
+        try:
+            day = date.fromisoformat(raw)
+        except ValueError:
+            sys.exit(f"{flag} needs a date like 2025-01-31 (got {raw!r})\n{USAGE}")
+        if flag == "--from":
+            range_from = day
+        else:
+            range_to = day
+
+    if range_from and range_to and range_to < range_from:
+        sys.exit(f"--to is before --from\n{USAGE}")
+
+    try:
+        cfg = json.loads(Path(".config.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        cfg = {}
+    expand_until = date.today() + timedelta(days=occurrence_horizon(cfg)[1])
+
+    lines = ics_lines(c, range_from, range_to, expand_until)
+    if out_path is None:
+        # same as the file: CRLF left alone (text-mode stdout would turn
+        # them into \r\r\n on Windows) and UTF-8 whatever the locale
+        sys.stdout.reconfigure(encoding="utf-8", newline="")
+        write_ics(lines, sys.stdout)
+        return
+
+    with open(out_path, "w", encoding="utf-8", newline="") as f:
+        n = write_ics(lines, f)
+    print(f"Exported {n} event(s) to {out_path}")
@@ -0,0 +1,93 @@
+import sys
+from datetime import date, timedelta
+from shutil import get_terminal_size
+from .system.cli_helpers import flow_line, get_report_date, effective_priorities_asof
+from .system.snapshot import load_todo_records
+
+# statuses `org todos` lists by default, i.e. still open
+OPEN_STATUSES = {"todo", "inprogress", "dependent", "blocked", "unknown"}
+FORECAST_DAYS = 28
+
+def priority_timeline(records, start: date, days: int) -> list[list[int]]:
+    """
+    Effective priority of each record on start, start + 1, ... (one list
+    per day, same order as records), using the same band rules as the
+    report. Deadlines are parsed once for the whole window.
+    """
+    priorities = [r.priority for r in records]
+    deadlines = [r.deadline for r in records]
+    return [
+        effective_priorities_asof(priorities, deadlines, as_of=start + timedelta(days=k))
+        for k in range(days)
+    ]
+
+def cmd_forecast(c, *args):
+    """
+    org forecast [YYYY-MM-DD] [--days N]
+
+    How open todos' effective priorities move over the next N days
+    (default FORECAST_DAYS) as deadlines approach or pass: per-day counts
+    per priority, and under each day the todos that changed band.
+
+    Layout:
+      -  Tue 20 Oct: !1 4, !2 11, !3 7, !4 30
+      *  Write report.......................!2 -> !1, #work, ~/file.td
+    """
+    USAGE = "Usage: org forecast [YYYY-MM-DD] [--days N]"
+
+    start, rest = get_report_date(list(args))
+    days = FORECAST_DAYS
+    while rest:
+        a = rest.pop(0)
+        flag, eq, val = a.partition("=")
+        if flag != "--days":
+            sys.exit(f"Unknown option for forecast: {a}\n{USAGE}")
+        raw = val if eq else (rest.pop(0) if rest else "")
+        try:
+            days = int(raw)
+        except ValueError:
+            sys.exit(f"--days needs a number (got {raw!r})\n{USAGE}")
+        if days < 1:
+            sys.exit(f"--days must be at least 1\n{USAGE}")
+
+    records = [
+        r for r in load_todo_records(c)
+        if r.status in OPEN_STATUSES and r.priority is not None
+    ]
+    end = start + timedelta(days=days - 1)
+
+    term_w = get_terminal_size((80, 24)).columns
+    heading = f"=  FORECAST {start:%a %d %b} - {end:%a %d %b %Y}"
+    rem = term_w - len(heading)
+    print()
+    print(heading + " " + "=" * (rem - 1))
+
+    if not records:
+        print("\n(no open todos)")
+        return
+
+    timeline = priority_timeline(records, start, days)
+    levels = sorted({p for day in timeline for p in day})
+
+    prev: list[int] | None = None
+    for k, prios in enumerate(timeline):
+        counts = {p: 0 for p in levels}
+        for p in prios:
+            counts[p] += 1
+        day = start + timedelta(days=k)
+        print(f"-  {day:%a %d %b}: " + ", ".join(f"!{p} {counts[p]}" for p in levels))
+
+        if prev is not None:
+            # most urgent first, then file order
+            changed = sorted(
+                (i for i, (old, new) in enumerate(zip(prev, prios)) if old != new),
+                key=lambda i: (prios[i], i),
+            )
+            for i in changed:
+                r = records[i]
+                meta_parts = [f"!{prev[i]} -> !{prios[i]}"]
+                if r.tags:
+                    meta_parts.append(" ".join(f"#{t}" for t in r.tags))
+                meta_parts.append(f"~/{r.path}")
+                print(flow_line(r.todo, ", ".join(meta_parts), term_w))
+        prev = prios
@@ -12,6 +12,7 @@ from shutil import get_terminal_size
 from .system.cli_helpers import flow_line, get_report_date, cmd_calendar, cmd_routines_today
 import re
 from ..validate import SCHEMA, main as validate_main
+from ..orglock import workspace_lock, SHARED, EXCLUSIVE
 
 def ui_print(*args, **kwargs) -> None:
     print(*args, **kwargs)
@@ -157,6 +158,12 @@ class PickSession:
     page: int = 0
     p3_random_keys: dict[str, str] = field(default_factory=dict)
 
+    # bumped whenever edits/status updates may have changed; the review
+    # field is only rebuilt when this moves (paging/selecting reuse it)
+    revision: int = 0
+    # todo key -> (the item object annotated, kept?); see annotate_todos
+    annotations: dict[str, tuple[TodoItem, bool]] = field(default_factory=dict)
+
 # ============================================================
 # main
 # ============================================================
@@ -178,9 +185,13 @@ def cmd_report2(c, *args):
     parsed_args, out_path = parse_report2_args(list(args))
     report_day, _rest = get_report_date(parsed_args)
 
-    ensure_report2_state_table(c)
+    # read once, under a shared lock that's let go before we wait on the
+    # user; only written back (exclusively) after both pick cycles
+    with workspace_lock().hold(SHARED):
+        ensure_report2_state_table(c)
+        last_selected = load_last_selected(c)
 
-    todos = load_todos(c)
+        todos = load_todos(c)
 
     try:
         ctx = ask_report_context(c, report_day, todos)
@@ -196,6 +207,7 @@ def cmd_report2(c, *args):
             report_day=report_day,
             scope=ctx.focus_scope,
             title="FOCUS",
+            last_selected=last_selected,
         )
 
         project_selected: list[TodoItem] = []
@@ -206,6 +218,7 @@ def cmd_report2(c, *args):
                 report_day=report_day,
                 scope=ctx.project_scope or ctx.focus_scope,
                 title="PROJECT FOCUS",
+                last_selected=last_selected,
             )
 
     except ReportCancelled:
@@ -858,19 +871,43 @@ def annotate_todos(
     c,
     todos: list[TodoItem],
     report_day: date,
+    last_selected: dict[str, str | None] | None = None,
+    cache: dict[str, tuple[TodoItem, bool]] | None = None,
 ) -> list[TodoItem]:
+    """
+    Classify todos in place, dropping terminal ones.
+
+    last_selected: report2_state as loaded by load_last_selected; without
+    it each todo is looked up on its own.
+    cache: remembers which item object was annotated per key. Unedited
+    todos come back as the same object every time, so they're skipped;
+    an edit produces a new object (see apply_session_edits/run_pick_edit)
+    and only that one is classified again.
+    """
     out: list[TodoItem] = []
     terminal_statuses = {"done", "complete", "completed", "x", "redundant", "cancelled"}
 
     for todo in todos:
-        if (todo.status or "").strip().lower() in terminal_statuses:
-            continue
+        if cache is not None:
+            hit = cache.get(todo.key())
+            if hit is not None and hit[0] is todo:
+                if hit[1]:
+                    out.append(todo)
+                continue
 
-        todo.todo_type = classify_todo_type(todo, report_day)
-        todo.bucket = map_type_to_bucket(todo.todo_type, "wide") if todo.todo_type else None
-        todo.urgency_band = classify_urgency_band(todo, report_day)
-        todo.last_selected = get_last_selected(c, todo)
-        out.append(todo)
+        keep = (todo.status or "").strip().lower() not in terminal_statuses
+        if keep:
+            todo.todo_type = classify_todo_type(todo, report_day)
+            todo.bucket = map_type_to_bucket(todo.todo_type, "wide") if todo.todo_type else None
+            todo.urgency_band = classify_urgency_band(todo, report_day)
+            if last_selected is not None:
+                todo.last_selected = last_selected.get(todo.id)
+            else:
+                todo.last_selected = get_last_selected(c, todo)
+            out.append(todo)
+
+        if cache is not None:
+            cache[todo.key()] = (todo, keep)
 
     return out
 
@@ -1167,24 +1204,38 @@ def run_pick_cycle(
     report_day: date,
     scope: str,
     title: str = "FOCUS",
+    last_selected: dict[str, str | None] | None = None,
 ) -> list[TodoItem]:
     session = PickSession()
     budget = scope_budget(scope)
     message_line: str | None = None
 
+    if last_selected is None:
+        last_selected = load_last_selected(c)
+
+    built_revision: int | None = None
+
     while True:
-        effective_todos = apply_session_edits(
-            base_todos,
-            session.edited_items,
-            session.pending_status_updates,
-        )
+        if built_revision != session.revision:
+            effective_todos = apply_session_edits(
+                base_todos,
+                session.edited_items,
+                session.pending_status_updates,
+            )
 
-        annotated = annotate_todos(c, effective_todos, report_day)
-        field, stats, session.p3_random_keys = build_review_field(
-            annotated,
-            scope,
-            session.p3_random_keys,
-        )
+            annotated = annotate_todos(
+                c,
+                effective_todos,
+                report_day,
+                last_selected=last_selected,
+                cache=session.annotations,
+            )
+            field, stats, session.p3_random_keys = build_review_field(
+                annotated,
+                scope,
+                session.p3_random_keys,
+            )
+            built_revision = session.revision
 
         field_map = {t.key(): t for t in field}
         session.selected_keys = {k for k in session.selected_keys if k in field_map}
@@ -1243,6 +1294,7 @@ def run_pick_cycle(
         edit_idx = parse_prefixed_number(lowered, "e", len(page_items))
         if edit_idx is not None:
             run_pick_edit(c, session, page_items[edit_idx])
+            session.revision += 1
             continue
 
         indexes = parse_pick_numbers(raw, len(page_items))
@@ -1633,6 +1685,14 @@ def refresh_after_todo_file_change() -> None:
     validate_main(SCHEMA)
 
 def flush_override_session_changes(c, session: PickSession) -> None:
+    if not session.edited_items and not session.pending_status_updates:
+        return
+
+    # the rest of report2 only reads, but this rewrites .td files
+    with workspace_lock().hold(EXCLUSIVE):
+        _flush_override_session_changes(c, session)
+
+def _flush_override_session_changes(c, session: PickSession) -> None:
     wrote_any = False
 
     # 1. write non-terminal full edits
@@ -1692,6 +1752,14 @@ def ensure_report2_state_table(c) -> None:
     c.connection.commit()
 
 
+def load_last_selected(c) -> dict[str, str | None]:
+    """All of report2_state as {todo id: last_selected}."""
+    return {
+        row["id"]: row["last_selected"]
+        for row in c.execute("SELECT id, last_selected FROM main.report2_state")
+    }
+
+
 def get_last_selected(c, todo: TodoItem) -> str | None:
     row = c.execute("""
         SELECT last_selected
@@ -1710,14 +1778,15 @@ def persist_last_selected(c, todos: list[TodoItem], report_day: date) -> None:
 
     iso = report_day.isoformat()
 
-    c.executemany("""
-        INSERT INTO main.report2_state (id, last_selected)
-        VALUES (?, ?)
-        ON CONFLICT(id) DO UPDATE SET
-            last_selected = excluded.last_selected
-    """, [(todo.id, iso) for todo in todos])
+    with workspace_lock().hold(EXCLUSIVE):
+        c.executemany("""
+            INSERT INTO main.report2_state (id, last_selected)
+            VALUES (?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                last_selected = excluded.last_selected
+        """, [(todo.id, iso) for todo in todos])
 
-    c.connection.commit()
+        c.connection.commit()
 
 
 # ============================================================
@@ -1,7 +1,9 @@
 import re
 import calendar
 import typing as tp
-from ...validate import _parse_deadline, _fmt_deadline
+from dataclasses import dataclass
+from functools import lru_cache
+from ...validate import _parse_deadline, _fmt_deadline, _priority_band
 from datetime import datetime, time, timedelta, date
 
 def _as_dt(as_of: datetime | date) -> datetime:
@@ -58,28 +60,48 @@ def normalise_priority_and_deadline_asof(
 
     # 2) Deadline exists: normalise urgency bands
     delta_days = (deadline_dt - now).total_seconds() / 86400.0
+    metadata_dict["priority"][0] = _priority_band(pval, delta_days)
 
-    # future: 4–2 weeks
-    if 14 <= delta_days <= 28:
-        if pval > 2:
-            metadata_dict["priority"][0] = 2
+    return metadata_dict
 
-    # future: 2–0 weeks
-    elif 0 <= delta_days < 14:
-        if pval > 1:
-            metadata_dict["priority"][0] = 1
+def _dt_us(dt: datetime) -> int:
+    # microseconds since 0001-01-01, so deadline arithmetic is plain ints
+    return ((dt.toordinal() * 86400 + dt.hour * 3600 + dt.minute * 60 + dt.second) * 1_000_000) + dt.microsecond
 
-    # past: 2–4 weeks overdue
-    elif -28 <= delta_days <= -14:
-        if pval < 2:
-            metadata_dict["priority"][0] = 2
+@lru_cache(maxsize=4096)
+def _deadline_us(deadline: str) -> int | None:
+    dt = _parse_deadline(deadline)
+    return None if dt is None else _dt_us(dt)
 
-    # past: more than 4 weeks overdue
-    elif delta_days < -28:
-        if pval < 3:
-            metadata_dict["priority"][0] = 3
+def effective_priorities_asof(
+    priorities: tp.Sequence[int],
+    deadlines: tp.Sequence[str | None],
+    *,
+    as_of: datetime | date,
+) -> list[int]:
+    """
+    effective_priority_asof for whole columns at once: same results, but
+    each distinct deadline is parsed once (cached) and every row is just
+    integer arithmetic plus the band check.
 
-    return metadata_dict
+    With no (parseable) deadline the priority stands: priorities 1/2 get
+    a deadline exactly 2/4 weeks out, which is on a band edge that keeps
+    them, and 3/4 are left alone.
+    """
+    now_us = _dt_us(_as_dt(as_of))
+    out: list[int] = []
+    for pval, dval in zip(priorities, deadlines, strict=True):
+        dl_us = _deadline_us(dval) if dval else None
+        if dl_us is None:
+            out.append(int(pval))
+            continue
+        # same float steps as timedelta.total_seconds() / 86400.0
+        out.append(int(_priority_band(pval, ((dl_us - now_us) / 10**6) / 86400.0)))
+    return out
+
+def norm_tag(t: str) -> str:
+    """'#Work ' -> 'work': how tags are compared everywhere."""
+    return t.strip().lstrip("#").strip().lower()
 
 def iter_tree_paths(tree: dict[str, tp.Any], prefix: tuple[str, ...] = ()) -> list[tuple[str, ...]]:
     """Return all tag-paths in the tree as tuples."""
@@ -91,22 +113,111 @@ def iter_tree_paths(tree: dict[str, tp.Any], prefix: tuple[str, ...] = ()) -> li
             out.extend(iter_tree_paths(sub, p))
     return out
 
+@dataclass(frozen=True)
+class CompiledPattern:
+    """
+    A parsed event pattern with its selectors pre-expanded, so matching a
+    date is a couple of bit tests instead of re-splitting selector strings.
+
+    weekdays / monthdays: bitsets (bit n = isoweekday n / day n) a date
+    must be in, None if the pattern has no such selector. Several
+    selectors of a kind all have to match, so their bitsets are ANDed.
+    excluded_weekdays / excluded_monthdays: ORed bitsets from ~ exclusions.
+    hours / minutes: from @h / @n (the last one of each wins), None if absent.
+    never: a selector of an unknown kind, which matches nothing.
+
+    Still readable like the dict parse_pattern used to return:
+    pat['intervals'], pat['selectors'], ...
+    """
+    anchored: bool
+    intervals: tuple[tuple[int, str], ...]
+    selectors: tuple[str, ...]
+    exclusions: tuple[str, ...]
+    duration: str | None
+    weekdays: int | None
+    monthdays: int | None
+    excluded_weekdays: int
+    excluded_monthdays: int
+    hours: tuple[int, ...] | None
+    minutes: tuple[int, ...] | None
+    never: bool
+
+    def __getitem__(self, key):
+        if key not in ('anchored', 'intervals', 'selectors', 'exclusions', 'duration'):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def matches_date(self, d) -> bool:
+        """Date selectors and exclusions (not times) for the day of d."""
+        if self.never:
+            return False
+        wd = 1 << d.isoweekday()
+        md = 1 << d.day
+        if self.weekdays is not None and not self.weekdays & wd:
+            return False
+        if self.monthdays is not None and not self.monthdays & md:
+            return False
+        return not (self.excluded_weekdays & wd or self.excluded_monthdays & md)
+
+def _selector_bits(spec, lo, hi):
+    # "1,3-5" -> bitset over lo..hi; values outside it can never match
+    bits = 0
+    for part in spec.split(','):
+        if '-' in part:
+            a, b = map(int, part.split('-'))
+        else:
+            a = b = int(part)
+        for n in range(max(a, lo), min(b, hi) + 1):
+            bits |= 1 << n
+    return bits
+
+@lru_cache(maxsize=1024)
 def parse_pattern(pat):
     anchored = pat.startswith('.')
     if anchored: pat = pat[1:]
     m = re.search(r"\+(\d+(?:[ymwdhn])?)$", pat)
     dur = m.group(1) if m else None
     if m: pat = pat[:m.start()]
-    intervals = [(int(n), u) for n, u in re.findall(r"(\d+)([ymwdhn])", pat)]
-    selectors = re.findall(r"@([^@~]+)", pat)
-    exclusions = re.findall(r"~([^@~]+)", pat)
-    return {
-        'anchored': anchored,
-        'intervals': intervals,
-        'selectors': selectors,
-        'exclusions': exclusions,
-        'duration': dur
-    }
+    intervals = tuple((int(n), u) for n, u in re.findall(r"(\d+)([ymwdhn])", pat))
+    selectors = tuple(re.findall(r"@([^@~]+)", pat))
+    exclusions = tuple(re.findall(r"~([^@~]+)", pat))
+
+    weekdays = monthdays = None
+    hours = minutes = None
+    never = False
+    for sel in selectors:
+        if sel.startswith('wd'):
+            weekdays = (weekdays if weekdays is not None else -1) & _selector_bits(sel[2:], 1, 7)
+        elif sel.startswith('m'):
+            monthdays = (monthdays if monthdays is not None else -1) & _selector_bits(sel[1:], 1, 31)
+        elif sel.startswith('h'):
+            hours = tuple(int(x) for x in sel[1:].split(',') if x.strip())
+        elif sel.startswith('n'):
+            minutes = tuple(int(x) for x in sel[1:].split(',') if x.strip())
+        else:
+            never = True
+
+    excluded_weekdays = excluded_monthdays = 0
+    for ex in exclusions:
+        if ex.startswith('wd'):
+            excluded_weekdays |= _selector_bits(ex[2:], 1, 7)
+        elif ex.startswith('m'):
+            excluded_monthdays |= _selector_bits(ex[1:], 1, 31)
+
+    return CompiledPattern(
+        anchored=anchored,
+        intervals=intervals,
+        selectors=selectors,
+        exclusions=exclusions,
+        duration=dur,
+        weekdays=weekdays,
+        monthdays=monthdays,
+        excluded_weekdays=excluded_weekdays,
+        excluded_monthdays=excluded_monthdays,
+        hours=hours,
+        minutes=minutes,
+        never=never,
+    )
 
 def flow_line(
     left: str,
@@ -359,8 +470,86 @@ def matches_selector(dt, sel):
         return False
     return False
 
+_FIXED_UNITS = {
+    'w': timedelta(weeks=1),
+    'd': timedelta(days=1),
+    'h': timedelta(hours=1),
+    'n': timedelta(minutes=1),
+}
+_MONTH_UNITS = {'y': 12, 'm': 1}
+
+# months shorter than 31 / 30 days; february is checked separately
+_SHORT_MONTHS = {
+    31: {2, 4, 6, 9, 11},
+    30: {2},
+    29: {2},
+}
+
+def _shift_months(dt, months):
+    # only called where the day fits the target month (see _day_is_stable)
+    y, m = divmod(dt.month - 1 + months, 12)
+    return dt.replace(year=dt.year + y, month=m + 1)
+
+def _day_is_stable(dt, offsets, step):
+    """
+    True if stepping dt by month-only intervals can never clamp its day
+    again, i.e. no month visited (intermediate ones included) is too
+    short. Months repeat every 12 steps at most, so that's all we check.
+    Day 29 against february depends on leap years; we just say no and
+    let the caller step past it.
+    """
+    short = _SHORT_MONTHS.get(dt.day)
+    if short is None:
+        return True
+    for k in range(12):
+        for o in offsets:
+            if (dt.month - 1 + k * step + o) % 12 + 1 in short:
+                return False
+    return True
+
 def expand_interval(start, intervals, target_dt, anchored):
+    """
+    Last period start at or before target_dt: the anchor stepped by
+    `intervals` as many times as fits (the anchor itself if none does).
+
+    Same answer as stepping one period at a time, but jumps straight
+    there for fixed-length units (w/d/h/n) and for month/year units.
+    Month steps clamp the day (Jan 31 + 1m = Feb 28) and the clamped day
+    sticks, so those only jump once the day can't be clamped any more;
+    until then (days 29-31, a few steps at most) they step. Patterns
+    mixing both kinds always step.
+    """
     anchor = datetime(start.year, 1, 1, start.hour, start.minute) if anchored else start
+    units = {u for _, u in intervals}
+
+    if units <= _FIXED_UNITS.keys():
+        step = sum((n * _FIXED_UNITS[u] for n, u in intervals), timedelta())
+        if not step or target_dt < anchor:
+            return anchor
+        return anchor + ((target_dt - anchor) // step) * step
+
+    if units <= _MONTH_UNITS.keys():
+        offsets = []
+        total = 0
+        for n, u in intervals:
+            total += n * _MONTH_UNITS[u]
+            offsets.append(total)
+        if not total:
+            return anchor
+
+        curr = anchor
+        while not _day_is_stable(curr, offsets, total):
+            nxt = add_intervals(curr, intervals)
+            if nxt > target_dt:
+                return curr
+            curr = nxt
+
+        months = (target_dt.year - curr.year) * 12 + target_dt.month - curr.month
+        k = max(0, months // total)
+        if k and _shift_months(curr, k * total) > target_dt:
+            k -= 1
+        return _shift_months(curr, k * total)
+
     curr = anchor
     while True:
         nxt = add_intervals(curr, intervals)
@@ -378,90 +567,108 @@ def generate_instances_for_date(pat_def, start_dt, target_date):
     # 1) Find the period‐start (ps) for this interval up to target_date
     ps = expand_interval(
         start=start_dt,
-        intervals=pat_def['intervals'],
+        intervals=pat_def.intervals,
         target_dt=datetime.combine(target_date, time.min),
-        anchored=pat_def['anchored']
+        anchored=pat_def.anchored
     )
 
-    # If period-start is after target or before series start, no instances
-    if ps.date() > target_date or target_date < start_dt.date():
-        return []
+    has_time = start_dt.time() != time(0, 0)
+    dur = parse_duration(pat_def.duration, has_time)
+    return _period_instances(pat_def, start_dt, ps, target_date, dur)
+
+def generate_instances_between(pat_def, start_dt, range_start, range_end):
+    """
+    Lazily yield (start, end) for every instance on a day in
+    range_start..range_end (inclusive dates), sorted by start.
+
+    Same instances as calling generate_instances_for_date for each day,
+    but the period start is found once and then walked forward.
+    """
+    if isinstance(range_start, datetime): range_start = range_start.date()
+    if isinstance(range_end, datetime): range_end = range_end.date()
+
+    day = max(range_start, start_dt.date())
+    if day > range_end:
+        return
+
+    intervals = pat_def.intervals
+    ps = expand_interval(
+        start=start_dt,
+        intervals=intervals,
+        target_dt=datetime.combine(day, time.min),
+        anchored=pat_def.anchored
+    )
 
-    # 2) Compute duration
     has_time = start_dt.time() != time(0, 0)
-    dur = parse_duration(pat_def['duration'], has_time)
-
-    # 3) Seed candidate datetimes
-    wday_selectors = [sel for sel in pat_def['selectors'] if sel.startswith('wd')]
-    cands = []
-    if wday_selectors:
-        # Parse all wd numbers from selectors
-        wdays = []
-        for sel in wday_selectors:
-            for part in sel[2:].split(','):
-                if '-' in part:
-                    lo, hi = map(int, part.split('-'))
-                    wdays.extend(range(lo, hi + 1))
-                else:
-                    wdays.append(int(part))
-        # Expand into dates in this week block
-        week_start = ps.date()
-        for wd in set(wdays):
-            offset = (wd - week_start.isoweekday()) % 7
-            d = week_start + timedelta(days=offset)
-            if d == target_date:
-                cands.append(datetime.combine(d, start_dt.time()))
-    else:
-        if ps.date() == target_date:
-            cands = [datetime.combine(ps.date(), start_dt.time())]
-
-    # 4) Apply non-time selectors (@m, other date filters)
-    cands = [
-        dt for dt in cands
-        if all(
-            matches_selector(dt, s)
-            for s in pat_def['selectors']
-            if not s.startswith(('h', 'n'))
-        )
-    ]
-
-    # 5) Expand time selectors (@h, @n) — COMPOSE them
-    times = []
-    for dt in cands:
-        hs = None
-        ns = None
-
-        for sel in pat_def["selectors"]:
-            if sel.startswith("h"):
-                hs = [int(x) for x in sel[1:].split(",") if x.strip()]
-            elif sel.startswith("n"):
-                ns = [int(x) for x in sel[1:].split(",") if x.strip()]
-
-        if hs is None and ns is None:
-            times.append(dt)
-            continue
+    dur = parse_duration(pat_def.duration, has_time)
+
+    while day <= range_end:
+        # latest period start at or before this midnight
+        midnight = datetime.combine(day, time.min)
+        while True:
+            nxt = add_intervals(ps, intervals)
+            if nxt > midnight or nxt <= ps: break
+            ps = nxt
+
+        yield from _period_instances(pat_def, start_dt, ps, day, dur)
+        day += timedelta(days=1)
+
+def event_instances_between(rows, range_start, range_end):
+    """
+    Merge every event row's instances in range_start..range_end (dates,
+    inclusive) into one stream of (start, end, row), sorted by start.
+    Rows need "start" and "pattern"; one-off events have end None. Equal
+    starts keep row order.
+    """
+    import heapq
 
-        if hs is None:
-            hs = [dt.hour]
-        if ns is None:
-            ns = [dt.minute]
+    if isinstance(range_start, datetime): range_start = range_start.date()
+    if isinstance(range_end, datetime): range_end = range_end.date()
 
-        for h in hs:
-            for n in ns:
-                if 0 <= h <= 23 and 0 <= n <= 59:
-                    times.append(datetime.combine(dt.date(), time(h, n)))
+    def one(row):
+        start_raw = row["start"]
+        start_dt = datetime.fromisoformat(start_raw) if isinstance(start_raw, str) else start_raw
+        if row["pattern"]:
+            pat = parse_pattern(row["pattern"])
+            for s, ee in generate_instances_between(pat, start_dt, range_start, range_end):
+                yield s, ee, row
+        elif range_start <= start_dt.date() <= range_end:
+            yield start_dt, None, row
 
-    if times:
-        cands = times
+    return heapq.merge(*(one(row) for row in rows), key=lambda inst: inst[0])
 
-    # 6) Exclusions (~...)
-    cands = [
-        dt for dt in cands
-        if not any(matches_selector(dt, ex) for ex in pat_def['exclusions'])
-    ]
+def _period_instances(pat_def, start_dt, ps, target_date, dur):
+    """
+    Instances on target_date given ps, the period start at or before it.
+    """
+    # If period-start is after target or before series start, no instances
+    if ps.date() > target_date or target_date < start_dt.date():
+        return []
 
-    # 7) Build (start, end) pairs and sort by start time
-    instances = [(s, s + dur) for s in cands if s.date() == target_date]
+    # with weekday selectors the period is a week block from ps, otherwise
+    # the day ps falls on
+    offset = (target_date - ps.date()).days
+    if offset > (6 if pat_def.weekdays is not None else 0):
+        return []
+    if not pat_def.matches_date(target_date):
+        return []
+
+    # @h / @n compose; a missing one keeps the start's hour/minute, and if
+    # none of the combinations is a real time the start time is used
+    hours, minutes = pat_def.hours, pat_def.minutes
+    starts = []
+    if hours is not None or minutes is not None:
+        hs = hours if hours is not None else (start_dt.hour,)
+        ns = minutes if minutes is not None else (start_dt.minute,)
+        starts = [
+            datetime.combine(target_date, time(h, n))
+            for h in hs for n in ns
+            if 0 <= h <= 23 and 0 <= n <= 59
+        ]
+    if not starts:
+        starts = [datetime.combine(target_date, start_dt.time())]
+
+    instances = [(s, s + dur) for s in starts]
     instances.sort(key=lambda pair: pair[0])
     return instances
 
@@ -479,9 +686,8 @@ def get_report_date(args: list[str]) -> tuple[date, list[str]]:
             pass
     return date.today(), args
 
-def cmd_routines_today(c, base_date: date | None = None, stream=None):
+def cmd_routines_today(c, base_date: date | None = None, stream=None, snapshot=None):
     import sys
-    import json
     from datetime import date, datetime
     from pathlib import Path
     from shutil import get_terminal_size
@@ -506,37 +712,21 @@ def cmd_routines_today(c, base_date: date | None = None, stream=None):
         meta_parts.append(f"~/{fname}")
         return flow_line(event_text, ", ".join(meta_parts), term_w)
 
-    rows = c.execute("""
-        SELECT event, start, pattern, tags, path, status, priority, creation
-          FROM all_events
-         WHERE valid = 1
-        ORDER BY creation DESC
-    """).fetchall()
-
-    instances: list[tuple[datetime, tp.Optional[datetime], str, str, list[str]]] = []
-
-    for row in rows:
-        # routines = HAS pattern
-        if not row["pattern"]:
-            continue
+    from .snapshot import event_record
+    from .occurrences import occurrences_between
 
-        tags = json.loads(row["tags"]) if row["tags"] else []
-        start_dt = datetime.fromisoformat(row["start"]) if isinstance(row["start"], str) else row["start"]
-        pat = parse_pattern(row["pattern"])
+    # routines = HAS pattern
+    instances = snapshot.instances_between(today, today, patterned=True) if snapshot else None
+    if instances is None:
+        instances = ((s, ee, event_record(row)) for s, ee, row in occurrences_between(c, today, today, patterned=True))
 
-        for s, ee in generate_instances_for_date(pat, start_dt, today):
-            instances.append((s, ee, row["event"], row["path"], tags))
-
-    instances.sort(key=lambda x: x[0])
-
-    for s, ee, event_text, path_str, tags in instances:
+    for s, ee, ev in instances:
         time_label = f"{s:%H:%M}" + (f"-{ee:%H:%M}" if ee else "")
-        tags_str = ", ".join(tags) if tags else "-"
-        print(format_event_line(event_text, time_label, tags_str, path_str), file=stream)
+        tags_str = ", ".join(ev.tags) if ev.tags else "-"
+        print(format_event_line(ev.event, time_label, tags_str, ev.path), file=stream)
 
-def cmd_calendar(c, days: int = 7, base_date: date | None = None, stream=None):
+def cmd_calendar(c, days: int = 7, base_date: date | None = None, stream=None, snapshot=None):
     import sys
-    import json
     from datetime import date, datetime, timedelta
     from pathlib import Path
     from shutil import get_terminal_size
@@ -565,34 +755,16 @@ def cmd_calendar(c, days: int = 7, base_date: date | None = None, stream=None):
         meta_parts.append(f"~/{fname}")
         return flow_line(event_text, ", ".join(meta_parts), term_w)
 
-    rows = c.execute("""
-        SELECT event, start, pattern, tags, path, status, priority, creation
-          FROM all_events
-         WHERE valid = 1
-        ORDER BY creation DESC
-    """).fetchall()
-
-    instances: list[tuple[datetime, tp.Optional[datetime], str, str, list[str]]] = []
-
-    for row in rows:
-        # calendar events = NO pattern
-        if row["pattern"]:
-            continue
-
-        tags = json.loads(row["tags"]) if row["tags"] else []
-        start_raw = row["start"]
-        start_dt = datetime.fromisoformat(start_raw) if isinstance(start_raw, str) else start_raw
-
-        d = start_dt.date()
-        if not (today <= d <= end):
-            continue
-
-        instances.append((start_dt, None, row["event"], row["path"], tags))
+    from .snapshot import event_record
+    from .occurrences import occurrences_between
 
-    instances.sort(key=lambda x: x[0])
+    # calendar events = NO pattern (routines have their own section)
+    instances = snapshot.instances_between(today, end, patterned=False) if snapshot else None
+    if instances is None:
+        instances = ((s, ee, event_record(row)) for s, ee, row in occurrences_between(c, today, end, patterned=False))
 
-    for s, ee, event_text, path_str, tags in instances:
+    for s, ee, ev in instances:
         day_label = s.strftime("%a %d %b")
         time_label = s.strftime("%H:%M") if s.time() != time(0, 0) else ""
-        tags_str = ", ".join(tags) if tags else "-"
-        print(format_line(event_text, day_label, time_label, tags_str, path_str), file=stream)
+        tags_str = ", ".join(ev.tags) if ev.tags else "-"
+        print(format_line(ev.event, day_label, time_label, tags_str, ev.path), file=stream)
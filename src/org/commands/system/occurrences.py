@@ -0,0 +1,268 @@
+import json
+import hashlib
+import sqlite3
+import typing as tp
+from datetime import date, datetime, timedelta
+from ...my_logger import log
+from .cli_helpers import event_instances_between
+
+# ----------------------------
+# Materialised event occurrences
+# ----------------------------
+#
+# Validation keeps every valid event's instances in a rolling window around
+# today in event_occurrences (one row per instance), so "what's on between
+# X and Y" is a range query on an index instead of expanding every pattern:
+#
+#   event_occurrences        event_id, start, end (ISO strings; end is NULL
+#                            for one-off events, like event_instances_between)
+#   event_occurrences_state  per event: signature of the columns instances
+#                            depend on, and the window it's filled for
+#   event_occurrences_meta   the window every valid event is filled for
+#
+# An event is regenerated only when its signature changes. Unchanged events
+# are extended as the window moves on (and trimmed behind it), so a normal
+# run touches just the days that came into view.
+#
+# The window is "occurrence_horizon": [days back, days ahead] in
+# .config.json, default OCCURRENCE_HORIZON.
+
+OCCURRENCE_HORIZON = (-30, 365)
+
+def occurrence_horizon(cfg: dict | None) -> tuple[int, int]:
+    raw = (cfg or {}).get("occurrence_horizon")
+    try:
+        lo, hi = (int(x) for x in raw)
+    except (TypeError, ValueError):
+        return OCCURRENCE_HORIZON
+    if lo > hi:
+        return OCCURRENCE_HORIZON
+    return lo, hi
+
+def ensure_occurrence_tables(c) -> None:
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS main.event_occurrences (
+            event_id TEXT NOT NULL,
+            start TEXT NOT NULL,
+            end TEXT
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS main.event_occurrences_start ON event_occurrences(start)")
+    c.execute("CREATE INDEX IF NOT EXISTS main.event_occurrences_event ON event_occurrences(event_id, start)")
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS main.event_occurrences_state (
+            event_id TEXT PRIMARY KEY,
+            sig TEXT NOT NULL,
+            window_from TEXT NOT NULL,
+            window_to TEXT NOT NULL
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS main.event_occurrences_meta (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            window_from TEXT NOT NULL,
+            window_to TEXT NOT NULL
+        )
+    """)
+
+def _event_sig(row) -> str:
+    return hashlib.sha1(json.dumps([row["start"], row["end"], row["pattern"]]).encode("utf-8")).hexdigest()
+
+def _instances(row, lo: date, hi: date) -> list[tuple[str, str, str | None]]:
+    return [
+        (row["id"], s.isoformat(), ee.isoformat() if ee else None)
+        for s, ee, _row in event_instances_between([row], lo, hi)
+    ]
+
+def refresh_occurrences(
+    conn: sqlite3.Connection,
+    cfg: dict | None = None,
+    today: date | None = None,
+) -> tuple[dict[str, int], list[tuple[str, str]]]:
+    """
+    Bring event_occurrences up to date with the events table for the
+    window around `today`. Returns counts for logging, and (event id,
+    error) for events whose instances couldn't be generated.
+
+    One bad event doesn't stop the rest: it's marked invalid, its
+    occurrences dropped, and the caller reports the error.
+    """
+    today = today or date.today()
+    back, ahead = occurrence_horizon(cfg)
+    lo, hi = today + timedelta(days=back), today + timedelta(days=ahead)
+    lo_s, hi_s = lo.isoformat(), hi.isoformat()
+
+    c = conn.cursor()
+    ensure_occurrence_tables(c)
+
+    events = c.execute("SELECT id, start, end, pattern FROM main.events WHERE valid = 1").fetchall()
+    state = {
+        r["event_id"]: r
+        for r in c.execute("SELECT event_id, sig, window_from, window_to FROM main.event_occurrences_state")
+    }
+
+    stats = {"regenerated": 0, "extended": 0, "dropped": 0, "failed": 0}
+    inserts: list[tuple[str, str, str | None]] = []
+    new_state: list[tuple[str, str, str, str]] = []
+    drop_ids: list[str] = []
+    trim_ids: list[str] = []
+    failed: list[tuple[str, str]] = []
+
+    if not conn.in_transaction:
+        c.execute("BEGIN")
+    try:
+        for row in events:
+            sig = _event_sig(row)
+            st = state.pop(row["id"], None)
+
+            # this event's rows, only kept once all of them generated
+            rows: list[tuple[str, str, str | None]] = []
+            try:
+                if st is None or st["sig"] != sig:
+                    if st is not None:
+                        drop_ids.append(row["id"])
+                    rows += _instances(row, lo, hi)
+                    stats["regenerated"] += 1
+                else:
+                    old_lo = date.fromisoformat(st["window_from"])
+                    old_hi = date.fromisoformat(st["window_to"])
+                    if old_hi < lo or old_lo > hi:
+                        # window jumped clean past what we had
+                        drop_ids.append(row["id"])
+                        rows += _instances(row, lo, hi)
+                    else:
+                        if old_lo > lo:
+                            rows += _instances(row, lo, old_lo - timedelta(days=1))
+                        if old_hi < hi:
+                            rows += _instances(row, old_hi + timedelta(days=1), hi)
+                        if old_lo < lo or old_hi > hi:
+                            trim_ids.append(row["id"])
+                        if (old_lo, old_hi) == (lo, hi):
+                            continue
+                    stats["extended"] += 1
+            except Exception as e:
+                log("warning", f"event occurrences: skipping {row['id']} ({row['start']} {row['pattern']}): {e!r}")
+                if row["pattern"]:
+                    failed.append((row["id"], f"Pattern {row['pattern']} can't be expanded ({e})"))
+                else:
+                    failed.append((row["id"], f"Start {row['start']} can't be read ({e})"))
+                if st is not None:
+                    drop_ids.append(row["id"])
+                continue
+
+            inserts += rows
+            new_state.append((row["id"], sig, lo_s, hi_s))
+
+        # whatever is left in state lost its event (deleted or invalid)
+        drop_ids += state.keys()
+        stats["dropped"] = len(state)
+        stats["failed"] = len(failed)
+
+        failed_ids = [(i,) for i, _ in failed]
+        c.executemany("UPDATE main.events SET valid = 0 WHERE id = ?", failed_ids)
+        c.executemany("DELETE FROM main.event_occurrences WHERE event_id = ?", ((i,) for i in drop_ids))
+        c.executemany("DELETE FROM main.event_occurrences_state WHERE event_id = ?", ((i,) for i in state))
+        c.executemany("DELETE FROM main.event_occurrences_state WHERE event_id = ?", failed_ids)
+        # instances outside the window; end of day hi is "< hi + 1 day"
+        hi_end = (hi + timedelta(days=1)).isoformat()
+        c.executemany(
+            "DELETE FROM main.event_occurrences WHERE event_id = ? AND (start < ? OR start >= ?)",
+            ((i, lo_s, hi_end) for i in trim_ids),
+        )
+        c.executemany("INSERT INTO main.event_occurrences (event_id, start, end) VALUES (?, ?, ?)", inserts)
+        c.executemany("""
+            INSERT INTO main.event_occurrences_state (event_id, sig, window_from, window_to)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(event_id) DO UPDATE SET
+                sig = excluded.sig,
+                window_from = excluded.window_from,
+                window_to = excluded.window_to
+        """, new_state)
+        c.execute("""
+            INSERT INTO main.event_occurrences_meta (id, window_from, window_to) VALUES (1, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET window_from = excluded.window_from, window_to = excluded.window_to
+        """, (lo_s, hi_s))
+        c.execute("COMMIT")
+    except BaseException:
+        c.execute("ROLLBACK")
+        raise
+
+    log("info", f"event occurrences {lo_s}..{hi_s}: {stats} ({len(inserts)} rows written)")
+    return stats, failed
+
+# ----------------------------
+# Reading
+# ----------------------------
+
+def _materialised_window(c) -> tuple[date, date] | None:
+    """
+    The window every attached db has occurrences for, or None if one of
+    them has none (older db, or never validated).
+    """
+    window: tuple[date, date] | None = None
+    for db in c.execute("PRAGMA database_list").fetchall():
+        name = db["name"] if isinstance(db, sqlite3.Row) else db[1]
+        if name == "temp":
+            continue
+        try:
+            r = c.execute(f"SELECT window_from, window_to FROM {name}.event_occurrences_meta WHERE id = 1").fetchone()
+        except sqlite3.OperationalError:
+            return None
+        if r is None:
+            return None
+        lo, hi = date.fromisoformat(r[0]), date.fromisoformat(r[1])
+        window = (lo, hi) if window is None else (max(window[0], lo), min(window[1], hi))
+    return window
+
+def occurrences_between(
+    c,
+    range_start: date | datetime,
+    range_end: date | datetime,
+    patterned: bool | None = None,
+) -> tp.Iterator[tuple[datetime, datetime | None, tp.Any]]:
+    """
+    (start, end, row) for every event instance on a day in
+    range_start..range_end (inclusive dates), sorted by start, same as
+    event_instances_between over all_events.
+
+    Read from all_event_occurrences when the range is inside the
+    materialised window, generated from the patterns otherwise.
+
+    patterned: True = only patterned events (routines), False = only
+    one-off events, None = both.
+    """
+    if isinstance(range_start, datetime): range_start = range_start.date()
+    if isinstance(range_end, datetime): range_end = range_end.date()
+
+    pattern_sql = {None: "", True: "AND pattern IS NOT NULL AND pattern != ''", False: "AND (pattern IS NULL OR pattern = '')"}[patterned]
+
+    window = _materialised_window(c)
+    if window is not None and window[0] <= range_start and range_end <= window[1]:
+        rows = c.execute(f"""
+            SELECT *
+              FROM all_event_occurrences
+             WHERE occ_start >= ? AND occ_start < ?
+               {pattern_sql}
+          ORDER BY occ_start, creation DESC
+        """, (range_start.isoformat(), (range_end + timedelta(days=1)).isoformat())).fetchall()
+        for row in rows:
+            end = row["occ_end"]
+            yield datetime.fromisoformat(row["occ_start"]), (datetime.fromisoformat(end) if end else None), row
+        return
+
+    # one-off events only matter if they start in the range, patterned ones
+    # if they started by the end of it (start_key is indexed)
+    lo, hi = range_start.isoformat(), (range_end + timedelta(days=1)).isoformat()
+    key_sql, params = {
+        None: ("AND ((has_pattern = 0 AND start_key >= ? AND start_key < ?) OR (has_pattern = 1 AND start_key < ?))", (lo, hi, hi)),
+        True: ("AND has_pattern = 1 AND start_key < ?", (hi,)),
+        False: ("AND has_pattern = 0 AND start_key >= ? AND start_key < ?", (lo, hi)),
+    }[patterned]
+    rows = c.execute(f"""
+        SELECT event, start, end, pattern, tags, path, status, priority, creation
+          FROM all_events
+         WHERE valid = 1
+           {key_sql}
+        ORDER BY creation DESC
+    """, params).fetchall()
+    yield from event_instances_between(rows, range_start, range_end)
@@ -1,8 +1,9 @@
 import typing as tp
 from datetime import date, datetime
-from .cli_helpers import iter_tree_paths, effective_priority_asof, flow_line
+from .cli_helpers import iter_tree_paths, flow_line, norm_tag
+from .snapshot import load_todo_records
 
-def cmd_projects(c, tree: dict[str, tp.Any], as_of: date | datetime | None = None):
+def cmd_projects(c, tree: dict[str, tp.Any], as_of: date | datetime | None = None, snapshot=None):
     """
     PROJECT TODOS (sorted by urgency).
 
@@ -27,23 +28,11 @@ def cmd_projects(c, tree: dict[str, tp.Any], as_of: date | datetime | None = Non
       - one random prio 4
       - no repeats; if pools too small, print fewer.
     """
-    import json
     import typing as tp
     import random
     from datetime import datetime
     from shutil import get_terminal_size
 
-    def norm_tag(t: str) -> str:
-        return t.strip().lstrip("#").strip().lower()
-
-    def parse_creation(s: str) -> datetime | None:
-        if not s:
-            return None
-        try:
-            return datetime.strptime(s, "%Y%m%dT%H%M%S")
-        except Exception:
-            return None
-
     def split_star(raw: str) -> tuple[str, bool]:
         s = str(raw).strip()
         starred = s.endswith("*")
@@ -201,13 +190,8 @@ def cmd_projects(c, tree: dict[str, tp.Any], as_of: date | datetime | None = Non
     seen: set[tuple[str, ...]] = set()
     all_paths = [p for p in all_paths if not (p in seen or seen.add(p))]
 
-    # --- load todos ---
-    rows = c.execute("""
-        SELECT todo, path, status, tags, priority, creation, deadline
-          FROM all_todos
-         WHERE valid = 1
-         ORDER BY priority ASC, creation DESC
-    """).fetchall()
+    # --- load todos (tags normalised, effective priorities as of as_of) ---
+    records = snapshot.todos if snapshot is not None else load_todo_records(c, as_of=as_of)
 
     def bucket_for_tagset(tagset: set[str]) -> tuple[str, ...] | None:
         matched_paths = [tag_to_path[t] for t in tagset if t in tag_to_path]
@@ -222,40 +206,29 @@ def cmd_projects(c, tree: dict[str, tp.Any], as_of: date | datetime | None = Non
     # urgency stats for prio 1–2
     stats: dict[tuple[str, ...], dict[str, tp.Any]] = {}
 
-    for row in rows:
-        status = (row["status"] or "").strip().lower()
-        if status != "todo":
+    for todo in records:
+        if todo.status != "todo":
             continue
 
-        try:
-            prio_stored = int(row["priority"])
-        except Exception:
+        if todo.priority is None:
             continue
 
         # Use effective priority when an as_of date/datetime is supplied (report mode)
-        prio = prio_stored
-        if as_of is not None:
-            prio = effective_priority_asof(
-                priority=prio_stored,
-                deadline=row["deadline"],
-                as_of=as_of,
-            )
-
-        raw_tags = json.loads(row["tags"]) if row["tags"] else []
-        raw_tags = [t for t in raw_tags if isinstance(t, str)]
-        tagset = {norm_tag(t) for t in raw_tags if norm_tag(t)}
+        prio = todo.effective if todo.effective is not None else todo.priority
+
+        tagset = set(todo.tags)
 
         bucket = bucket_for_tagset(tagset)
         if bucket is None:
             continue
 
-        created = parse_creation(row["creation"]) if isinstance(row["creation"], str) else None
-        rec = (row["todo"], row["path"], tagset, prio, created)
+        created = todo.created
+        rec = (todo.todo, todo.path, tagset, prio, created)
 
         if prio in (1, 2):
             buckets_main.setdefault(bucket, []).append({
-                "todo": row["todo"],
-                "path": row["path"],
+                "todo": todo.todo,
+                "path": todo.path,
                 "tags": tagset,
                 "prio": prio,
             })
@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import sys
 import json
+import hashlib
 import os
 import re
 import shutil
@@ -10,9 +11,14 @@ import sqlite3
 import subprocess
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Iterator
 from datetime import datetime
+from .cli_helpers import norm_tag as _norm_tag
 
+try:
+    import brotli  # optional: .br siblings when publish_compress is on
+except ImportError:
+    brotli = None
 
 # --- add near the top (after imports is fine) ---
 def _dbg(enabled: bool, msg: str) -> None:
@@ -417,221 +423,207 @@ INDEX_CSS = """<!DOCTYPE html>
 """
 
 # ----------------------------
-# Your awk markdown converter (verbatim, embedded)
+# Markdown -> HTML
 # ----------------------------
+#
+# Line-for-line port of the awk converter this used to shell out to (one
+# awk process per note). The output is meant to stay byte-identical to it,
+# quirks included, so keep the two in step when changing anything here:
+#
+#   - one record per "\n"-separated line, no record for a trailing newline
+#   - [[:space:]] is the C-locale set below, not Python's Unicode \s
+#   - inline() escapes, then bold/italic, then links, each as a
+#     "rescan from the start after every replacement" loop like awk's
+#     while (match(...)); all these patterns have a single possible match
+#     length at a given start, so leftmost == awk's leftmost-longest
+
+_SP = " \t\n\r\f\v"
+
+_RE_BOLD_STAR = re.compile(r"\*\*[^*]+\*\*")
+_RE_BOLD_UNDER = re.compile(r"__[^_]+__")
+_RE_EM_STAR = re.compile(r"\*[^*]+\*")
+_RE_EM_UNDER = re.compile(r"_[^_]+_")
+_RE_LINK = re.compile(r"\[[^\]]+\]\([^)]+\)")
+
+_RE_BLANK = re.compile(rf"^[{_SP}]*$")
+_RE_HR = re.compile(rf"^[{_SP}]*---[{_SP}]*$")
+_RE_OL = re.compile(rf"^[{_SP}]*[0-9]+\.[{_SP}]+")
+_RE_UL = re.compile(rf"^[{_SP}]*[-*][{_SP}]+")
+_RE_H3 = re.compile(rf"^###[{_SP}]+")
+_RE_H2 = re.compile(rf"^##[{_SP}]+")
+_RE_H1 = re.compile(rf"^#[{_SP}]+")
+
+_RE_SLUG_TAG = re.compile(r"<[^>]*>")
+_RE_SLUG_ENTITY = re.compile(r"&[a-zA-Z]+;")
+_RE_SLUG_OTHER = re.compile(r"[^a-z0-9]+")
+_RE_SLUG_EDGES = re.compile(r"^-+|-+$")
+
+# awk's tolower() only knows ASCII
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+def _md_esc(s: str) -> str:
+    return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+def _md_wrap_loop(s: str, pattern: re.Pattern, n: int, open_tag: str, close_tag: str) -> str:
+    while True:
+        m = pattern.search(s)
+        if m is None:
+            return s
+        start, end = m.span()
+        s = s[:start] + open_tag + s[start + n:end - n] + close_tag + s[end:]
+
+def _md_links(s: str) -> str:
+    while True:
+        m = _RE_LINK.search(s)
+        if m is None:
+            return s
+        mid = m.group(0)
+        # "[text](url)": text can't hold "]", url can't hold ")"
+        split = mid.index("](")
+        text, url = mid[1:split], mid[split + 2:-1]
+        s = s[:m.start()] + '<a href="' + url + '">' + text + "</a>" + s[m.end():]
+
+def _md_inline(s: str) -> str:
+    s = _md_esc(s)
+    s = _md_wrap_loop(s, _RE_BOLD_STAR, 2, "<strong>", "</strong>")
+    s = _md_wrap_loop(s, _RE_BOLD_UNDER, 2, "<strong>", "</strong>")
+    s = _md_wrap_loop(s, _RE_EM_STAR, 1, "<em>", "</em>")
+    s = _md_wrap_loop(s, _RE_EM_UNDER, 1, "<em>", "</em>")
+    return _md_links(s)
+
+def _md_slugify(s: str) -> str:
+    t = s.translate(_ASCII_LOWER)
+    t = _RE_SLUG_TAG.sub("", t)
+    t = _RE_SLUG_ENTITY.sub("", t)
+    t = _RE_SLUG_OTHER.sub("-", t)
+    t = _RE_SLUG_EDGES.sub("", t)
+    return "h-" + (t or "section")
+
+def _md_to_html(md: str) -> str:
+    """
+    Convert a note body (markdown-ish) to an HTML fragment.
+    """
+    out: list[str] = []
+    emit = out.append
+
+    in_p = in_ul = in_ol = False
+    prev_was_blank = True
+    pending_hr = False
+
+    def close_p():
+        nonlocal in_p
+        if in_p:
+            emit("</p>")
+            in_p = False
+
+    def close_ul():
+        nonlocal in_ul
+        if in_ul:
+            emit("</ul>")
+            in_ul = False
+
+    def close_ol():
+        nonlocal in_ol
+        if in_ol:
+            emit("</ol>")
+            in_ol = False
+
+    def open_p():
+        nonlocal in_p
+        if not in_p:
+            emit("<p>")
+            in_p = True
+
+    lines = md.split("\n")
+    if lines[-1] == "":
+        lines.pop()
+
+    for line in lines:
+        if pending_hr:
+            pending_hr = False
+            if _RE_BLANK.match(line):
+                close_p(); close_ul(); close_ol()
+                emit("<hr>")
+            else:
+                open_p()
+                emit("---<br>")
+
+        if _RE_BLANK.match(line):
+            prev_was_blank = True
+            close_ul()
+            close_ol()
+            open_p()
+            emit("<br>")
+            continue
 
-_AWK_MD_TO_HTML = r"""
-function esc(s) {
-  gsub(/&/, "\\&amp;", s)
-  gsub(/</, "\\&lt;", s)
-  gsub(/>/, "\\&gt;", s)
-  return s
-}
-
-function apply_links(s,    pre, mid, post, t, u) {
-  while (match(s, /\[[^]]+\]\([^)]+\)/)) {
-    pre = substr(s, 1, RSTART-1)
-    mid = substr(s, RSTART, RLENGTH)
-    post = substr(s, RSTART+RLENGTH)
-
-    t = mid
-    sub(/^\[/, "", t)
-    sub(/\]\([^)]+\)$/, "", t)
-
-    u = mid
-    sub(/^\[[^]]+\]\(/, "", u)
-    sub(/\)$/, "", u)
-
-    s = pre "<a href=\"" u "\">" t "</a>" post
-  }
-  return s
-}
-
-function apply_bold_italic(s,    pre, mid, post, inner) {
-  while (match(s, /\*\*[^*]+\*\*/)) {
-    pre = substr(s, 1, RSTART-1)
-    mid = substr(s, RSTART, RLENGTH)
-    post = substr(s, RSTART+RLENGTH)
-    inner = substr(mid, 3, length(mid)-4)
-    s = pre "<strong>" inner "</strong>" post
-  }
-  while (match(s, /__[^_]+__/)) {
-    pre = substr(s, 1, RSTART-1)
-    mid = substr(s, RSTART, RLENGTH)
-    post = substr(s, RSTART+RLENGTH)
-    inner = substr(mid, 3, length(mid)-4)
-    s = pre "<strong>" inner "</strong>" post
-  }
-  while (match(s, /\*[^*]+\*/)) {
-    pre = substr(s, 1, RSTART-1)
-    mid = substr(s, RSTART, RLENGTH)
-    post = substr(s, RSTART+RLENGTH)
-    inner = substr(mid, 2, length(mid)-2)
-    s = pre "<em>" inner "</em>" post
-  }
-  while (match(s, /_[^_]+_/)) {
-    pre = substr(s, 1, RSTART-1)
-    mid = substr(s, RSTART, RLENGTH)
-    post = substr(s, RSTART+RLENGTH)
-    inner = substr(mid, 2, length(mid)-2)
-    s = pre "<em>" inner "</em>" post
-  }
-  return s
-}
-
-function inline(s) {
-  s = esc(s)
-  s = apply_bold_italic(s)
-  s = apply_links(s)
-  return s
-}
-
-function slugify(s,    t) {
-  t = tolower(s)
-  gsub(/<[^>]*>/, "", t)
-  gsub(/&[a-zA-Z]+;/, "", t)
-  gsub(/[^a-z0-9]+/, "-", t)
-  gsub(/^-+|-+$/, "", t)
-  if (t == "") t = "section"
-  return "h-" t
-}
-
-function heading(text, level,    id) {
-  id = slugify(text)
-  print "<h" level " id=\"" id "\">" inline(text) "</h" level ">"
-}
-
-function print_line_as_linebreak(line) {
-  print inline(line) "<br>"
-}
-
-function close_p()  { if (in_p)  { print "</p>";        in_p=0 } }
-function close_ul() { if (in_ul) { print "</ul>";       in_ul=0 } }
-function close_ol() { if (in_ol) { print "</ol>";       in_ol=0 } }
-function close_bq() { if (in_bq) { close_p(); print "</blockquote>"; in_bq=0 } }
-
-BEGIN {
-  in_p=0; in_ul=0; in_ol=0; in_bq=0;
-  prev_nonempty="";
-  prev_was_blank=1;
-  pending_hr=0;
-}
-
-{
-  line = $0
-
-  if (pending_hr) {
-    pending_hr = 0
-    if (line ~ /^[[:space:]]*$/) {
-      close_p(); close_ul(); close_ol(); close_bq()
-      print "<hr>"
-    } else {
-      if (!in_p) { print "<p>"; in_p=1 }
-      print inline("---") "<br>"
-    }
-  }
-
-  if (line ~ /^[[:space:]]*$/) {
-    prev_was_blank = 1
-    if (in_ul) close_ul()
-    if (in_ol) close_ol()
-    if (in_bq) close_bq()
-    if (!in_p) { print "<p>"; in_p=1 }
-    print "<br>"
-    next
-  }
+        # Structural HR rule
+        if _RE_HR.match(line):
+            if prev_was_blank:
+                pending_hr = True
+            else:
+                open_p()
+                emit("---<br>")
+            prev_was_blank = False
+            continue
 
-  # Structural HR rule
-  if (line ~ /^[[:space:]]*---[[:space:]]*$/) {
-    if (prev_was_blank) {
-      pending_hr = 1
-      prev_was_blank = 0
-      next
-    } else {
-      if (!in_p) { print "<p>"; in_p=1 }
-      print inline("---") "<br>"
-      prev_was_blank = 0
-      next
-    }
-  }
+        # Ordered list
+        m = _RE_OL.match(line)
+        if m:
+            prev_was_blank = False
+            close_p()
+            close_ul()
+            if not in_ol:
+                emit("<ol>")
+                in_ol = True
+            emit("<li>" + _md_inline(line[m.end():]) + "</li>")
+            continue
+        close_ol()
 
-  # Ordered list
-  if (line ~ /^[[:space:]]*[0-9]+\.[[:space:]]+/) {
-    prev_was_blank = 0
-    close_p()
-    close_ul()
-    if (!in_ol) { print "<ol>"; in_ol=1 }
-    sub(/^[[:space:]]*[0-9]+\.[[:space:]]+/, "", line)
-    print "<li>" inline(line) "</li>"
-    trimmed = line
-    sub(/^[[:space:]]+/, "", trimmed); sub(/[[:space:]]+$/, "", trimmed)
-    if (trimmed != "") prev_nonempty = trimmed
-    next
-  } else if (in_ol) {
-    close_ol()
-  }
+        # Unordered list
+        m = _RE_UL.match(line)
+        if m:
+            prev_was_blank = False
+            close_p()
+            close_ol()
+            if not in_ul:
+                emit("<ul>")
+                in_ul = True
+            emit("<li>" + _md_inline(line[m.end():]) + "</li>")
+            continue
+        close_ul()
 
-  # Unordered list
-  if (line ~ /^[[:space:]]*[-*][[:space:]]+/) {
-    prev_was_blank = 0
-    close_p()
-    close_ol()
-    if (!in_ul) { print "<ul>"; in_ul=1 }
-    sub(/^[[:space:]]*[-*][[:space:]]+/, "", line)
-    print "<li>" inline(line) "</li>"
-    trimmed = line
-    sub(/^[[:space:]]+/, "", trimmed); sub(/[[:space:]]+$/, "", trimmed)
-    if (trimmed != "") prev_nonempty = trimmed
-    next
-  } else if (in_ul) {
-    close_ul()
-  }
+        # Headings
+        for level, pattern in ((3, _RE_H3), (2, _RE_H2), (1, _RE_H1)):
+            m = pattern.match(line)
+            if m:
+                break
+        if m:
+            prev_was_blank = False
+            close_p(); close_ul(); close_ol()
+            text = line[m.end():]
+            emit(f'<h{level} id="{_md_slugify(text)}">{_md_inline(text)}</h{level}>')
+            continue
 
-  # Headings
-  if (line ~ /^###[[:space:]]+/) {
-    prev_was_blank = 0
-    close_p(); close_ul(); close_ol(); close_bq()
-    sub(/^###[[:space:]]+/, "", line)
-    heading(line, 3)
-    next
-  }
-  if (line ~ /^##[[:space:]]+/) {
-    prev_was_blank = 0
-    close_p(); close_ul(); close_ol(); close_bq()
-    sub(/^##[[:space:]]+/, "", line)
-    heading(line, 2)
-    next
-  }
-  if (line ~ /^#[[:space:]]+/) {
-    prev_was_blank = 0
-    close_p(); close_ul(); close_ol(); close_bq()
-    sub(/^#[[:space:]]+/, "", line)
-    heading(line, 1)
-    next
-  }
+        # Plain text
+        prev_was_blank = False
+        open_p()
+        emit(_md_inline(line) + "<br>")
 
-  # Plain text
-  prev_was_blank = 0
-  if (!in_p) { print "<p>"; in_p=1 }
-  print_line_as_linebreak(line)
-}
+    if pending_hr:
+        open_p()
+        emit("---<br>")
+    close_ul(); close_ol(); close_p()
 
-END {
-  if (pending_hr) {
-    if (!in_p) { print "<p>"; in_p=1 }
-    print inline("---") "<br>"
-  }
-  close_bq(); close_ul(); close_ol(); close_p()
-}
-"""
+    if not out:
+        return ""
+    # the awk version was read back in text mode, which folds \r into \n
+    return ("\n".join(out) + "\n").replace("\r\n", "\n").replace("\r", "\n")
 
 
 # ----------------------------
 # Small helpers
 # ----------------------------
 
-# --- ADD these helpers somewhere in "Small helpers" (anywhere below _norm_tag is fine) ---
-
 def _repo_name_from_root(src_root: str) -> str:
     p = Path(src_root)
     name = p.name.strip()
@@ -646,9 +638,10 @@ def _fmt_metadata_block(*, repo: str, path: str, title: str, tags: tuple[str, ..
         f"title: {title or 'Untitled'}",
         f"tags: {tag_list}",
     ]
+    block = _html_escape("\n".join(lines))
     return (
         f'<div class="frontmatter-title">Metadata</div>\n'
-        f'<pre class="frontmatter">{_html_escape("\\n".join(lines))}</pre>\n'
+        f'<pre class="frontmatter">{block}</pre>\n'
         f"<br>\n"
     )
 
@@ -661,9 +654,6 @@ def _html_escape(s: str) -> str:
          .replace("'", "&#39;")
     )
 
-def _norm_tag(t: str) -> str:
-    return t.strip().lstrip("#").strip().lower()
-
 def _read_lines_as_tags(path: Path) -> list[str]:
     if not path.is_file():
         return []
@@ -719,25 +709,6 @@ def _extract_title(yaml_text: str | None, body_text: str) -> str:
             return line[2:].strip()
     return "Untitled"
 
-def _run_awk_md_to_html(md: str) -> str:
-    """
-    Uses awk exactly like your script to convert markdown -> HTML fragment.
-    Requires `awk` on PATH.
-    """
-    try:
-        proc = subprocess.run(
-            ["awk", _AWK_MD_TO_HTML],
-            input=md,
-            text=True,
-            capture_output=True,
-            check=True,
-        )
-    except FileNotFoundError as e:
-        raise RuntimeError("publish_site: awk not found on PATH") from e
-    except subprocess.CalledProcessError as e:
-        raise RuntimeError(f"publish_site: awk markdown converter failed:\n{e.stderr}") from e
-    return proc.stdout
-
 # ----------------------------
 # Core publishing logic
 # ----------------------------
@@ -759,11 +730,13 @@ def build_publish_set(
     # where to read .publish from when using the concatenated view
     publish_file_root: Path | None = None,
     source_table: str = "all_notes",   # concatenated TEMP VIEW from org.py
+    tags_table: str = "all_note_tags",  # ...and its (src_root, note_id, tag) rows
 ) -> tuple[list[NoteRec], set[str]]:
     """
     If `conn` is provided:
-      - expects `source_table` (default: all_notes) to exist
-      - expects columns: src_root, path, authour, creation, title, tags, valid
+      - expects `source_table` (default: all_notes) and `tags_table`
+        (default: all_note_tags) to exist
+      - expects columns: src_root, id, path, authour, creation, title, tags, valid
       - does NOT open/attach anything (no duplicate concatenation)
     If `conn` is None:
       - falls back to a single-repo mode using repo_root/.org.db and `notes` table
@@ -791,91 +764,26 @@ def build_publish_set(
                     out.append(nt)
         return out
 
-    picked: dict[tuple[str, str], NoteRec] = {}
-    all_tags_seen: set[str] = set()
+    def collect(c: sqlite3.Cursor, table: str, tag_table: str, src_root_col: str) -> tuple[list[NoteRec], set[str]]:
+        picked: dict[tuple[str, str], NoteRec] = {}
+        all_tags_seen: set[str] = set()
 
-    # ----------------------------
-    # Preferred: reuse concatenated connection/view from org.py
-    # ----------------------------
-    if conn is not None:
-        c = conn.cursor()
-
-        # tolerate older schemas that may not have creation
-        try:
-            rows = c.execute(
-                f"SELECT src_root, path, creation, title, tags, valid FROM {source_table}"
-            ).fetchall()
-            has_creation = True
-        except sqlite3.OperationalError:
-            rows = c.execute(
-                f"SELECT src_root, path, title, tags, valid FROM {source_table}"
-            ).fetchall()
-            has_creation = False
-
-        def unpack_row(r):
-            if has_creation:
-                src_root = r[0]
-                path = r[1]
-                creation = r[2]
-                title = r[3]
-                tags_raw = r[4]
-                valid = r[5]
-            else:
-                src_root = r[0]
-                path = r[1]
-                creation = None
-                title = r[2]
-                tags_raw = r[3]
-                valid = r[4]
-            return src_root, path, creation, title, tags_raw, valid
-
-        # Pass 1: match .publish tags
-        if publish_tags:
-            for r in rows:
-                src_root, path, creation, title, tags_raw, valid = unpack_row(r)
-                if int(valid or 0) != 1:
-                    continue
-
-                src_root = src_root if src_root else str(repo_root)
-                title = title or ""
-
-                tags = row_tags_from_json(tags_raw)
-                if not tags:
-                    continue
-                if "nopublish" in tags:
-                    continue
-
-                if any(t in publish_tags for t in tags):
-                    rec = NoteRec(src_root=src_root, path=path, creation=creation, title=title, tags=tuple(tags))
-                    picked[(rec.src_root, rec.path)] = rec
-                    all_tags_seen |= set(tags)
-
-        # Pass 2: add notes tagged 'publish'
-        for r in rows:
-            src_root, path, creation, title, tags_raw, valid = unpack_row(r)
-            if int(valid or 0) != 1:
-                continue
-
-            src_root = src_root if src_root else str(repo_root)
-            title = title or ""
-
-            tags = row_tags_from_json(tags_raw)
-            if "nopublish" in tags:
-                continue
-            if "publish" not in tags:
-                continue
-
-            key = (src_root, path)
-            if key in picked:
-                continue
-
-            rec = NoteRec(src_root=src_root, path=path, creation=creation, title=title, tags=tuple(tags))
-            picked[key] = rec
+        for r in _select_publish_rows(c, table, tag_table, src_root_col, publish_tags):
+            src_root = r[0] if r[0] else str(repo_root)
+            tags = row_tags_from_json(r[4])
+            rec = NoteRec(src_root=src_root, path=r[1], creation=r[2], title=r[3] or "", tags=tuple(tags))
+            picked.setdefault((rec.src_root, rec.path), rec)
             all_tags_seen |= set(tags)
 
         out = sorted(picked.values(), key=lambda x: (x.src_root.lower(), x.path.lower()))
         return out, all_tags_seen
 
+    # ----------------------------
+    # Preferred: reuse concatenated connection/view from org.py
+    # ----------------------------
+    if conn is not None:
+        return collect(conn.cursor(), source_table, tags_table, "src_root")
+
     # ----------------------------
     # Fallback: single-repo mode (no concatenation)
     # ----------------------------
@@ -885,122 +793,64 @@ def build_publish_set(
 
     local = sqlite3.connect(str(db_path))
     try:
-        local.row_factory = sqlite3.Row
-        c = local.cursor()
-
-        # tolerate older schemas that may not have creation
-        try:
-            rows = c.execute("""
-                SELECT path, creation, title, tags, valid
-                  FROM notes
-            """).fetchall()
-            has_creation = True
-        except sqlite3.OperationalError:
-            rows = c.execute("""
-                SELECT path, title, tags, valid
-                  FROM notes
-            """).fetchall()
-            has_creation = False
-
-        # Pass 1: match .publish tags
-        if publish_tags:
-            for r in rows:
-                if int(r["valid"] or 0) != 1:
-                    continue
-
-                path = r["path"]
-                creation = (r["creation"] if has_creation else None)
-                title = r["title"] or ""
-                tags = row_tags_from_json(r["tags"])
-
-                if not tags:
-                    continue
-                if "nopublish" in tags:
-                    continue
-
-                if any(t in publish_tags for t in tags):
-                    rec = NoteRec(src_root=str(repo_root), path=path, creation=creation, title=title, tags=tuple(tags))
-                    picked[(rec.src_root, rec.path)] = rec
-                    all_tags_seen |= set(tags)
-
-        # Pass 2: add notes tagged 'publish'
-        for r in rows:
-            if int(r["valid"] or 0) != 1:
-                continue
-
-            tags = row_tags_from_json(r["tags"])
-            if "nopublish" in tags:
-                continue
-            if "publish" not in tags:
-                continue
-
-            path = r["path"]
-            creation = (r["creation"] if has_creation else None)
-            title = r["title"] or ""
-            key = (str(repo_root), path)
-            if key in picked:
-                continue
-
-            rec = NoteRec(src_root=str(repo_root), path=path, creation=creation, title=title, tags=tuple(tags))
-            picked[key] = rec
-            all_tags_seen |= set(tags)
-
-        out = sorted(picked.values(), key=lambda x: (x.src_root.lower(), x.path.lower()))
-        return out, all_tags_seen
+        return collect(local.cursor(), "notes", "note_tags", "NULL")
     finally:
         local.close()
 
-def render_and_write_site(
-    *,
-    repo_root: Path,
-    notes: Iterable[NoteRec],
-    site_dirname: str = "docs",
-    debug: bool = False,
-) -> None:
-    repo_root = repo_root.resolve()
-    site_root = (repo_root / site_dirname).resolve()
-    _dbg(debug, f"site_root={site_root}")
-
-    if site_root.exists():
-        _dbg(debug, f"removing existing {site_dirname} directory")
-        shutil.rmtree(site_root)
-
-    site_root.mkdir(parents=True, exist_ok=True)
-    _dbg(debug, f"created {site_dirname} directory")
-
-    tag_map: dict[str, list[tuple[str, str]]] = {}
-    wrote_pages = 0
-    skipped_missing_files = 0
-
-    # NEW: per-tag summary chosen from most recent manifesto note that also has that tag
-    # tag -> (creation_key, summary_text)
-    tag_summary: dict[str, tuple[tuple[int, int, int, int, int, int], str]] = {}
-
-    def safe_filename(src_path: str) -> str:
-        p = src_path.strip().lstrip("./")
-        p = p.replace("\\", "/")
-        p = re.sub(r"[^A-Za-z0-9._/\-]+", "_", p)
-        p = p.replace("/", "__")
-        p = p.lstrip("_")
-        if p.lower().endswith(".txt"):
-            p = p[:-4]
-        if p.lower().endswith(".md"):
-            p = p[:-3]
-        if not p:
-            p = "note"
-        return p + ".html"
-
-    def repo_name_from_root(src_root: str) -> str:
-        return Path(src_root).resolve().name or src_root
-
-    footer = """    </div>
+# The publish set is picked in SQL: valid notes carrying one of the .publish
+# tags (or 'publish') and not 'nopublish'. Validation keeps a note_tags row
+# per (note, normalised tag) indexed by tag, so both checks are index
+# lookups rather than walking every note's JSON tags.
+
+def _select_publish_rows(
+    c: sqlite3.Cursor,
+    table: str,
+    tag_table: str,
+    src_root_col: str,
+    publish_tags: set[str],
+) -> list[tuple]:
+    wanted = sorted(publish_tags | {"publish"})
+    marks = ", ".join("?" * len(wanted))
+    # the view carries src_root (ids are only unique per repo), the table doesn't
+    note, tag_note = ("(n.src_root, n.id)", "src_root, note_id") if src_root_col == "src_root" else ("n.id", "note_id")
+
+    def query(creation_col: str) -> str:
+        return f"""
+            SELECT {src_root_col}, path, {creation_col}, title, tags
+              FROM {table} AS n
+             WHERE n.valid = 1
+               AND {note} IN (SELECT {tag_note} FROM {tag_table} WHERE tag IN ({marks}))
+               AND {note} NOT IN (SELECT {tag_note} FROM {tag_table} WHERE tag = 'nopublish')
+        """
+
+    # tolerate older schemas that may not have creation
+    try:
+        return c.execute(query("creation"), wanted).fetchall()
+    except sqlite3.OperationalError:
+        return c.execute(query("NULL"), wanted).fetchall()
+
+def _safe_filename(src_path: str) -> str:
+    p = src_path.strip().lstrip("./")
+    p = p.replace("\\", "/")
+    p = re.sub(r"[^A-Za-z0-9._/\-]+", "_", p)
+    p = p.replace("/", "__")
+    p = p.lstrip("_")
+    if p.lower().endswith(".txt"):
+        p = p[:-4]
+    if p.lower().endswith(".md"):
+        p = p[:-3]
+    if not p:
+        p = "note"
+    return p + ".html"
+
+_PAGE_FOOTER = """    </div>
 </body>
 </html>
 """
 
-    # Tighten spacing + force long "words" (paths/urls) to wrap + enable hyphenation
-    # NOTE: hyphens:auto only works when the browser knows the language; we already have <html lang="en">
-    extra_css = """
+# Tighten spacing + force long "words" (paths/urls) to wrap + enable hyphenation
+# NOTE: hyphens:auto only works when the browser knows the language; we already have <html lang="en">
+_PAGE_EXTRA_CSS = """
 <style>
   /* uniform vertical rhythm */
   p { margin: 0 0 0.45em 0; }
@@ -1060,89 +910,729 @@ def render_and_write_site(
 </style>
 """
 
+def _read_config(repo_root: Path) -> dict:
+    try:
+        cfg = json.loads((repo_root / ".config.json").read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+    return cfg if isinstance(cfg, dict) else {}
+
+# ----------------------------
+# Shared stylesheets
+# ----------------------------
+#
+# The <style> blocks above are written once to docs/assets/ under a name
+# carrying their content hash, and pages link to that instead of inlining
+# several KB of identical css each. Any css change gives a new file name,
+# so browsers/CDNs can cache assets forever.
+
+ASSETS_DIR = "assets"
+
+_RE_STYLE_BLOCK = re.compile(r"[ \t]*<style>\n?(.*?)[ \t]*</style>\n?", re.S)
+
+def _split_styles(html: str) -> tuple[str, str]:
+    """
+    (html without its <style> blocks, the css they held)
+    """
+    css = "".join(m.group(1) for m in _RE_STYLE_BLOCK.finditer(html))
+    return _RE_STYLE_BLOCK.sub("", html), css
+
+def _asset_name(stem: str, css: str) -> str:
+    return f"{ASSETS_DIR}/{stem}-{hashlib.sha256(css.encode('utf-8')).hexdigest()[:12]}.css"
+
+_page_head, _page_css = _split_styles(CSS_CONTENT)
+_extra_head, _extra_css = _split_styles(_PAGE_EXTRA_CSS)
+# extra css came after the main block, keep it that way for the cascade
+PAGE_CSS = _page_css + _extra_css
+PAGE_CSS_ASSET = _asset_name("page", PAGE_CSS)
+
+_index_head, INDEX_CSS_TEXT = _split_styles(INDEX_CSS)
+INDEX_CSS_ASSET = _asset_name("index", INDEX_CSS_TEXT)
+
+def _with_stylesheet(head: str, asset: str, prefix: str) -> str:
+    link = f'    <link rel="stylesheet" href="{prefix}{asset}">\n'
+    return head.replace("</head>", link + "</head>", 1)
+
+# pages (docs/pages/*, docs/<tag>/*) are all one level down
+_PAGE_HEAD = _with_stylesheet(_page_head, PAGE_CSS_ASSET, "../") + _extra_head.strip()
+
+def _index_page_head(prefix: str) -> str:
+    """
+    INDEX_CSS for a page at docs/<prefix>, prefix being "" or "../".
+    """
+    return _with_stylesheet(_index_head, INDEX_CSS_ASSET, prefix)
+
+# ----------------------------
+# Precompressed outputs
+# ----------------------------
+#
+# With "publish_compress": true in .config.json every html/json/css output
+# gets a .gz sibling (and .br when the brotli module is installed), so a
+# static host can serve those as-is. Compression is deterministic (gzip
+# mtime 0), and siblings are only redone when their file is rewritten.
+
+COMPRESSED_SUFFIXES = (".gz", ".br")
+
+def _compress_encodings(repo_root: Path, compress: bool | None) -> tuple[str, ...]:
+    if compress is None:
+        compress = bool(_read_config(repo_root).get("publish_compress", False))
+    if not compress:
+        return ()
+    return (".gz", ".br") if brotli is not None else (".gz",)
+
+def _compressed(data: bytes, suffix: str) -> bytes:
+    if suffix == ".gz":
+        import gzip
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    return brotli.compress(data)
+
+def _write_siblings(path: Path, data: bytes, encodings: tuple[str, ...]) -> None:
+    for suffix in COMPRESSED_SUFFIXES:
+        sib = path.with_name(path.name + suffix)
+        if suffix in encodings:
+            tmp = sib.with_name(sib.name + ".tmp")
+            tmp.write_bytes(_compressed(data, suffix))
+            tmp.replace(sib)
+        else:
+            try:
+                sib.unlink()
+            except FileNotFoundError:
+                pass
+
+def _siblings_match(path: Path, encodings: tuple[str, ...]) -> bool:
+    """
+    True if exactly the wanted compressed siblings are there, no more.
+    """
+    return all(
+        path.with_name(path.name + suffix).is_file() == (suffix in encodings)
+        for suffix in COMPRESSED_SUFFIXES
+    )
+
+# ----------------------------
+# Canonical pages + tag entries
+# ----------------------------
+#
+# Every note is rendered once, to docs/pages/<repo>__<path>.html. Each of
+# its tag dirs gets an entry pointing at that page, made according to
+# "publish_link_mode" in .config.json:
+#
+#   hardlink  (default) same inode, no extra bytes; falls back to copy
+#             where the filesystem can't do it
+#   symlink   relative symlink (fine for most static hosts, not all)
+#   redirect  tiny html stub that redirects to the canonical page
+#   copy      full copy (the old behaviour)
+
+PAGES_DIR = "pages"
+LINK_MODES = ("hardlink", "symlink", "redirect", "copy")
+DEFAULT_LINK_MODE = "hardlink"
+
+def _link_mode(repo_root: Path, link_mode: str | None) -> str:
+    mode = link_mode or _read_config(repo_root).get("publish_link_mode") or DEFAULT_LINK_MODE
+    if mode not in LINK_MODES:
+        raise ValueError(f"publish_link_mode must be one of {', '.join(LINK_MODES)} (got {mode!r})")
+    return mode
+
+def _redirect_stub(target: str, title: str) -> str:
+    href = _html_escape(target)
+    return (
+        '<!DOCTYPE html>\n<html lang="en">\n<head>\n'
+        '    <meta charset="UTF-8">\n'
+        f'    <meta http-equiv="refresh" content="0; url={href}">\n'
+        f'    <link rel="canonical" href="{href}">\n'
+        f"    <title>{_html_escape(title)}</title>\n"
+        "</head>\n<body>\n"
+        f'    <a href="{href}">{_html_escape(title)}</a>\n'
+        "</body>\n</html>\n"
+    )
+
+# Tag dirs share docs/ with what publish itself writes there, so a tag
+# named like one of those gets a prefix (as does any tag that already has
+# it, which keeps two tags from ever landing in the same dir).
+TAG_DIR_PREFIX = "tag-"
+
+def _tag_dir(tag: str) -> str:
+    reserved = {PAGES_DIR, SEARCH_DIR, ASSETS_DIR, SEARCH_PAGE, "index.html", MANIFEST_NAME, ".", ".."}
+    if tag in reserved or tag.startswith(TAG_DIR_PREFIX):
+        return TAG_DIR_PREFIX + tag
+    return tag
+
+def _write_tag_entry(
+    site_root: Path,
+    canonical: str,
+    entry: str,
+    mode: str,
+    title: str,
+    encodings: tuple[str, ...] = (),
+) -> None:
+    """
+    Point docs/<entry> at docs/<canonical>, replacing whatever is there.
+    Compressed siblings of the page are linked/copied the same way.
+    """
+    src = site_root / canonical
+    dst = site_root / entry
+    dst.parent.mkdir(parents=True, exist_ok=True)
+
+    rel_target = os.path.relpath(src, dst.parent)
+
+    if mode == "redirect":
+        stub = _redirect_stub(Path(rel_target).as_posix(), title)
+        _write_text_atomic(dst, stub)
+        _write_siblings(dst, stub.encode("utf-8"), encodings)
+        return
+
+    for suffix in ("", *COMPRESSED_SUFFIXES):
+        s_src = src.with_name(src.name + suffix)
+        s_dst = dst.with_name(dst.name + suffix)
+        tmp = s_dst.with_name(s_dst.name + ".tmp")
+        try:
+            tmp.unlink()
+        except FileNotFoundError:
+            pass
+
+        if suffix and suffix not in encodings:
+            try:
+                s_dst.unlink()
+            except FileNotFoundError:
+                pass
+            continue
+
+        if mode == "symlink":
+            os.symlink(rel_target + suffix, tmp)
+        elif mode == "hardlink":
+            try:
+                os.link(s_src, tmp)
+            except OSError:
+                shutil.copyfile(s_src, tmp)
+        else:
+            shutil.copyfile(s_src, tmp)
+
+        tmp.replace(s_dst)
+
+# ----------------------------
+# Publish manifest
+# ----------------------------
+#
+# docs/.manifest.json remembers, per published note, what it was rendered
+# from (source hash, title, tags, repo/path) and which files it produced,
+# plus a hash of every index page. A publish then only re-renders notes
+# whose inputs changed, deletes outputs nobody produces any more, and
+# leaves index pages alone unless their content changed.
+#
+# Bump RENDER_VERSION whenever page rendering changes in a way the
+# template hash below can't see (e.g. the markdown converter).
+
+MANIFEST_NAME = ".manifest.json"
+MANIFEST_VERSION = 1
+RENDER_VERSION = 2
+
+def _sha256_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def _template_version(link_mode: str, encodings: tuple[str, ...] = ()) -> str:
+    return _sha256_text("\0".join([
+        str(RENDER_VERSION), link_mode, ",".join(encodings), _PAGE_HEAD, PAGE_CSS, INDEX_CSS, _PAGE_FOOTER,
+    ]))
+
+def _load_manifest(site_root: Path) -> dict | None:
+    try:
+        data = json.loads((site_root / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return None
+    return data
+
+def _write_text_atomic(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    tmp.replace(path)
+
+def _write_output(path: Path, text: str, encodings: tuple[str, ...] = ()) -> None:
+    _write_text_atomic(path, text)
+    _write_siblings(path, text.encode("utf-8"), encodings)
+
+def _write_if_changed(path: Path, text: str, old_hash: str | None, encodings: tuple[str, ...] = ()) -> tuple[str, bool]:
+    """
+    Write `text` (and its compressed siblings) unless the manifest says
+    that's what's there already. Returns (hash, written).
+    """
+    h = _sha256_text(text)
+    if h == old_hash and path.is_file() and _siblings_match(path, encodings):
+        return h, False
+    _write_output(path, text, encodings)
+    return h, True
+
+def _remove_output(site_root: Path, rel: str) -> None:
+    out = site_root / rel
+    for suffix in COMPRESSED_SUFFIXES:
+        try:
+            out.with_name(out.name + suffix).unlink()
+        except FileNotFoundError:
+            pass
+    try:
+        out.unlink()
+    except FileNotFoundError:
+        return
+    # drop the tag dir with its last page
+    parent = out.parent
+    if parent != site_root:
+        try:
+            parent.rmdir()
+        except OSError:
+            pass
+
+def _source_hash(src_file: Path, st: os.stat_result, old: dict | None) -> tuple[str, str | None]:
+    """
+    (hash, text): the stored hash is reused when size+mtime match the
+    manifest, in which case text is None (file not read).
+    """
+    if old and old.get("mtime_ns") == st.st_mtime_ns and old.get("size") == st.st_size and old.get("hash"):
+        return old["hash"], None
+    text = src_file.read_text(encoding="utf-8", errors="replace")
+    return _sha256_text(text), text
+
+def _render_page(rec: NoteRec, raw: str) -> tuple[str, str, str | None, dict[str, int]]:
+    """
+    Render one note. Returns (page_html, title, summary, search_terms).
+    """
+    yaml_text, body_text = _split_yaml_front_matter(raw)
+
+    title = (rec.title or "").strip() or _extract_title(yaml_text, body_text)
+    repo_name = Path(rec.src_root).resolve().name or rec.src_root
+
+    # CHANGE: omit 'publish' from metadata tag list
+    tag_list = ", ".join(sorted({t for t in rec.tags if t and t != "publish"})) or "-"
+
+    other_fm = _yaml_to_meta_lines(yaml_text)
+
+    metadata_html = (
+        f"<hr>"
+        f'<div class="meta">'
+        f'<strong>Title</strong>: {_html_escape(title)}<br>'
+        f'<strong>Tags</strong>: {_html_escape(tag_list)}<br>'
+        f"{other_fm}"
+        f'<strong>Repo</strong>: {_html_escape(repo_name)}<br>'
+        f'<strong>Path</strong>: {_html_escape(rec.path)}'
+        f"</div>"
+        f"<hr>"
+    )
+
+    body_html = _md_to_html(body_text)
+    body_html = _inject_wbr_in_text_nodes(body_html)
+
+    page_html = (
+        _PAGE_HEAD
+        + metadata_html
+        + body_html
+        + _PAGE_FOOTER
+    )
+
+    summary = None
+    if "manifesto" in rec.tags and "nopublish" not in rec.tags:
+        summary = _extract_summary_from_body(body_text)
+
+    return page_html, title, summary, _search_terms(title, rec.tags, body_text)
+
+def _render_job(job: tuple[NoteRec, str | None, str]) -> tuple[str, str, str | None, dict[str, int]]:
+    # top-level so worker processes can unpickle it
+    rec, raw, src_file = job
+    if raw is None:
+        raw = Path(src_file).read_text(encoding="utf-8", errors="replace")
+    return _render_page(rec, raw)
+
+# below this many pages per worker, process startup costs more than it saves
+_MIN_PAGES_PER_JOB = 8
+
+def _render_pages(to_render: list[tuple[NoteRec, str | None, str]], jobs: int | None) -> Iterator[tuple[str, str, str | None, dict[str, int]]]:
+    """
+    Yield (page_html, title, summary, search_terms) for each job, in order.
+    """
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs or 1, len(to_render) // _MIN_PAGES_PER_JOB)
+
+    if jobs <= 1:
+        yield from map(_render_job, to_render)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = max(1, min(32, len(to_render) // (jobs * 4)))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from pool.map(_render_job, to_render, chunksize=chunksize)
+
+# ----------------------------
+# Search index
+# ----------------------------
+#
+# docs/search/ holds a small inverted index the search page fetches piece
+# by piece instead of downloading every note:
+#
+#   docs.json       {doc id: [url, title, tags]}
+#   idx_<key>.json  {term: [doc id, weight, doc id, weight, ...]} for every
+#                   term whose first two chars give <key> (see _search_shard)
+#
+# Terms come from the title (weight 3), tags (2) and body (1). They're
+# worked out when a note is rendered and kept in the manifest, so a publish
+# only re-reads the notes that changed; the shards are rebuilt from the
+# manifest in memory and written only if they changed. Doc ids are stored
+# per note in the manifest and never reused, so untouched shards stay put.
+
+SEARCH_DIR = "search"
+SEARCH_PAGE = "search.html"
+
+_RE_SEARCH_TERM = re.compile(r"\w+")
+_RE_SEARCH_SHARD = re.compile(r"[a-z0-9]{2}")
+_RE_MD_LINK_TARGET = re.compile(r"\]\([^)]*\)")
+_SEARCH_MIN_LEN = 2
+_SEARCH_MAX_LEN = 40
+
+def _search_tokens(text: str) -> set[str]:
+    return {
+        t for t in _RE_SEARCH_TERM.findall(text.lower())
+        if _SEARCH_MIN_LEN <= len(t) <= _SEARCH_MAX_LEN
+    }
+
+def _search_terms(title: str, tags: Iterable[str], body_text: str) -> dict[str, int]:
+    terms = dict.fromkeys(_search_tokens(_RE_MD_LINK_TARGET.sub("] ", body_text)), 1)
+    for t in _search_tokens(" ".join(t for t in tags if t != "publish")):
+        terms[t] = 2
+    for t in _search_tokens(title):
+        terms[t] = 3
+    return terms
+
+def _search_shard(term: str) -> str:
+    # must match shardOf() in _SEARCH_PAGE_JS
+    prefix = term[:2]
+    if _RE_SEARCH_SHARD.fullmatch(prefix):
+        return prefix
+    return "_" + format(ord(term[0]), "x")
+
+def _search_files(notes: dict[str, dict]) -> dict[str, str]:
+    """
+    Build docs.json and the shards from the manifest's note entries.
+    Returns {site-relative path: json text}.
+    """
+    docs: dict[int, list] = {}
+    shards: dict[str, dict[str, list[int]]] = {}
+
+    for entry in notes.values():
+        doc = entry["doc"]
+        tags = sorted(o.split("/", 1)[0] for o in entry["outputs"][1:])
+        docs[doc] = [entry["outputs"][0], entry["title"], tags]
+        for term, weight in entry["terms"].items():
+            shards.setdefault(_search_shard(term), {}).setdefault(term, []).extend((doc, weight))
+
+    def dump(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+    out = {f"{SEARCH_DIR}/docs.json": dump({str(k): docs[k] for k in sorted(docs)})}
+    for key, terms in shards.items():
+        for postings in terms.values():
+            # postings come in manifest order; sort by doc id so the shard
+            # text doesn't depend on it
+            pairs = sorted(zip(postings[::2], postings[1::2]))
+            postings[:] = [x for pair in pairs for x in pair]
+        out[f"{SEARCH_DIR}/idx_{key}.json"] = dump(terms)
+    return out
+
+_SEARCH_PAGE_JS = r"""
+<script>
+(function () {
+  var box = document.getElementById("q");
+  var list = document.getElementById("results");
+  var status = document.getElementById("status");
+  var cache = {};
+  var docs = null;
+
+  function get(path) {
+    if (!cache[path]) {
+      cache[path] = fetch(path).then(function (r) { return r.ok ? r.json() : {}; })
+                               .catch(function () { return {}; });
+    }
+    return cache[path];
+  }
+
+  function tokens(s) {
+    return (s.toLowerCase().match(/[\p{L}\p{N}_]+/gu) || [])
+      .filter(function (t) { return t.length >= 2 && t.length <= 40; });
+  }
+
+  function shardOf(t) {
+    var p = t.slice(0, 2);
+    return /^[a-z0-9]{2}$/.test(p) ? p : "_" + t.codePointAt(0).toString(16);
+  }
+
+  // doc id -> weight for one query word; the last word also matches as a
+  // prefix, so results show up while typing
+  function lookup(word, prefix) {
+    return get("search/idx_" + shardOf(word) + ".json").then(function (shard) {
+      var hits = {};
+      Object.keys(shard).forEach(function (term) {
+        if (term === word || (prefix && term.lastIndexOf(word, 0) === 0)) {
+          var p = shard[term];
+          for (var i = 0; i < p.length; i += 2) {
+            hits[p[i]] = Math.max(hits[p[i]] || 0, p[i + 1]);
+          }
+        }
+      });
+      return hits;
+    });
+  }
+
+  var seq = 0;
+  function search() {
+    var words = tokens(box.value);
+    var mine = ++seq;
+    if (!words.length) {
+      list.innerHTML = "";
+      status.textContent = "";
+      return;
+    }
+    Promise.all([get("search/docs.json")].concat(words.map(function (w, i) {
+      return lookup(w, i === words.length - 1);
+    }))).then(function (res) {
+      if (mine !== seq) return;
+      docs = res[0];
+      var score = res[1];
+      res.slice(2).forEach(function (hits) {
+        var next = {};
+        Object.keys(score).forEach(function (d) {
+          if (hits[d]) next[d] = score[d] + hits[d];
+        });
+        score = next;
+      });
+      var ids = Object.keys(score).sort(function (a, b) {
+        return (score[b] - score[a]) || docs[a][1].localeCompare(docs[b][1]);
+      });
+      list.innerHTML = "";
+      ids.slice(0, 100).forEach(function (d) {
+        var li = document.createElement("li");
+        var a = document.createElement("a");
+        a.href = docs[d][0];
+        a.textContent = docs[d][1];
+        li.appendChild(a);
+        if (docs[d][2].length) {
+          li.appendChild(document.createTextNode(" " + docs[d][2].map(function (t) { return "#" + t; }).join(" ")));
+        }
+        list.appendChild(li);
+      });
+      status.textContent = ids.length ? (ids.length > 100 ? "first 100 of " + ids.length : ids.length + " found") : "nothing found";
+    });
+  }
+
+  box.addEventListener("input", search);
+  var q = new URLSearchParams(location.search).get("q");
+  if (q) { box.value = q; search(); }
+})();
+</script>
+"""
+
+def _search_page(site_title: str) -> str:
+    return "\n".join([
+        _index_page_head(""),
+        f'<h1><a href="index.html">{site_title}</a> / search</h1>',
+        '<p><input id="q" type="search" autofocus autocomplete="off" placeholder="search notes" style="width: 100%; font: inherit;"></p>',
+        '<p id="status"></p>',
+        '<ul id="results"></ul>',
+        "    </div>",
+        _SEARCH_PAGE_JS.strip(),
+        "</body>",
+        "</html>",
+    ]) + "\n"
+
+def render_and_write_site(
+    *,
+    repo_root: Path,
+    notes: Iterable[NoteRec],
+    site_dirname: str = "docs",
+    debug: bool = False,
+    force: bool = False,
+    jobs: int | None = None,
+    link_mode: str | None = None,
+    compress: bool | None = None,
+    fingerprint: str | None = None,
+) -> None:
+    """
+    jobs: render pages on this many worker processes (0 = one per core,
+    None/1 = in this process). Writing stays in this process either way.
+
+    fingerprint: stored in the manifest so the next publish_site can tell
+    nothing changed without rendering anything (see _publish_fingerprint).
+
+    link_mode: how tag dirs refer to the canonical page (see LINK_MODES);
+    defaults to publish_link_mode in .config.json.
+
+    compress: also write .gz/.br siblings; defaults to publish_compress in
+    .config.json.
+    """
+    repo_root = repo_root.resolve()
+    site_root = (repo_root / site_dirname).resolve()
+    _dbg(debug, f"site_root={site_root}")
+
+    link_mode = _link_mode(repo_root, link_mode)
+    encodings = _compress_encodings(repo_root, compress)
+    template = _template_version(link_mode, encodings)
+    manifest = None if force else _load_manifest(site_root)
+
+    if manifest is None and site_root.exists():
+        # no (usable) manifest: we can't tell our files from stale ones
+        _dbg(debug, f"no manifest, removing existing {site_dirname} directory")
+        shutil.rmtree(site_root)
+
+    site_root.mkdir(parents=True, exist_ok=True)
+
+    old_notes: dict[str, dict] = {}
+    old_pages: dict[str, str] = {}
+    if manifest is not None:
+        old_pages = manifest.get("pages", {})
+        if manifest.get("template") == template:
+            old_notes = manifest.get("notes", {})
+        else:
+            _dbg(debug, "template changed, re-rendering every note")
+            # still needed to find orphans, just never reused
+            old_notes = {
+                k: {"outputs": v.get("outputs", []), "doc": v.get("doc")}
+                for k, v in manifest.get("notes", {}).items()
+            }
+
+    new_notes: dict[str, dict] = {}
+    tag_map: dict[str, list[tuple[str, str]]] = {}
+    # search doc ids: one per note, never handed out twice
+    next_doc = int((manifest or {}).get("next_doc", 0))
+    rendered = 0
+    reused = 0
+    skipped_missing_files = 0
+
+    # NEW: per-tag summary chosen from most recent manifesto note that also has that tag
+    # tag -> (creation_key, summary_text)
+    tag_summary: dict[str, tuple[tuple[int, int, int, int, int, int], str]] = {}
+
+    # 1. work out what each note needs (stat/hash only, cheap)
+    planned: list[tuple[NoteRec, str, dict, list[str], str, list[str], dict | None]] = []
+    to_render: list[tuple[NoteRec, str | None, str]] = []
+
     for rec in notes:
         src_root = Path(rec.src_root).resolve()
         src_file = src_root / rec.path
+        key = f"{rec.src_root}::{rec.path}"
 
-        if not src_file.is_file():
+        try:
+            st = src_file.stat()
+        except FileNotFoundError:
+            st = None
+        if st is None or not src_file.is_file():
             skipped_missing_files += 1
             _dbg(debug, f"SKIP missing file: {src_file}")
             continue
 
-        raw = src_file.read_text(encoding="utf-8", errors="replace")
-        yaml_text, body_text = _split_yaml_front_matter(raw)
-
-        title = (rec.title or "").strip() or _extract_title(yaml_text, body_text)
-        repo_name = repo_name_from_root(rec.src_root)
+        old = old_notes.get(key)
+        src_hash, raw = _source_hash(src_file, st, old)
 
-        # CHANGE: omit 'publish' from metadata tag list
-        tag_list = ", ".join(sorted({t for t in rec.tags if t and t != "publish"})) or "-"
+        fname = _safe_filename(Path(rec.path).name)
+        publish_tags = sorted({t for t in rec.tags if t and t != "publish"}) or ["general"]
+        canonical = f"{PAGES_DIR}/{_safe_filename(Path(rec.src_root).name + '/' + rec.path)}"
+        # canonical page first, then one entry per tag
+        outputs = [canonical] + [f"{_tag_dir(tag)}/{fname}" for tag in publish_tags]
 
-        other_fm = _yaml_to_meta_lines(yaml_text)
+        inputs = _sha256_text(json.dumps([src_hash, rec.title, list(rec.tags), rec.src_root, rec.path]))
 
-        metadata_html = (
-            f"<hr>"
-            f'<div class="meta">'
-            f'<strong>Title</strong>: {_html_escape(title)}<br>'
-            f'<strong>Tags</strong>: {_html_escape(tag_list)}<br>'
-            f"{other_fm}"
-            f'<strong>Repo</strong>: {_html_escape(repo_name)}<br>'
-            f'<strong>Path</strong>: {_html_escape(rec.path)}'
-            f"</div>"
-            f"<hr>"
-        )
-
-        body_html = _run_awk_md_to_html(body_text)
-        body_html = _inject_wbr_in_text_nodes(body_html)
+        entry = {
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "hash": src_hash,
+            "inputs": inputs,
+            "outputs": outputs,
+        }
 
-        page_html = (
-            CSS_CONTENT
-            + extra_css
-            + metadata_html
-            + body_html
-            + footer
+        reuse = (
+            old
+            and old.get("inputs") == inputs
+            and old.get("outputs") == outputs
+            and all((site_root / o).is_file() and _siblings_match(site_root / o, encodings) for o in outputs)
         )
+        if not reuse and raw is None:
+            # read it now rather than in the renderer: we don't hold the
+            # workspace lock, and a tidy may move it in the meantime
+            try:
+                raw = src_file.read_text(encoding="utf-8", errors="replace")
+            except FileNotFoundError:
+                skipped_missing_files += 1
+                _dbg(debug, f"SKIP missing file: {src_file}")
+                continue
 
-        fname = safe_filename(Path(rec.path).name)
-
-        publish_tags = [t for t in rec.tags if t and t != "publish"]
-        if not publish_tags:
-            publish_tags = ["general"]
-
-        for tag in sorted(set(publish_tags)):
-            tag_dir = site_root / tag
-            tag_dir.mkdir(parents=True, exist_ok=True)
-
-            out_path = tag_dir / fname
-            out_path.write_text(page_html, encoding="utf-8")
-            wrote_pages += 1
+        if old and old.get("doc") is not None:
+            entry["doc"] = old["doc"]
+        else:
+            entry["doc"] = next_doc
+            next_doc += 1
 
+        if reuse:
+            planned.append((rec, key, entry, outputs, fname, publish_tags, old))
+        else:
+            planned.append((rec, key, entry, outputs, fname, publish_tags, None))
+            to_render.append((rec, raw, str(src_file)))
+
+    # 2. render whatever changed (possibly in parallel); results come back
+    # in note order, so everything below stays deterministic
+    rendered_pages = _render_pages(to_render, jobs)
+
+    for rec, key, entry, outputs, fname, publish_tags, reuse in planned:
+        if reuse is not None:
+            title = reuse["title"]
+            summary = reuse.get("summary")
+            terms = reuse["terms"]
+            reused += 1
+        else:
+            page_html, title, summary, terms = next(rendered_pages)
+            canonical, *entries = outputs
+            _write_output(site_root / canonical, page_html, encodings)
+            for o in entries:
+                _write_tag_entry(site_root, canonical, o, link_mode, title, encodings)
+            rendered += 1
+
+        entry["title"] = title
+        entry["summary"] = summary
+        entry["terms"] = terms
+        new_notes[key] = entry
+
+        for tag in publish_tags:
             tag_map.setdefault(tag, []).append((fname, title))
 
         # NEW: capture tag-home summary from manifesto notes
         # Condition: note contains BOTH 'manifesto' AND the tag.
-        if "manifesto" in rec.tags and "nopublish" not in rec.tags:
-            summary = _extract_summary_from_body(body_text)
-            if summary:
-                ckey = _parse_creation_key(rec.creation)
-                for t in rec.tags:
-                    if not t:
-                        continue
-                    if t in ("publish", "manifesto", "nopublish"):
-                        continue
-                    prev = tag_summary.get(t)
-                    if prev is None or ckey > prev[0]:
-                        tag_summary[t] = (ckey, summary)
-
-    _dbg(debug, f"wrote_pages={wrote_pages} skipped_missing_files={skipped_missing_files} tags={len(tag_map)}")
+        if summary:
+            ckey = _parse_creation_key(rec.creation)
+            for t in rec.tags:
+                if not t:
+                    continue
+                if t in ("publish", "manifesto", "nopublish"):
+                    continue
+                prev = tag_summary.get(t)
+                if prev is None or ckey > prev[0]:
+                    tag_summary[t] = (ckey, summary)
+
+    # orphans: outputs of notes that left the publish set (or changed tags)
+    live_outputs = {o for entry in new_notes.values() for o in entry["outputs"]}
+    removed = 0
+    for entry in old_notes.values():
+        for o in entry.get("outputs", []):
+            if o not in live_outputs:
+                _remove_output(site_root, o)
+                removed += 1
+
+    _dbg(debug, f"rendered={rendered} reused={reused} removed={removed} skipped_missing_files={skipped_missing_files} tags={len(tag_map)}")
+
+    # index pages: rebuilt in memory (cheap), written only if they changed
+    new_pages: dict[str, str] = {}
+    wrote_index = 0
 
     for tag in sorted(tag_map.keys()):
         items = sorted(tag_map[tag], key=lambda x: (x[1].lower(), x[0].lower()))
 
-        lines = [INDEX_CSS, f"<h1>#{_html_escape(tag)}</h1>"]
-
         # one space after title
-        lines = [INDEX_CSS, f"<h1>#{_html_escape(tag)}</h1>"]
+        lines = [_index_page_head("../"), f"<h1>#{_html_escape(tag)}</h1>"]
 
         s = tag_summary.get(tag)
         if s:
@@ -1153,19 +1643,70 @@ def render_and_write_site(
             lines.append(f'<li><a href="{_html_escape(fname)}">{_html_escape(title)}</a></li>')
         lines += ["</ul>", "    </div>", "</body>", "</html>"]
 
-        out = site_root / tag / "tag_home.html"
-        out.write_text("\n".join(lines) + "\n", encoding="utf-8")
-        _dbg(debug, f"wrote {out}")
+        rel = f"{_tag_dir(tag)}/tag_home.html"
+        new_pages[rel], wrote = _write_if_changed(site_root / rel, "\n".join(lines) + "\n", old_pages.get(rel), encodings)
+        wrote_index += wrote
 
     # CHANGE: index title = repo name, and remove the "Tags" tagline
     index_title = _html_escape(repo_root.name or "Index")
-    tag_lines = [INDEX_CSS, f"<h1>{index_title}</h1>", "<ul>"]
+    tag_lines = [_index_page_head(""), f"<h1>{index_title}</h1>", f'<p><a href="{SEARCH_PAGE}">search</a></p>', "<ul>"]
     for tag in sorted(tag_map.keys()):
-        tag_lines.append(f'<li><a href="{_html_escape(tag)}/tag_home.html">#{_html_escape(tag)}</a></li>')
+        tag_lines.append(f'<li><a href="{_html_escape(_tag_dir(tag))}/tag_home.html">#{_html_escape(tag)}</a></li>')
     tag_lines += ["</ul>", "    </div>", "</body>", "</html>"]
-    out = site_root / "index.html"
-    out.write_text("\n".join(tag_lines) + "\n", encoding="utf-8")
-    _dbg(debug, f"wrote {out}")
+    new_pages["index.html"], wrote = _write_if_changed(
+        site_root / "index.html", "\n".join(tag_lines) + "\n", old_pages.get("index.html"), encodings
+    )
+    wrote_index += wrote
+
+    new_pages[SEARCH_PAGE], wrote = _write_if_changed(
+        site_root / SEARCH_PAGE, _search_page(index_title), old_pages.get(SEARCH_PAGE), encodings
+    )
+    wrote_index += wrote
+
+    for rel, css in ((PAGE_CSS_ASSET, PAGE_CSS), (INDEX_CSS_ASSET, INDEX_CSS_TEXT)):
+        new_pages[rel], wrote = _write_if_changed(site_root / rel, css, old_pages.get(rel), encodings)
+        wrote_index += wrote
+
+    wrote_search = 0
+    for rel, text in _search_files(new_notes).items():
+        new_pages[rel], wrote = _write_if_changed(site_root / rel, text, old_pages.get(rel), encodings)
+        wrote_search += wrote
+
+    for rel in old_pages:
+        if rel not in new_pages:
+            _remove_output(site_root, rel)
+
+    _dbg(debug, f"wrote {wrote_index} index page(s), {wrote_search} search file(s)")
+
+    _write_text_atomic(site_root / MANIFEST_NAME, json.dumps({
+        "version": MANIFEST_VERSION,
+        "template": template,
+        "fingerprint": fingerprint,
+        "next_doc": next_doc,
+        "notes": new_notes,
+        "pages": new_pages,
+    }, ensure_ascii=False, sort_keys=True))
+
+def _publish_fingerprint(notes: list[NoteRec], template: str) -> str:
+    """
+    Everything a publish depends on, short of reading the notes: the
+    publish set itself plus size/mtime of each source file.
+    """
+    parts: list = [template]
+    for rec in notes:
+        try:
+            st = (Path(rec.src_root) / rec.path).stat()
+            stamp = [st.st_mtime_ns, st.st_size]
+        except FileNotFoundError:
+            stamp = None
+        parts.append([rec.src_root, rec.path, rec.creation, rec.title, list(rec.tags), stamp])
+    return _sha256_text(json.dumps(parts))
+
+# what publish_site did
+PUBLISHED = "published"
+NOT_PUBLISHING = "not publishing"
+NO_NOTES = "no notes"
+UNCHANGED = "unchanged"
 
 def publish_site(
     *,
@@ -1176,7 +1717,19 @@ def publish_site(
     conn: sqlite3.Connection | None = None,   # NEW
     publish_file_root: Path | None = None,    # NEW (optional override for where .publish is read)
     source_table: str = "all_notes",          # NEW (for conn mode)
-) -> None:
+    tags_table: str = "all_note_tags",        # its tag rows (for conn mode)
+    force: bool = False,                      # ignore the manifest, rebuild docs/ from scratch
+    jobs: int | None = None,                  # render on N processes (0 = all cores)
+    link_mode: str | None = None,             # see LINK_MODES; default from .config.json
+    compress: bool | None = None,             # .gz/.br siblings; default from .config.json
+) -> str:
+    """
+    Returns PUBLISHED if docs/ was (re)built, otherwise why not:
+    NOT_PUBLISHING (no .publish or no db), NO_NOTES (nothing selected) or
+    UNCHANGED (same notes and template as the last publish).
+    """
+    from ...orglock import workspace_lock, SHARED
+
     repo_root = (repo_root or Path.cwd()).resolve()
     _dbg(debug, f"repo_root={repo_root}")
 
@@ -1187,7 +1740,7 @@ def publish_site(
     # Only run if .publish exists (so auto-run is safe)
     if not pub_path.is_file():
         _dbg(debug, "SKIP: .publish not found")
-        return
+        return NOT_PUBLISHING
 
     # If caller did not pass a connection, enforce single-repo db existence
     if conn is None:
@@ -1195,15 +1748,22 @@ def publish_site(
         _dbg(debug, f"db_path={db_path} exists={db_path.is_file()}")
         if not db_path.is_file():
             _dbg(debug, "ERROR: .org.db missing (cannot publish)")
-            return
-
-    notes, all_tags = build_publish_set(
-        repo_root=repo_root,
-        conn=conn,                        # NEW
-        publish_file=publish_file,
-        publish_file_root=pub_root,       # NEW
-        source_table=source_table,        # NEW
-    )
+            return NOT_PUBLISHING
+
+    # the rows (and the stats the fingerprint takes) under a short shared
+    # hold; rendering below only holds the publish lock, so validation and
+    # tidy don't wait for it
+    with workspace_lock(repo_root).hold(SHARED):
+        notes, all_tags = build_publish_set(
+            repo_root=repo_root,
+            conn=conn,                        # NEW
+            publish_file=publish_file,
+            publish_file_root=pub_root,       # NEW
+            source_table=source_table,        # NEW
+            tags_table=tags_table,
+        )
+        template = _template_version(_link_mode(repo_root, link_mode), _compress_encodings(repo_root, compress))
+        fingerprint = _publish_fingerprint(notes, template)
 
     _dbg(debug, f"picked_notes={len(notes)} all_tags_seen={len(all_tags)}")
     if debug and notes:
@@ -1216,13 +1776,161 @@ def publish_site(
     # Optional: if nothing to publish, do nothing (don’t wipe docs/)
     if not notes:
         _dbg(debug, "SKIP: no notes selected (won't touch docs/)")
-        return
+        return NO_NOTES
+
+    # nothing changed since the last publish: don't even stat docs/
+    if not force:
+        manifest = _load_manifest(repo_root / site_dirname)
+        if manifest is not None and manifest.get("fingerprint") == fingerprint:
+            _dbg(debug, "SKIP: publish set and notes unchanged since last publish")
+            return UNCHANGED
 
     render_and_write_site(
         repo_root=repo_root,
         notes=notes,
         site_dirname=site_dirname,
         debug=debug,
+        force=force,
+        jobs=jobs,
+        link_mode=link_mode,
+        compress=compress,
+        fingerprint=fingerprint,
     )
 
     _dbg(debug, "DONE")
+    return PUBLISHED
+
+# ----------------------------
+# `org publish`
+# ----------------------------
+
+PUBLISH_LOCK = ".org.publish.lock"
+PUBLISH_LOG = ".org.publish.log"
+
+def spawn_background_publish(args: list[str] | tuple[str, ...] = ()) -> None:
+    """
+    Run `org publish --detached <args>` detached from this process, output
+    going to .org.publish.log. Returns immediately. --detached is --no-wait
+    that also tells main to skip journal replay and validation (the
+    caller has done both). publish_site shares the workspace lock only
+    while it reads the publish set.
+    """
+    cmd = [sys.executable, "-m", "org.org", "publish", "--detached", *args]
+    with open(PUBLISH_LOG, "a", encoding="utf-8") as log_f:
+        subprocess.Popen(
+            cmd,
+            cwd=Path.cwd(),
+            stdin=subprocess.DEVNULL,
+            stdout=log_f,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,   # survives the terminal closing
+            close_fds=True,
+        )
+
+def publish_pending(conn: sqlite3.Connection, repo_root: Path | None = None) -> bool:
+    """
+    Would publish_site render anything? Reads the publish set and compares
+    its fingerprint with the last publish's, without rendering.
+    """
+    from ...orglock import workspace_lock, SHARED
+
+    repo_root = (repo_root or Path.cwd()).resolve()
+    if not (repo_root / ".publish").is_file():
+        return False
+
+    with workspace_lock(repo_root).hold(SHARED):
+        notes, _ = build_publish_set(repo_root=repo_root, conn=conn)
+        if not notes:
+            return False
+        template = _template_version(_link_mode(repo_root, None), _compress_encodings(repo_root, None))
+        fingerprint = _publish_fingerprint(notes, template)
+
+    manifest = _load_manifest(repo_root / "docs")
+    return manifest is None or manifest.get("fingerprint") != fingerprint
+
+def maybe_auto_publish(conn: sqlite3.Connection) -> None:
+    """
+    Called after every other command: kick off a background publish if the
+    workspace publishes, "auto_publish" is on in .config.json and
+    something changed since the last publish.
+    """
+    root = Path.cwd()
+    if not (root / ".publish").is_file():
+        return
+    if not _read_config(root).get("auto_publish"):
+        return
+    if not publish_pending(conn, root):
+        return
+    try:
+        spawn_background_publish()
+    except OSError as e:
+        print(f"[publish] couldn't start background publish: {e}", file=sys.stderr)
+
+def cmd_publish(c, *args):
+    """
+    org publish [--jobs N] [--force] [--background] [--no-wait]
+
+      --jobs N      render pages on N processes (0 = one per core)
+      --force       rebuild docs/ from scratch, even if nothing changed
+      --background  publish in a detached process and return immediately
+      --no-wait     give up instead of waiting if another publish is running
+    """
+    from ...orglock import workspace_lock, LockTimeout, EXCLUSIVE
+
+    jobs: int | None = None
+    force = False
+    background = False
+    no_wait = False
+
+    rest = list(args)
+    passthrough: list[str] = []
+    while rest:
+        a = rest.pop(0)
+        if a == "--jobs" or a.startswith("--jobs="):
+            raw = a.split("=", 1)[1] if "=" in a else (rest.pop(0) if rest else "")
+            try:
+                jobs = int(raw)
+            except ValueError:
+                sys.exit(f"--jobs needs a number (got {raw!r})")
+            if jobs < 0:
+                sys.exit("--jobs can't be negative")
+            passthrough += ["--jobs", str(jobs)]
+        elif a == "--force":
+            force = True
+            passthrough.append(a)
+        elif a == "--background":
+            background = True
+        elif a in ("--no-wait", "--detached"):
+            no_wait = True
+        else:
+            sys.exit(f"Unknown option for publish: {a}\nUsage: org publish [--jobs N] [--force] [--background] [--no-wait]")
+
+    if not Path(".publish").is_file():
+        print("Nothing to publish (no .publish file in this workspace)")
+        return
+
+    if background:
+        spawn_background_publish(passthrough)
+        print(f"Publishing in the background (output in {PUBLISH_LOG})")
+        return
+
+    try:
+        with workspace_lock(name=PUBLISH_LOCK).hold(EXCLUSIVE, timeout=0 if no_wait else None):
+            started = datetime.now()
+            result = publish_site(repo_root=Path.cwd(), conn=c.connection, jobs=jobs, force=force)
+    except LockTimeout:
+        msg = "Another 'org publish' is already running"
+        if no_wait:
+            print(f"{msg}, skipping")
+            return
+        sys.exit(msg)
+
+    if result == PUBLISHED:
+        secs = (datetime.now() - started).total_seconds()
+        print(f"Published to docs/ in {secs:.1f}s")
+    elif result == NO_NOTES:
+        print("No notes match .publish, leaving docs/ as it is")
+    elif result == UNCHANGED:
+        print("Nothing changed since the last publish")
+    else:
+        print("Nothing to publish (no .publish file or .org.db in this workspace)")
@@ -0,0 +1,143 @@
+import json
+import typing as tp
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from .cli_helpers import effective_priorities_asof, norm_tag
+
+# ----------------------------
+# Report snapshot
+# ----------------------------
+#
+# `org report` prints calendar, routines, todos and projects, which used to
+# each run their own SELECT and decode the same tags again. A
+# ReportSnapshot loads events and todos once per report, with tags
+# decoded and effective priorities worked out, and every section reads
+# from it (snapshot=...). Without one, the sections load for themselves
+# through the same helpers, so both paths see identical records.
+
+@dataclass(frozen=True)
+class EventRecord:
+    event: str
+    path: str
+    tags: tuple[str, ...]    # as written (calendar/routines print them as-is)
+    patterned: bool
+
+@dataclass(frozen=True)
+class TodoRecord:
+    todo: str
+    path: str
+    status: str              # stripped, lower-cased
+    tags: tuple[str, ...]    # normalised, blanks dropped, in file order
+    priority: int | None     # stored; None if it isn't a number
+    effective: int | None    # effective priority as of the load date, if one was given
+    creation: str
+    created: datetime | None
+    deadline: str | None
+
+def event_record(row) -> EventRecord:
+    return EventRecord(
+        event=row["event"],
+        path=row["path"],
+        tags=tuple(json.loads(row["tags"])) if row["tags"] else (),
+        patterned=bool(row["pattern"]),
+    )
+
+def _parse_creation(s) -> datetime | None:
+    if not s or not isinstance(s, str):
+        return None
+    # the usual YYYYMMDDTHHMMSS without strptime (slow, and it's every todo)
+    if len(s) == 15 and s[8] == "T" and s[:8].isdigit() and s[9:].isdigit():
+        try:
+            return datetime(int(s[:4]), int(s[4:6]), int(s[6:8]), int(s[9:11]), int(s[11:13]), int(s[13:]))
+        except ValueError:
+            return None
+    try:
+        return datetime.strptime(s, "%Y%m%dT%H%M%S")
+    except ValueError:
+        return None
+
+def load_todo_records(c, as_of: date | datetime | None = None) -> list[TodoRecord]:
+    """
+    Valid todos, ordered by priority, newest first. Effective priorities
+    are filled in when as_of is given.
+    """
+    rows = c.execute("""
+        SELECT todo, path, status, tags, priority, creation, deadline
+          FROM all_todos
+         WHERE valid = 1
+         ORDER BY priority ASC, creation DESC, tags ASC
+    """).fetchall()
+
+    priorities: list[int | None] = []
+    for row in rows:
+        try:
+            priorities.append(int(row["priority"]))
+        except (TypeError, ValueError):
+            priorities.append(None)
+
+    effective: list[int | None] = [None] * len(rows)
+    if as_of is not None:
+        known = [i for i, p in enumerate(priorities) if p is not None]
+        batch = effective_priorities_asof(
+            [priorities[i] for i in known],
+            [rows[i]["deadline"] for i in known],
+            as_of=as_of,
+        )
+        for i, e in zip(known, batch):
+            effective[i] = e
+
+    out: list[TodoRecord] = []
+    for row, priority, eff in zip(rows, priorities, effective):
+        raw_tags = json.loads(row["tags"]) if row["tags"] else []
+        tags = tuple(t for t in (norm_tag(t) for t in raw_tags if isinstance(t, str)) if t)
+
+        out.append(TodoRecord(
+            todo=row["todo"],
+            path=row["path"],
+            status=(row["status"] or "").strip().lower(),
+            tags=tags,
+            priority=priority,
+            effective=eff,
+            creation=row["creation"],
+            created=_parse_creation(row["creation"]),
+            deadline=row["deadline"],
+        ))
+    return out
+
+@dataclass
+class ReportSnapshot:
+    day: date
+    days: int
+    instances: list[tuple[datetime, datetime | None, EventRecord]]
+    todos: list[TodoRecord]
+    tree: dict[str, tp.Any]
+
+    def instances_between(self, start: date, end: date, patterned: bool | None = None):
+        """
+        (start, end, EventRecord) on start..end (inclusive), in the order
+        occurrences_between gives them; None if that's outside what was
+        loaded, so the caller queries instead.
+        """
+        last = self.day + timedelta(days=self.days - 1)
+        if start < self.day or end > last:
+            return None
+        return [
+            inst for inst in self.instances
+            if start <= inst[0].date() <= end
+            and (patterned is None or inst[2].patterned == patterned)
+        ]
+
+def load_report_snapshot(c, day: date, days: int = 7, tree: dict[str, tp.Any] | None = None) -> ReportSnapshot:
+    """Everything a report for `day` (events over `days` days) reads."""
+    from .occurrences import occurrences_between
+
+    return ReportSnapshot(
+        day=day,
+        days=days,
+        instances=[
+            (s, ee, event_record(row))
+            for s, ee, row in occurrences_between(c, day, day + timedelta(days=days - 1))
+        ],
+        todos=load_todo_records(c, as_of=day),
+        tree=tree or {},
+    )
@@ -26,17 +26,19 @@
 # so i'll keep this warning.
 
 import os
-import random
-import string
 import sqlite3
 import re
 import tempfile
+import hashlib
 from typing import Literal
 import typing as tp
 from pathlib import Path
 from datetime import datetime
 from collections import defaultdict
+from dataclasses import dataclass, field
 from ..my_logger import log
+from ..validate import LINE_SYMBOLS, build_line
+from ..orglock import workspace_lock, EXCLUSIVE
 import shutil
 import sys
 
@@ -64,34 +66,57 @@ def coerce_tags(value) -> list[str]:
             out.append(t)
     return out
 
+def is_group_dir_name(name: str) -> bool:
+    return name.startswith(IGNORE_PREFIX) and not name.startswith(IGNORE_PREFIX * 2)  # <-- skip __dirs
+
+def find_nested_group_dirs(group_dir: Path) -> list[Path]:
+    """
+    Walk one group dir (without following symlinks) and return any
+    _-prefixed dirs inside it. We stop at the first one on each branch,
+    everything below it is invalid for the same reason.
+    """
+    nested: list[Path] = []
+    stack = [group_dir]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if not entry.is_dir(follow_symlinks=False) or entry.name == ".git":
+                        continue
+                    if is_group_dir_name(entry.name):
+                        nested.append(Path(entry.path))
+                    else:
+                        stack.append(Path(entry.path))
+        except (PermissionError, FileNotFoundError):
+            continue
+    return nested
+
 def get_tagsets() -> dict[Path, list[str]]:
     tagsets: dict[Path, list[str]] = {}
     invalid: list[tuple[Path | None, str, list[str]]] = []
     tag_to_dirs: defaultdict[str, list[Path]] = defaultdict(list)
 
-    all_paths = list(ROOT.rglob("*"))
-
-    # Step 1: Check for invalid paths with >1 _-prefixed directories
-    for path in all_paths:
-        if not path.is_file() and not path.is_dir():
-            continue
-        underscore_dirs = [
-            part for i, part in enumerate(path.parts)
-            if part.startswith(IGNORE_PREFIX)
-            and not part.startswith(IGNORE_PREFIX * 2)  # <-- skip __dirs
-            and (ROOT / Path(*path.parts[:i+1])).is_dir()
-        ]
-        if len(underscore_dirs) > 1:
-            invalid.append((path, "Multiple '_'-prefixed directories in path", underscore_dirs))
-
-    # Step 2: Look for _*-prefixed directories and their .tagset files
-    group_dirs = [
-        p for p in all_paths
-        if p.is_dir()
-        and p.name.startswith(IGNORE_PREFIX)
-        and not p.name.startswith(IGNORE_PREFIX * 2)  # <-- skip __dirs
-    ]
-
+    # Step 1: groups live at the top of the repo (that's where `org group`
+    # creates them and where bucketing puts their files), so one scandir
+    # of ROOT finds them all. We never walk the year/month folders.
+    with os.scandir(ROOT) as it:
+        group_dirs = sorted(
+            ROOT / entry.name
+            for entry in it
+            if is_group_dir_name(entry.name) and entry.is_dir()
+        )
+
+    # Step 2: Check for invalid paths with >1 _-prefixed directories
+    for dir_path in group_dirs:
+        for nested in find_nested_group_dirs(dir_path):
+            underscore_dirs = [
+                part for part in nested.relative_to(ROOT).parts
+                if is_group_dir_name(part)
+            ]
+            invalid.append((nested, "Multiple '_'-prefixed directories in path", underscore_dirs))
+
+    # Step 3: Look for .tagset files in the group dirs
     for dir_path in group_dirs:
         tagset_path = dir_path / ".tagset"
         if not tagset_path.exists():
@@ -106,13 +131,13 @@ def get_tagsets() -> dict[Path, list[str]]:
         except Exception as e:
             invalid.append((tagset_path, "Unreadable .tagset file", [str(e)]))
 
-    # Step 3: Detect tag clashes
+    # Step 4: Detect tag clashes
     for tag, dirs in tag_to_dirs.items():
         if len(dirs) > 1:
             detail = [f"{tag} in: {', '.join(str(d) for d in dirs)}"]
             invalid.append((None, "Tagset clash", detail))
 
-    # Step 4: Report and exit
+    # Step 5: Report and exit
     if invalid:
         print("\n[!] Tagset Errors Detected:\n")
         for path, kind, details in invalid:
@@ -163,58 +188,18 @@ def parse_metadata_value(value):
     return value
 
 def rebuild_line(row: dict, filetype: str) -> str:
-    prefix_map = {
-        ".td": "* t: ",
-        ".ev": "* e: ",
-    }
-    content_column = {
-        ".td": "todo",
-        ".ev": "event",
+    """
+    The line for a db row, written exactly the way validation writes it
+    (same properties, same order), so a file that's already in place
+    compares equal and isn't rewritten.
+    """
+    prefix, content_column = {
+        ".td": ("* t: ", "todo"),
+        ".ev": ("* e: ", "event"),
     }[filetype]
 
-    line = prefix_map[filetype] + row[content_column]
-
-    # IMPORTANT: filetype-specific meta keys
-    if filetype == ".td":
-        meta_prefix = {
-            "source": "$",
-            "status": "=",
-            "priority": "!",
-            "deadline": "%",
-            "creation": "~",
-            "tags": "#",
-            "assignees": "@",
-            "id": "id/",
-        }
-    else:  # ".ev"
-        meta_prefix = {
-            "start": ">",
-            "end": "<",
-            "pattern": "^",
-            "source": "$",
-            "status": "=",
-            "priority": "!",
-            "creation": "~",
-            "tags": "#",
-            "assignees": "@",
-            "id": "id/",
-        }
-
-    parts = []
-    for key, symbol in meta_prefix.items():
-        value = row.get(key)
-        if value is None:
-            continue
-        parsed = parse_metadata_value(value)
-        if isinstance(parsed, list):
-            parts.extend(f"{symbol}{v}" for v in parsed)
-        else:
-            parts.append(f"{symbol}{parsed}")
-
-    if parts:
-        line += " // " + " ".join(parts)
-
-    return line + "\n"
+    values = {key: parse_metadata_value(row.get(key)) for key in LINE_SYMBOLS}
+    return build_line(prefix, row[content_column], values) + "\n"
 
 def check_multiple_occurrence(tags, tagsets):
 
@@ -280,9 +265,11 @@ def bucket_lines(
     filetype: Literal[".td", ".ev"],
     tagsets,
     max_lines: int = 100,
-) -> tuple[dict[str, list[list[str]]], set]:
+) -> tuple[dict[str, list[list[tuple[str, str, str]]]], set]:
     """
     Rebuilds and buckets lines from DB rows by yyyy/mm and chunks them into lists of ≤ max_lines.
+
+    Each entry is (id, current path, line) so the plan can tell which rows move.
     """
     table = {
         ".td": "todos",
@@ -295,7 +282,7 @@ def bucket_lines(
     rows = c.fetchall()
     columns = [col[0] for col in c.description]
 
-    buckets: dict[str, list[str]] = defaultdict(list)
+    buckets: dict[str, list[tuple[str, str, str]]] = defaultdict(list)
 
     paths_to_delete = set()
     for r in rows:
@@ -330,7 +317,7 @@ def bucket_lines(
         line = rebuild_line(row, filetype)
 
         # put the line in its ctime bucket
-        buckets[key].append(line)
+        buckets[key].append((row["id"], row["path"], line))
 
     # Chunk each bucket based on maxlines
     # {
@@ -339,7 +326,7 @@ def bucket_lines(
     #       ["line 1", "line 2" ...] > up to max_lines
     #  ],
     # }
-    chunked_buckets: dict[str, list[list[str]]] = {}
+    chunked_buckets: dict[str, list[list[tuple[str, str, str]]]] = {}
     for key, lines in buckets.items():
         chunked_buckets[key] = [
             lines[i:i+max_lines] for i in range(0, len(lines), max_lines)
@@ -363,43 +350,59 @@ def bucket_files(c, filetype, tagsets):
             continue
             
         key = get_bucket_name(row, tagsets, filetype, mtime)
-        buckets[key].append(path)
+        # carry the whole row so process_files doesn't have to look it up again
+        buckets[key].append(row)
 
     return buckets
 
-def random_suffix(n: int) -> str:
-    chars = string.ascii_letters + string.digits
-    return ''.join(random.choice(chars) for _ in range(n))
-
-def get_unique_filename_random(
-    folder: Path,
-    base_name: str,
-    ext: str,
-    initial_len: int = 3,
-    max_attempts_per_len: int = 3,
-) -> Path:
+class NameAllocator:
     """
-    Try base_name.ext, then on collision:
-      • pick a random _<suffix> of length initial_len
-      • if you collide max_attempts_per_len times, bump suffix length by +1
-      • repeat until you find a free filename
+    Hands out free filenames for planned moves.
+
+    Each folder is listed once (first time it's asked about) and its names
+    are kept in a set that grows as names are handed out, so collisions
+    cost a set lookup instead of a stat. On collision the suffix is a
+    short hash of the note id, so re-running tidy picks the same name
+    every time instead of churning random suffixes.
     """
-    # 1) check no‑suffix first
-    candidate = folder / f"{base_name}{ext}"
-
-    if not candidate.exists():
-        return candidate
-
-    # 2) try random suffixes
-    suffix_len = initial_len
-    while True:
-        for _ in range(max_attempts_per_len):
-            suffix = random_suffix(suffix_len)
-            candidate = folder / f"{base_name}_{suffix}{ext}"
-            if not candidate.exists():
-                return candidate
-        # bump suffix length and retry
-        suffix_len += 1
+
+    MIN_SUFFIX_LEN = 4
+
+    def __init__(self) -> None:
+        self._names: dict[Path, set[str]] = {}
+
+    def names_in(self, folder: Path) -> set[str]:
+        names = self._names.get(folder)
+        if names is None:
+            try:
+                with os.scandir(folder) as it:
+                    names = {entry.name for entry in it}
+            except FileNotFoundError:
+                names = set()
+            self._names[folder] = names
+        return names
+
+    def allocate(self, folder: Path, base_name: str, ext: str, key: str) -> Path:
+        """
+        base_name.ext if it's free, else base_name_<hash of key>.ext
+        (lengthening the hash until it's free).
+        """
+        names = self.names_in(folder)
+
+        name = f"{base_name}{ext}"
+        if name in names:
+            digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+            n = self.MIN_SUFFIX_LEN
+            while True:
+                # past the full digest (only on absurd collisions), count up
+                suffix = digest[:n] if n <= len(digest) else f"{digest}{n - len(digest)}"
+                name = f"{base_name}_{suffix}{ext}"
+                if name not in names:
+                    break
+                n += 1
+
+        names.add(name)
+        return folder / name
 
 def atomic_move(src: Path, dst: Path) -> None:
     """
@@ -414,12 +417,22 @@ def atomic_move(src: Path, dst: Path) -> None:
         shutil.copy2(src, dst)
         os.unlink(src)
 
-def process_lines(bucket_chunks: dict[str, list[list[str]]], filetype: str, root_dir: Path):
+def process_lines(
+    bucket_chunks: dict[str, list[list[tuple[str, str, str]]]],
+    filetype: str,
+    root_dir: Path,
+) -> tuple[dict[Path, str], dict[str, str]]:
+    """
+    Work out the target layout without writing anything:
+      - final path -> the exact text it should hold
+      - row id -> new path, for rows whose file changes
+    """
     lookup = {
         ".td": "todos",
         ".ev": "events"
     }
-    written_temp_paths = {}
+    targets: dict[Path, str] = {}
+    moved_rows: dict[str, str] = {}
 
     for bucket, chunks in bucket_chunks.items():
 
@@ -428,45 +441,66 @@ def process_lines(bucket_chunks: dict[str, list[list[str]]], filetype: str, root
         else:
             year, month = bucket.split("/")
             folder = root_dir / year / month
-        folder.mkdir(parents=True, exist_ok=True)
 
         for i, chunk in enumerate(chunks):
             name = lookup[filetype]
             filename = f"{name}{filetype}" if i == 0 else f"{name}_{i}{filetype}"
-
             final_path = folder / filename
-            temp_path = final_path.with_suffix(final_path.suffix + ".tmp")
+            targets[final_path] = "".join(line for _id, _path, line in chunk)
+
+            for row_id, row_path, _line in chunk:
+                if row_path != str(final_path):
+                    moved_rows[row_id] = str(final_path)
 
-            temp_path.write_text("".join(chunk), encoding="utf-8")
-            written_temp_paths[temp_path] = final_path
+    return targets, moved_rows
 
-    return written_temp_paths
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
 
-def process_files(file_type, buckets, max_lines):
+def is_unchanged(path: Path, text: str) -> bool:
+    data = text.encode("utf-8")
+    try:
+        if path.stat().st_size != len(data):
+            return False
+        return content_hash(path.read_bytes()) == content_hash(data)
+    except FileNotFoundError:
+        return False
+
+def diff_line_files(targets: dict[Path, str], sources: set[Path]) -> tuple[dict[Path, str], list[Path]]:
+    """
+    Compare the target layout with what's on disk.
+
+    Files whose content already matches are left out (they keep their
+    mtime, so validation doesn't recheck them); sources that aren't
+    targets any more are to be deleted.
+    """
+    writes = {p: text for p, text in targets.items() if not is_unchanged(ROOT / p, text)}
+    keep = {(ROOT / p).resolve() for p in targets}
+    deletes = sorted(p for p in sources if (ROOT / p).resolve() not in keep)
+    return writes, deletes
+
+def process_files(file_type, buckets, max_lines, names: NameAllocator) -> list[tuple[Path, Path]]:
+    """
+    Plan (src, dst) moves for files that aren't where they belong.
+    Nothing is moved here; `names` keeps track of which names the
+    planned moves have already claimed.
+    """
+    moves: list[tuple[Path, Path]] = []
 
     for bucket, files in buckets.items():
         folder = Path(bucket)
-        # TODO: if folder isn't used in the end - then what?
-        # delete empty dirs somewhere? or don't create redundant ones
-        folder.mkdir(parents=True, exist_ok=True)
+        folder_resolved = folder.resolve()
 
         all_lines = []
-        for f in files:
+        for row in files:
+            f = Path(row["path"])
             if f.suffix.lower() != file_type:
                 continue
 
             if file_type == ".txt":
 
-                # Get title from DB
-                c = sqlite3.connect(".org.db")
-                c.row_factory = sqlite3.Row  # Optional, if you prefer dict-style access
-
-                row = c.execute(
-                    "SELECT title FROM notes WHERE path = ? AND valid = 1",
-                    (str(f),)
-                ).fetchone()
-
-                if not row:
+                # title comes from the row bucket_files already fetched
+                if not row.get("valid") or row.get("title") is None:
                     print("info", f"tidy is ignoring: {f}")
                     continue
 
@@ -485,7 +519,7 @@ def process_files(file_type, buckets, max_lines):
             pattern = re.compile(rf'^{re.escape(safe)}(?:_[A-Za-z0-9]+)?{re.escape(f.suffix)}$')
 
             # if the parent folder and the destination bucket are the same
-            if f.parent.resolve() == folder.resolve():
+            if f.parent.resolve() == folder_resolved:
 
                 # and if the filename matches the desired path pattern (safe + possible pattern + ext)
                 # (including cases where the filename has a _random suffix)
@@ -520,60 +554,322 @@ def process_files(file_type, buckets, max_lines):
                     # we want to allow _random to be whatever, and only trigger changes
                     # when whatever is BEFORE _random does not match
 
-            # move to a unique filename, with random suffix on collision
-            new_path = get_unique_filename_random(folder, safe, f.suffix)
-            atomic_move(Path(f), Path(new_path))
-            print(f"Moved {f} → {new_path}")
+            # move to a unique filename, with a stable suffix on collision
+            key = str(row.get("id") or f)
+            new_path = names.allocate(folder, safe, f.suffix, key)
+            moves.append((f, new_path))
 
-        if False:
-            process_lines(folder, all_lines)
+    return moves
 
-def main():
-    max_lines = 100
-    consolidate = True
+# --- plan / apply ------------------------------------------------------------
+#
+# tidy first builds a complete TidyPlan from the db (cheap, nothing on disk
+# changes), and `org tidy --plan` stops there. Applying it writes the plan
+# to JOURNAL first; every step after that is idempotent, so if we die
+# halfway the next org run just replays the journal (recover_journal).
+#
+# The plan keeps the content hash every file it touches had when it was
+# made. Nothing is applied (or replayed) unless each of those files is
+# still as planned or already as the plan leaves it, so a file edited in
+# between is never overwritten, moved or deleted.
 
+JOURNAL = ".org.tidy.journal"
+
+class TidyError(Exception):
+    pass
+
+class PlanConflict(TidyError):
+    pass
+
+def file_hash(path: Path) -> str | None:
+    try:
+        return content_hash(path.read_bytes())
+    except FileNotFoundError:
+        return None
+
+@dataclass
+class TidyPlan:
+    moves: list[tuple[Path, Path]] = field(default_factory=list)    # notes: src -> dst
+    writes: dict[Path, str] = field(default_factory=dict)           # .td/.ev: path -> full text
+    deletes: list[Path] = field(default_factory=list)               # .td/.ev no longer needed
+    todo_paths: dict[str, str] = field(default_factory=dict)        # todo id -> new path
+    event_paths: dict[str, str] = field(default_factory=dict)       # event id -> new path
+    before: dict[Path, str | None] = field(default_factory=dict)    # touched file -> hash when planned (None: absent)
+
+    def is_empty(self) -> bool:
+        return not (self.moves or self.writes or self.deletes or self.todo_paths or self.event_paths)
+
+    def record_before(self) -> None:
+        touched = [p for move in self.moves for p in move] + list(self.writes) + self.deletes
+        self.before = {p: file_hash(ROOT / p) for p in touched}
+
+    def changed_since(self) -> list[Path]:
+        """
+        Files that are neither as they were when the plan was made nor as
+        applying it leaves them: something else changed them since.
+        """
+        changed: list[Path] = []
+        for src, dst in self.moves:
+            now_src, now_dst = file_hash(ROOT / src), file_hash(ROOT / dst)
+            if now_src is not None:
+                ok = now_src == self.before.get(src) and now_dst is None
+            else:
+                ok = now_dst is not None and now_dst == self.before.get(src)
+            if not ok:
+                changed.append(src)
+        for p, text in self.writes.items():
+            if file_hash(ROOT / p) not in (self.before.get(p), content_hash(text.encode("utf-8"))):
+                changed.append(p)
+        for p in self.deletes:
+            if file_hash(ROOT / p) not in (self.before.get(p), None):
+                changed.append(p)
+        return changed
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "version": 2,
+            "moves": [[str(src), str(dst)] for src, dst in self.moves],
+            "writes": {str(p): text for p, text in self.writes.items()},
+            "deletes": [str(p) for p in self.deletes],
+            "todo_paths": self.todo_paths,
+            "event_paths": self.event_paths,
+            "before": {str(p): h for p, h in self.before.items()},
+        }, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "TidyPlan":
+        data = json.loads(raw)
+        if data.get("version") != 2:
+            raise ValueError(f"unknown journal version: {data.get('version')}")
+        return cls(
+            moves=[(Path(src), Path(dst)) for src, dst in data["moves"]],
+            writes={Path(p): text for p, text in data["writes"].items()},
+            deletes=[Path(p) for p in data["deletes"]],
+            todo_paths=dict(data["todo_paths"]),
+            event_paths=dict(data["event_paths"]),
+            before={Path(p): h for p, h in data["before"].items()},
+        )
+
+def build_plan(c: sqlite3.Cursor, max_lines: int = 100, consolidate: bool = True) -> TidyPlan:
     tagsets: dict[Path, list] = {}
     tagsets = get_tagsets()
 
-    conn = sqlite3.connect('.org.db', isolation_level=None)
-    c    = conn.cursor()
+    plan = TidyPlan()
+    names = NameAllocator()
 
-    # 2) bucket them by year/month
+    # bucket them by year/month
     file_buckets = bucket_files(c, ".txt", tagsets)
     log("info", f"here are the file buckets: {file_buckets}")
-    td_line_buckets, td_paths_to_delete = bucket_lines(c, ".td", tagsets, max_lines)
-    ev_line_buckets, ev_paths_to_delete = bucket_lines(c, ".ev", tagsets, max_lines)
-
-    # 3) process each filetype separately
-    process_files(".txt", file_buckets, max_lines)
+    plan.moves += process_files(".txt", file_buckets, max_lines, names)
 
     # TODO: consolidate flag allows the user to choose
     # whether they want their todos and ev files
     # consolidated by ctime, or treated the same way
     # as notes (organised by mtime)
     if consolidate:
+        for filetype, row_paths in ((".td", plan.todo_paths), (".ev", plan.event_paths)):
+            line_buckets, sources = bucket_lines(c, filetype, tagsets, max_lines)
+            targets, moved_rows = process_lines(line_buckets, filetype, Path())
+            writes, deletes = diff_line_files(targets, sources)
+            plan.writes.update(writes)
+            plan.deletes += deletes
+            row_paths.update(moved_rows)
+            log("info", f"tidy {filetype}: {len(targets)} target files, {len(writes)} to rewrite, {len(deletes)} to remove")
 
-        td_temp_paths = process_lines(td_line_buckets, ".td", ROOT)
-        for tdp in td_paths_to_delete:
-            try:
-                tdp.unlink()
-            except FileNotFoundError:
-                pass
-        for tdtmp, tdfinal in td_temp_paths.items():
-            tdtmp.replace(tdfinal)
+    else:
+        plan.moves += process_files(".td", file_buckets, max_lines, names)
+        plan.moves += process_files(".ev", file_buckets, max_lines, names)
+
+    plan.record_before()
+    return plan
+
+def print_plan(plan: TidyPlan) -> None:
+    if plan.is_empty():
+        print("tidy: nothing to do")
+        return
+
+    n_rows = len(plan.todo_paths) + len(plan.event_paths)
+    print(
+        f"tidy plan: {len(plan.moves)} move(s), {len(plan.writes)} rewrite(s), "
+        f"{len(plan.deletes)} delete(s), {n_rows} todo/event row(s) changing file"
+    )
+    for src, dst in plan.moves:
+        print(f"  move    {src} → {dst}")
+    for p, text in plan.writes.items():
+        state = "rewrite" if (ROOT / p).exists() else "create "
+        print(f"  {state} {p} ({text.count(chr(10))} lines)")
+    for p in plan.deletes:
+        print(f"  delete  {p}")
+
+def _fsync_dir(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
 
-        ev_temp_paths = process_lines(ev_line_buckets, ".ev", ROOT)
-        for evp in ev_paths_to_delete:
+def write_journal(plan: TidyPlan) -> Path:
+    """
+    The journal only appears under its real name once it's complete and
+    on disk, so a journal that exists can always be replayed.
+    """
+    journal = ROOT / JOURNAL
+    tmp = journal.with_name(journal.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        f.write(plan.to_json())
+        f.flush()
+        os.fsync(f.fileno())
+    tmp.replace(journal)
+    _fsync_dir(ROOT)
+    return journal
+
+def apply_plan(plan: TidyPlan, conn: sqlite3.Connection) -> None:
+    """
+    Carry out a plan. Every step is safe to repeat, which is what makes
+    replaying a journal after a crash work.
+
+    Raises PlanConflict, having changed nothing, if a file the plan
+    touches changed since it was made, and TidyError if the db can't be
+    repointed once the files are in place (the journal then stays, to be
+    replayed).
+    """
+    changed = plan.changed_since()
+    if changed:
+        listed = "\n".join(f"  {p}" for p in changed)
+        raise PlanConflict(f"These files changed since the tidy was planned, so nothing was done:\n{listed}")
+
+    # 1. notes; moves that happened now or on a previous attempt both get
+    # their db row repointed in step 3
+    moved: list[tuple[Path, Path]] = []
+    for src, dst in plan.moves:
+        full_src, full_dst = ROOT / src, ROOT / dst
+        if not full_src.exists():
+            # already moved on a previous attempt
+            moved.append((src, dst))
+            continue
+        full_dst.parent.mkdir(parents=True, exist_ok=True)
+        atomic_move(full_src, full_dst)
+        moved.append((src, dst))
+        print(f"Moved {src} → {dst}")
+
+    # 2. .td/.ev: write new content before deleting anything, so an
+    # interrupted run can leave a line in two files but never in none
+    for p, text in plan.writes.items():
+        final_path = ROOT / p
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = final_path.with_suffix(final_path.suffix + ".tmp")
+        temp_path.write_text(text, encoding="utf-8")
+        temp_path.replace(final_path)
+
+    for p in plan.deletes:
+        try:
+            (ROOT / p).unlink()
+        except FileNotFoundError:
+            pass
+
+    # 3. point the db at the new paths so validation doesn't see every
+    # moved row as a deleted file plus a new one
+    c = conn.cursor()
+    c.execute("BEGIN")
+    try:
+        c.executemany(
+            "UPDATE notes SET path = ? WHERE path = ?",
+            [(str(dst), str(src)) for src, dst in moved],
+        )
+        c.executemany("UPDATE todos SET path = ? WHERE id = ?", [(p, i) for i, p in plan.todo_paths.items()])
+        c.executemany("UPDATE events SET path = ? WHERE id = ?", [(p, i) for i, p in plan.event_paths.items()])
+        c.executemany("DELETE FROM files WHERE path = ?", [(str(p),) for p in plan.deletes])
+        c.execute("COMMIT")
+    except sqlite3.Error as e:
+        # the files are already where the plan puts them; the journal is
+        # kept, so the next run replays it (all done bar this step)
+        c.execute("ROLLBACK")
+        raise TidyError(
+            f"tidy moved the files but couldn't update .org.db ({e}); "
+            f"it will try again on the next org command"
+        ) from e
+    except BaseException:
+        c.execute("ROLLBACK")
+        raise
+
+def recover_journal() -> bool:
+    """
+    Called at startup: finish a tidy that was interrupted.
+
+    A complete journal is replayed, unless a file it touches was changed
+    since (see TidyPlan.changed_since) or it can't be read: then nothing
+    is touched and TidyError says what to check. A half-written one means
+    nothing had been applied yet (the journal is complete before the
+    first change), so rolling back is just discarding it.
+    """
+    journal = ROOT / JOURNAL
+    partial = journal.with_name(journal.name + ".tmp")
+    if not journal.exists() and not partial.exists():
+        return False
+
+    with workspace_lock().hold(EXCLUSIVE):
+        if journal.exists():
+            try:
+                plan = TidyPlan.from_json(journal.read_text(encoding="utf-8"))
+            except Exception as e:
+                raise TidyError(
+                    f"An interrupted 'org tidy' left {JOURNAL}, but it can't be read ({e}). "
+                    f"Check the workspace, then delete {JOURNAL}."
+                ) from e
+
+            print("Finishing an interrupted 'org tidy'...")
+            conn = sqlite3.connect('.org.db', isolation_level=None)
+            try:
+                apply_plan(plan, conn)
+            except TidyError as e:
+                raise TidyError(
+                    f"Couldn't finish an interrupted 'org tidy': {e}\n"
+                    f"Check those files, then delete {JOURNAL}."
+                ) from e
+            finally:
+                conn.close()
+
+        for p in (journal, partial):
             try:
-                evp.unlink()
+                p.unlink()
             except FileNotFoundError:
                 pass
-        for evtmp, evfinal in ev_temp_paths.items():
-            evtmp.replace(evfinal)
 
-    else:
-        process_files(".td",  file_buckets, max_lines)
-        process_files(".ev",  file_buckets, max_lines)
+    return True
+
+def main(plan_only: bool = False):
+    with workspace_lock().hold(EXCLUSIVE):
+        _tidy(plan_only)
+
+def _tidy(plan_only: bool = False):
+    max_lines = 100
+    consolidate = True
+
+    conn = sqlite3.connect('.org.db', isolation_level=None)
+    c    = conn.cursor()
+
+    plan = build_plan(c, max_lines, consolidate)
+
+    if plan_only:
+        print_plan(plan)
+        return
+
+    if plan.is_empty():
+        return
+
+    journal = write_journal(plan)
+    try:
+        apply_plan(plan, conn)
+    except PlanConflict:
+        # nothing applied, so nothing to replay
+        journal.unlink()
+        raise
+    journal.unlink()
 
 if __name__ == "__main__":
     main()
@@ -1,36 +1,21 @@
 #!/usr/bin/env python3
 from __future__ import annotations
-import json
 import random
 from shutil import get_terminal_size
 from datetime import date
 from datetime import datetime, date
-from .system.cli_helpers import flow_line, effective_priority_asof
+from .system.cli_helpers import flow_line, norm_tag
+from .system.snapshot import load_todo_records
 
-def cmd_todos(c, *args, heading=True, from_report: bool = False, as_of: date | datetime | None = None):
+def cmd_todos(c, *args, heading=True, from_report: bool = False, as_of: date | datetime | None = None, snapshot=None):
 
     # ----------------------------
-    # Tag normalisation + rules
+    # Tag rules
     # ----------------------------
-    def norm_tag(t: str) -> str:
-        return t.strip().lstrip("#").strip().lower()
-
     def is_project_tags(tags: list[str]) -> bool:
         """Project todo = any non-general tag."""
         return any(t != "general" for t in tags)
 
-    def parse_creation(s: str) -> datetime | None:
-        """
-        Your creation is typically like: YYYYMMDDTHHMMSS
-        Return None if it can't be parsed.
-        """
-        if not s:
-            return None
-        try:
-            return datetime.strptime(s, "%Y%m%dT%H%M%S")
-        except Exception:
-            return None
-
     # ----------------------------
     # Parse args
     # ----------------------------
@@ -90,12 +75,11 @@ def cmd_todos(c, *args, heading=True, from_report: bool = False, as_of: date | d
     # ----------------------------
     # Fetch
     # ----------------------------
-    rows = c.execute("""
-        SELECT todo, path, status, tags, priority, creation, deadline
-          FROM all_todos
-         WHERE valid = 1
-         ORDER BY priority ASC, creation DESC, tags ASC
-    """).fetchall()
+    # tags come normalised, effective priorities precomputed in report mode
+    if snapshot is not None:
+        records = snapshot.todos
+    else:
+        records = load_todo_records(c, as_of=(as_of or date.today()) if from_report else None)
 
     # Your existing “defaults” behaviour
     lift_defaults = (not from_report) and any([
@@ -116,12 +100,8 @@ def cmd_todos(c, *args, heading=True, from_report: bool = False, as_of: date | d
     pool3: list[tuple[str, str, list[str], int, datetime | None]] = []
     pool4: list[tuple[str, str, list[str], int, datetime | None]] = []
 
-    for row in rows:
-        # parse + normalise tags
-        raw_tags = json.loads(row["tags"]) if row["tags"] else []
-        raw_tags = [t for t in raw_tags if isinstance(t, str)]
-        row_tags = [norm_tag(t) for t in raw_tags]
-        row_tags = [t for t in row_tags if t]  # drop blanks
+    for rec in records:
+        row_tags = rec.tags
 
         # explicit exclusions (still supported)
         if exclude_tags and any(t in exclude_tags for t in row_tags):
@@ -131,7 +111,7 @@ def cmd_todos(c, *args, heading=True, from_report: bool = False, as_of: date | d
         if tag_filter is not None and tag_filter not in row_tags:
             continue
 
-        status = (row["status"] or "").strip().lower()
+        status = rec.status
 
         # If user explicitly asked for statuses, honour that
         if status_filter is not None:
@@ -148,19 +128,12 @@ def cmd_todos(c, *args, heading=True, from_report: bool = False, as_of: date | d
                 if not lift_defaults:
                     if status not in DEFAULT_STATUSES:
                         continue
-        try:
-            prio_stored = int(row["priority"])
-        except Exception:
+        prio_stored = rec.priority
+        if prio_stored is None:
             continue
 
-        # compute effective priority only for report mode
-        prio_eff = prio_stored
-        if from_report:
-            prio_eff = effective_priority_asof(
-                priority=prio_stored,
-                deadline=row["deadline"],
-                as_of=(as_of or date.today()),
-            )
+        # effective priority only for report mode
+        prio_eff = rec.effective if from_report else prio_stored
 
         # user filters should apply to effective priority in report mode
         prio_for_filter = prio_eff if from_report else prio_stored
@@ -173,7 +146,7 @@ def cmd_todos(c, *args, heading=True, from_report: bool = False, as_of: date | d
         # I’d suggest printing effective during report so the output matches filtering.
         prio_for_print = prio_eff if from_report else prio_stored
 
-        items.append((row["todo"], row["path"], row_tags, prio_for_print))
+        items.append((rec.todo, rec.path, list(row_tags), prio_for_print))
 
     # Random subset if requested (unchanged)
     if limit_random is not None and limit_random < len(items):
@@ -193,11 +166,8 @@ def cmd_todos(c, *args, heading=True, from_report: bool = False, as_of: date | d
     # - still require status=todo
     # - for !3: apply the same non-project rule as TODOS
     # - for !4: DO NOT apply the non-project rule (so it actually shows up)
-    for row in rows:
-        raw_tags = json.loads(row["tags"]) if row["tags"] else []
-        raw_tags = [t for t in raw_tags if isinstance(t, str)]
-        row_tags = [norm_tag(t) for t in raw_tags]
-        row_tags = [t for t in row_tags if t]
+    for rec in records:
+        row_tags = list(rec.tags)
 
         if exclude_tags and any(t in exclude_tags for t in row_tags):
             continue
@@ -206,26 +176,23 @@ def cmd_todos(c, *args, heading=True, from_report: bool = False, as_of: date | d
         if tag_filter is not None and tag_filter not in row_tags:
             continue
 
-        status = (row["status"] or "").strip().lower()
-        if status != "todo":
+        if rec.status != "todo":
             continue
 
-        try:
-            prio = int(row["priority"])
-        except Exception:
+        prio = rec.priority
+        if prio is None:
             continue
 
         # Only enforce "non-project" for prio 3
         if prio == 3 and is_project_tags(row_tags):
             continue
 
-        created = parse_creation(row["creation"]) if isinstance(row["creation"], str) else None
-        rec = (row["todo"], row["path"], row_tags, prio, created)
+        pooled = (rec.todo, rec.path, row_tags, prio, rec.created)
 
         if prio == 3:
-            pool3.append(rec)
+            pool3.append(pooled)
         elif prio == 4:
-            pool4.append(rec)
+            pool4.append(pooled)
 
     def print_tail_heading(label: str) -> None:
         # simple blank line before tail block (keeps it visually separate)
@@ -2,9 +2,12 @@
 from __future__ import annotations
 import sys
 import os
+import atexit
 import sqlite3
 import json
 import copy
+import io
+import contextlib
 import re
 import calendar
 import typing as tp
@@ -12,13 +15,17 @@ from datetime import date
 from datetime import datetime, timedelta, time, date as _date
 from pathlib import Path
 from . import init
-from .commands.system.publish import publish_site
+from .orglock import workspace_lock, LockTimeout, SHARED, EXCLUSIVE
+from .commands.system.publish import cmd_publish, maybe_auto_publish
 from .commands.todos import cmd_todos
 from .commands.notes import cmd_notes
 from .commands.events import cmd_events
+from .commands.agenda import cmd_agenda
+from .commands.export import cmd_export
+from .commands.forecast import cmd_forecast
 from .commands.report import cmd_report2
 from .commands.system.projects import cmd_projects
-from .commands.system.cli_helpers import flow_line, generate_instances_for_date, parse_pattern, iter_tree_paths, get_report_date, cmd_calendar, cmd_routines_today
+from .commands.system.cli_helpers import flow_line, norm_tag, generate_instances_for_date, parse_pattern, iter_tree_paths, get_report_date, cmd_calendar, cmd_routines_today
 
 # --- see if this works ---
 
@@ -156,9 +163,31 @@ def get_db(db_paths=None, union_views: bool = True):
         make_union_view(
             "all_notes",
             "notes",
-            "path, authour, creation, title, tags, valid"
+            "id, path, authour, creation, title, tags, valid"
         )
 
+        # a row per (note, normalised tag), see validate._migrate_note_tags;
+        # a collab db an older org wrote has no note_tags, so walk its JSON
+        # tags there instead (unindexed, but the same rows)
+        conn.create_function("org_norm_tag", 1, lambda t: norm_tag(t) if isinstance(t, str) else None, deterministic=True)
+        selects = []
+        for db_name, db_file in dbs:
+            src_root = str(Path(db_file).resolve().parent)
+            has_table = cur.execute(
+                f"SELECT 1 FROM {db_name}.sqlite_master WHERE type = 'table' AND name = 'note_tags'"
+            ).fetchone()
+            if has_table:
+                selects.append(f"SELECT '{src_root}' AS src_root, note_id, tag FROM {db_name}.note_tags")
+            else:
+                selects.append(
+                    f"SELECT DISTINCT '{src_root}' AS src_root, n.id AS note_id, org_norm_tag(j.value) AS tag "
+                    f"FROM {db_name}.notes AS n, "
+                    "json_each(CASE WHEN json_valid(n.tags) AND json_type(n.tags) = 'array' THEN n.tags ELSE '[]' END) AS j "
+                    "WHERE j.type = 'text'"
+                )
+        cur.execute("DROP VIEW IF EXISTS all_note_tags")
+        cur.execute("CREATE TEMP VIEW all_note_tags AS " + " UNION ALL ".join(selects))
+
         # You can leave these without src_root if you don’t need it elsewhere.
         # (Or add src_root to them too if you want.)
         selects = []
@@ -169,14 +198,46 @@ def get_db(db_paths=None, union_views: bool = True):
         cur.execute("DROP VIEW IF EXISTS all_todos")
         cur.execute("CREATE TEMP VIEW all_todos AS " + " UNION ALL ".join(selects))
 
+        # start_key/has_pattern come from validation (see validate._migrate_event_keys);
+        # a collab db an older org wrote doesn't have them yet, so derive
+        # the same values there (unindexed, but correct)
+        legacy_keys = (
+            "substr(start, 1, 4) || '-' || substr(start, 5, 2) || '-' || substr(start, 7, 2) || 'T' || "
+            "CASE WHEN length(start) > 8 "
+            "THEN substr(start, 10, 2) || ':' || substr(start, 12, 2) || ':' || "
+            "CASE WHEN length(start) > 13 THEN substr(start, 14, 2) ELSE '00' END "
+            "ELSE '00:00:00' END AS start_key, "
+            "(pattern IS NOT NULL AND pattern != '') AS has_pattern"
+        )
         selects = []
         for db_name, _db_file in dbs:
+            cols = {r[1] for r in cur.execute(f"PRAGMA {db_name}.table_info(events)")}
+            keys = "start_key, has_pattern" if {"start_key", "has_pattern"} <= cols else legacy_keys
             selects.append(
-                f"SELECT event, start, pattern, tags, priority, path, status, creation, valid FROM {db_name}.events"
+                f"SELECT id, event, start, end, pattern, tags, priority, path, status, creation, valid, {keys} FROM {db_name}.events"
             )
         cur.execute("DROP VIEW IF EXISTS all_events")
         cur.execute("CREATE TEMP VIEW all_events AS " + " UNION ALL ".join(selects))
 
+        # materialised instances (see commands/system/occurrences.py), from
+        # the dbs that have them; occurrences_between checks coverage
+        selects = []
+        for db_name, _db_file in dbs:
+            has_table = cur.execute(
+                f"SELECT 1 FROM {db_name}.sqlite_master WHERE type = 'table' AND name = 'event_occurrences'"
+            ).fetchone()
+            if not has_table:
+                continue
+            selects.append(
+                "SELECT o.start AS occ_start, o.end AS occ_end, "
+                "e.event, e.start, e.end, e.pattern, e.tags, e.priority, e.path, e.status, e.creation, e.valid "
+                f"FROM {db_name}.event_occurrences AS o JOIN {db_name}.events AS e ON e.id = o.event_id "
+                "WHERE e.valid = 1"
+            )
+        cur.execute("DROP VIEW IF EXISTS all_event_occurrences")
+        if selects:
+            cur.execute("CREATE TEMP VIEW all_event_occurrences AS " + " UNION ALL ".join(selects))
+
     return conn
 
 # Pattern parsing and instance generation (adapted from old functions)
@@ -194,17 +255,21 @@ def cmd_report(c, *args):
     5) SPECIALS: unchanged (still respects .special_focus when from_report=True)
     """
     from pathlib import Path
+    from .commands.system.snapshot import load_report_snapshot
 
     report_day, rest = get_report_date(list(args))
 
+    # events, todos and the hierarchy are loaded once and shared by every section
+    snapshot = load_report_snapshot(c, report_day, days=7, tree=load_project_hierarchy(Path(".project_hierarchy")))
+    tree = snapshot.tree
+
     # 1) Calendar events (no pattern): today + upcoming week
-    cmd_calendar(c, days=7, base_date=report_day)
+    cmd_calendar(c, days=7, base_date=report_day, snapshot=snapshot)
 
     # 2) Routines (patterned events): today only
-    cmd_routines_today(c, base_date=report_day)
+    cmd_routines_today(c, base_date=report_day, snapshot=snapshot)
 
     # 3) Plain prio 1–2 todos excluding project tags from hierarchy
-    tree = load_project_hierarchy(Path(".project_hierarchy"))
 
     def clean_hier_tag(t: str) -> str:
         t = (t or "").strip()
@@ -219,10 +284,10 @@ def cmd_report(c, *args):
     if hier_project_tags:
         todo_args.append(f"-notag={','.join(sorted(hier_project_tags))}")
 
-    cmd_todos(c, *todo_args, heading=True, from_report=True, as_of=report_day)
+    cmd_todos(c, *todo_args, heading=True, from_report=True, as_of=report_day, snapshot=snapshot)
 
     # 4) Project-view prio 1–2 todos
-    cmd_projects(c, tree, as_of=report_day)
+    cmd_projects(c, tree, as_of=report_day, snapshot=snapshot)
 
 def cmd_old(c):
     print("`fold` now runs on the filesystem—SQL index not involved.")
@@ -337,11 +402,20 @@ def cmd_tags(c):
             f"{r['total_cnt']}"
         )
 
-def cmd_tidy(c):
+def cmd_tidy(c, *args):
+    """
+    org tidy          reorganise the workspace
+    org tidy --plan   only print what tidy would move/rewrite/delete
+    """
     from .commands.tidy import main as tidy_main
     from .validate import main as validate_main, SCHEMA
     from .my_logger import log
 
+    plan_only = "--plan" in args
+    unknown = [a for a in args if a != "--plan"]
+    if unknown:
+        sys.exit(f"Unknown option(s) for tidy: {' '.join(unknown)}\nUsage: org tidy [--plan]")
+
     errors_file = Path("org_errors")
 
     # brief note on why thisis necessary:
@@ -354,11 +428,13 @@ def cmd_tidy(c):
     if errors_file.exists():
         sys.exit("You have errors in your repo (outlined in 'org_errors'). Please resolve these before running 'org tidy'")
 
-    # 2) tidy (moves/renames files, updates DB)
-    tidy_main()
+    # 2) tidy (moves/renames files, updates DB paths)
+    tidy_main(plan_only=plan_only)
+    if plan_only:
+        return
     log("info", "tidying done?")
 
-    # 3) final in‑process validation
+    # 3) final in‑process validation (only picks up the rewritten files)
     validate_main(copy.deepcopy(SCHEMA))
 
 def cmd_init(c):
@@ -439,9 +515,6 @@ def cmd_special_tags(c, *args, from_report: bool = False):
     from pathlib import Path
     from shutil import get_terminal_size
 
-    def norm_tag(t: str) -> str:
-        return t.strip().lstrip("#").strip().lower()
-
     def clean_hierarchy_tag(raw: str) -> str:
         """
         Remove trailing '*' marker if present.
@@ -653,19 +726,68 @@ def setup_collaboration(c):
 
 # -------------------- Main ---------------------------------------------------
 
+# commands that write to the workspace hold the lock exclusively for their
+# whole run; everything else only reads, and shares it while it does
+EXCLUSIVE_COMMANDS = {"init", "collab", "todo", "event", "tidy", "group"}
+
+# read commands that take the lock themselves, only around their reads:
+# report2 waits on the user in between, publish renders for a long time
+SELF_LOCKING_COMMANDS = {"report2", "publish"}
+
+def run_read_command(handler, c, args) -> None:
+    """
+    Run a read-only command under a shared lock with its output held back
+    until the lock is released, so a slow reader on the other end of a
+    pipe (a pager) can't keep validation or tidy waiting.
+    """
+    raw = io.BytesIO()
+    out = io.TextIOWrapper(raw, encoding=sys.stdout.encoding, errors=sys.stdout.errors)
+    try:
+        with workspace_lock().hold(SHARED), contextlib.redirect_stdout(out):
+            handler(c, *args)
+    finally:
+        out.flush()
+        sys.stdout.flush()
+        sys.stdout.buffer.write(raw.getvalue())
+        sys.stdout.flush()
+
 def main():
     arg_init = len(sys.argv) > 1 and sys.argv[1] == "init"
     root = init.handle_init(arg_init)
     os.chdir(root)
 
     from .validate import main as validate_main, SCHEMA
+    from .commands.tidy import recover_journal, TidyError
+
+    cmd = sys.argv[1] if len(sys.argv) > 1 else None
+
+    # the detached publish started by auto_publish/--background: whatever
+    # spawned it has just validated, so it leaves the journal, validation
+    # and the foreground command's log alone
+    detached_publish = cmd == "publish" and "--detached" in sys.argv[2:]
 
     # reset log if you want
     log_file = Path(".org.log")
-    if log_file.exists():
+    if log_file.exists() and not detached_publish:
         log_file.unlink()
 
-    validate_main(copy.deepcopy(SCHEMA))
+    # writers hold it until the process exits (the kernel drops it if we
+    # crash); readers take it shared around their reads only, and
+    # validation goes exclusive itself only if something changed
+    try:
+        if cmd in EXCLUSIVE_COMMANDS:
+            workspace_lock().acquire(EXCLUSIVE)
+            # released (and the holder record cleared) on a normal exit too
+            atexit.register(workspace_lock().release)
+
+        if not detached_publish:
+            # finish (or roll back) a tidy that died halfway before anything
+            # reads the workspace
+            recover_journal()
+
+            validate_main(copy.deepcopy(SCHEMA))
+    except (LockTimeout, TidyError) as e:
+        sys.exit(str(e))
     errors_file = Path("org_errors")
     if errors_file.exists():
         sys.exit("You have errors in your repo (outlined in 'org_errors'). Please resolve these before running any commands")
@@ -740,9 +862,6 @@ def main():
     conn.row_factory = sqlite3.Row
     c = conn.cursor()
 
-    # If you want publishing every run:
-    publish_site(repo_root=Path.cwd(), conn=conn, debug=False)
-
     cmd, *args = sys.argv[1:]
     dispatch = {
         "init":   cmd_init,
@@ -751,8 +870,11 @@ def main():
         "notes":  cmd_notes,
         "todos":  cmd_todos,
         "events": cmd_events,
+        "agenda": cmd_agenda,
+        "export": cmd_export,
         "report": cmd_report,
         "report2": cmd_report2,
+        "forecast": cmd_forecast,
         "tags":   cmd_tags,
         "specials": cmd_special_tags,
 
@@ -761,6 +883,7 @@ def main():
 
         "tidy":   cmd_tidy,
         "group":  cmd_group,
+        "publish": cmd_publish,
 
         "ym":     yo_mama,  # keep ONLY one yo_mama (remove the import OR rename)
         "fold":   cmd_old,
@@ -771,7 +894,18 @@ def main():
         print(f"Unknown command: {cmd}")
         sys.exit(1)
 
-    handler(c, *args)
+    try:
+        if cmd in EXCLUSIVE_COMMANDS or cmd in SELF_LOCKING_COMMANDS:
+            handler(c, *args)
+        else:
+            run_read_command(handler, c, args)
+    except (LockTimeout, TidyError) as e:
+        sys.exit(str(e))
+
+    # never render in the foreground; with "auto_publish" on and something
+    # to publish, hand it to a detached `org publish`
+    if cmd != "publish":
+        maybe_auto_publish(conn)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,258 @@
+import os
+import sys
+import json
+import time
+import typing as tp
+from pathlib import Path
+from contextlib import contextmanager
+from datetime import datetime
+from .my_logger import log
+
+try:
+    import fcntl
+except ImportError:  # non-posix: see _acquire_fallback
+    fcntl = None
+
+LOCK_NAME = ".org.lock"
+SHARED = "shared"
+EXCLUSIVE = "exclusive"
+
+DEFAULT_TIMEOUT = 30.0   # seconds; override with "lock_timeout" in .config.json
+POLL_INTERVAL = 0.1
+STALE_AFTER = 10 * 60    # seconds; only used by the no-fcntl fallback
+
+
+class LockTimeout(Exception):
+    pass
+
+
+def _config_timeout(root: Path) -> float:
+    cfg_path = root / ".config.json"
+    try:
+        cfg = json.loads(cfg_path.read_text(encoding="utf-8"))
+        value = float(cfg.get("lock_timeout", DEFAULT_TIMEOUT))
+    except Exception:
+        return DEFAULT_TIMEOUT
+    return max(0.0, value)
+
+
+def _pid_alive(pid) -> bool:
+    if not isinstance(pid, int):
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:  # exists, just not ours to signal
+        return True
+    return True
+
+
+class WorkspaceLock:
+    """
+    Shared/exclusive lock over a whole workspace, backed by a lock file
+    in the workspace root.
+
+    Read-only commands hold it shared while they read. Anything that
+    rewrites files or the db (validation when something changed, tidy,
+    report2 write-back) holds it exclusive.
+
+    Uses flock(2), so a lock held by a process that dies is dropped by the
+    kernel and can never go stale. The exclusive holder writes its pid and
+    command into the lock file so a timeout can say who is in the way; it's
+    cleared on release, and a record whose pid is gone is ignored.
+
+    There is one instance per lock file per process (see workspace_lock()),
+    so nested holds convert the lock we already have instead of deadlocking
+    against ourselves.
+    """
+
+    def __init__(self, root: Path, name: str = LOCK_NAME):
+        self.root = root
+        self.path = root / name
+        self.mode: str | None = None
+        self._fd: int | None = None
+
+    # --- public -------------------------------------------------------------
+
+    def acquire(self, mode: str, timeout: float | None = None) -> None:
+        if mode not in (SHARED, EXCLUSIVE):
+            raise ValueError(f"unknown lock mode: {mode}")
+        if timeout is None:
+            timeout = _config_timeout(self.root)
+
+        if fcntl is None:
+            self._acquire_fallback(mode, timeout)
+        else:
+            self._acquire_flock(mode, timeout)
+
+        self.mode = mode
+        log("info", f"lock {self.path.name}: acquired {mode}")
+
+    def release(self) -> None:
+        if self.mode is None:
+            return
+
+        if fcntl is None:
+            self._release_fallback()
+        else:
+            # always: while we hold it nobody else is exclusive, so any
+            # record still in there is left over from a crashed holder
+            self._clear_holder()
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+        log("info", f"lock {self.path.name}: released {self.mode}")
+        self._drop()
+
+    @contextmanager
+    def hold(self, mode: str, timeout: float | None = None) -> tp.Iterator["WorkspaceLock"]:
+        """
+        Hold the lock in `mode` for the duration of the block, then go
+        back to whatever we held before (or release it).
+
+        Exclusive already covers shared, so that case is a no-op.
+        """
+        previous = self.mode
+        if previous == mode or previous == EXCLUSIVE:
+            yield self
+            return
+
+        self.acquire(mode, timeout)
+        try:
+            yield self
+        finally:
+            if previous is None:
+                self.release()
+            else:
+                self.acquire(previous, timeout)
+
+    # --- flock --------------------------------------------------------------
+
+    def _acquire_flock(self, mode: str, timeout: float) -> None:
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+
+        op = fcntl.LOCK_EX if mode == EXCLUSIVE else fcntl.LOCK_SH
+
+        # giving up exclusive: clear the holder record before other
+        # processes can get in
+        if self.mode == EXCLUSIVE:
+            self._clear_holder()
+
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(self._fd, op | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    # flock drops the old lock before converting, so
+                    # whatever we held before is gone now as well
+                    self._drop()
+                    raise LockTimeout(self._timeout_message(mode, timeout))
+                time.sleep(POLL_INTERVAL)
+
+        if mode == EXCLUSIVE:
+            self._write_holder()
+
+    def _drop(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self.mode = None
+
+    def _write_holder(self) -> None:
+        record = json.dumps({
+            "pid": os.getpid(),
+            "command": " ".join(["org", *sys.argv[1:]]),
+            "since": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        })
+        os.ftruncate(self._fd, 0)
+        os.pwrite(self._fd, record.encode("utf-8"), 0)
+
+    def _clear_holder(self) -> None:
+        if self._fd is not None:
+            os.ftruncate(self._fd, 0)
+
+    def _read_holder(self) -> dict | None:
+        try:
+            raw = self.path.read_text(encoding="utf-8").strip()
+            return json.loads(raw) if raw else None
+        except Exception:
+            return None
+
+    def _timeout_message(self, mode: str, timeout: float) -> str:
+        article = "an" if mode == EXCLUSIVE else "a"
+        msg = f"Timed out after {timeout:g}s waiting for {article} {mode} lock on this workspace"
+        holder = self._read_holder()
+        if holder and _pid_alive(holder.get("pid")):
+            msg += f" (held by pid {holder.get('pid')}: '{holder.get('command')}' since {holder.get('since')})"
+        else:
+            msg += " (held shared by another org process)"
+        return msg
+
+    # --- fallback -----------------------------------------------------------
+    #
+    # Without fcntl we can only do an exclusive O_EXCL pid file. Shared holds
+    # are not enforced in this mode, and a pid file older than STALE_AFTER is
+    # assumed to belong to a crashed run and is broken. Exclusive holds are
+    # always short (validation, tidy, write-back), so this is safe in practice.
+
+    def _pid_path(self) -> Path:
+        return self.path.with_name(self.path.name + ".pid")
+
+    def _acquire_fallback(self, mode: str, timeout: float) -> None:
+        if mode == SHARED:
+            if self.mode == EXCLUSIVE:
+                self._release_fallback()
+            return
+
+        pid_path = self._pid_path()
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fd = os.open(pid_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            except FileExistsError:
+                try:
+                    age = time.time() - pid_path.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+                if age > STALE_AFTER:
+                    log("warning", f"lock {pid_path.name}: breaking stale lock ({age:.0f}s old)")
+                    try:
+                        pid_path.unlink()
+                    except FileNotFoundError:
+                        pass
+                    continue
+                if time.monotonic() >= deadline:
+                    raise LockTimeout(
+                        f"Timed out after {timeout:g}s waiting for an exclusive lock on this workspace "
+                        f"(remove {pid_path} if no other org process is running)"
+                    )
+                time.sleep(POLL_INTERVAL)
+                continue
+
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(str(os.getpid()))
+            return
+
+    def _release_fallback(self) -> None:
+        if self.mode == EXCLUSIVE:
+            try:
+                self._pid_path().unlink()
+            except FileNotFoundError:
+                pass
+
+
+_locks: dict[Path, WorkspaceLock] = {}
+
+def workspace_lock(root: Path | None = None, name: str = LOCK_NAME) -> WorkspaceLock:
+    """
+    Return this process's lock for `root` (default: cwd).
+    """
+    path = ((root or Path.cwd()) / name).resolve()
+    lock = _locks.get(path)
+    if lock is None:
+        lock = WorkspaceLock(path.parent, name)
+        _locks[path] = lock
+    return lock
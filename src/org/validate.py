@@ -16,6 +16,7 @@ from pathlib import Path
 from .my_logger import log
 from collections import defaultdict, OrderedDict
 from .orgids import new_user_id_str, make_id
+from .orglock import workspace_lock, SHARED, EXCLUSIVE
 
 # ROOT: Path = Path.cwd()
 ROOT: Path = Path.cwd()
@@ -93,6 +94,27 @@ def load_or_create_config() -> Config:
 
     return cfg
 
+# event patterns: intervals, then selectors parse_pattern can match, in
+# range: @wd/@m take lists and ranges (@wd1-5,7), @h/@n lists (@h9,17);
+# ~ excludes wd/m; then an optional +duration
+_WEEKDAY = "[1-7]"
+_MONTHDAY = "(?:[1-9]|[12]\\d|3[01])"
+_HOUR = "(?:[01]?\\d|2[0-3])"
+_MINUTE = "[0-5]?\\d"
+
+def _days(n: str) -> str:
+    return f"{n}(?:-{n})?(?:,{n}(?:-{n})?)*"
+
+def _values(n: str) -> str:
+    return f"{n}(?:,{n})*"
+
+PATTERN_FORMAT = (
+    "^(?:\\.)?(?:\\d+[ymwdhn])+"
+    f"(?:@(?:wd{_days(_WEEKDAY)}|m{_days(_MONTHDAY)}|h{_values(_HOUR)}|n{_values(_MINUTE)}))*"
+    f"(?:~(?:wd{_days(_WEEKDAY)}|m{_days(_MONTHDAY)}))*"
+    "(?:\\+\\d+(?:[ymwdhn])?)?$"
+)
+
 SCHEMA: dict[str, list] = {
 
     # str: [value, [compatible filetypes], cardinal symbol, type, format string, defaults (i/a)]
@@ -120,8 +142,7 @@ SCHEMA: dict[str, list] = {
 
     # events only
     "start":[None,[".ev"],"r",str,"^\\d{8}(?:T\\d{4}(?:\\d{2})?)?$",None],
-    # might need to double check this one
-    "pattern":[None,[".ev"],"n",str,"^(?:\\.)?(?:\\d+[ymwdhn])+(?:@[^@~]+)*(?:~[^@~]+)*(?:\\+\\d+(?:[ymwdhn])?)?$",None],
+    "pattern":[None,[".ev"],"n",str,PATTERN_FORMAT,None],
     "end":[None,[".ev"],"n",str,"^\\d{8}(?:T\\d{4}(?:\\d{2})?)?$",None],
 
     # id will not be run through validation,
@@ -176,6 +197,9 @@ def init_db() -> sqlite3.Connection:
       - start TEXT NOT NULL
       - end TEXT
       - pattern TEXT
+      - start_key TEXT (start as ISO YYYY-MM-DDTHH:MM:SS, indexed)
+      - end_key TEXT
+      - has_pattern INTEGER NOT NULL
 
     Args:
         None
@@ -195,12 +219,102 @@ def init_db() -> sqlite3.Connection:
     c.execute("CREATE TABLE IF NOT EXISTS events (id TEXT PRIMARY KEY, event TEXT NOT NULL, path TEXT NOT NULL, tags TEXT NOT NULL, authour TEXT NOT NULL, status TEXT NOT NULL, assignees TEXT NOT NULL, priority INTEGER NOT NULL, creation TEXT NOT NULL, start TEXT NOT NULL, end TEXT, pattern TEXT, valid INTEGER NOT NULL DEFAULT 0)")
     c.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, mtime FLOAT NOT NULL)")
 
+    _migrate_event_keys(c)
+    _migrate_note_tags(c)
+
     conn.commit()
 
     log("info", "Connection established")
 
     return conn
 
+# event times whose format (YYYYMMDD[THHMM[SS]]) has to be an actual date
+# too, since start_key/end_key are made from them
+_EVENT_TIME_PROPERTIES = {"start", "end"}
+
+def event_time_key(raw: str | None) -> str | None:
+    """
+    Sortable form of an event start/end (YYYYMMDD[THHMM[SS]]) as stored in
+    start_key/end_key: ISO 'YYYY-MM-DDTHH:MM:SS', same as event_occurrences.
+    """
+    if not raw:
+        return None
+    try:
+        return datetime.fromisoformat(raw).isoformat()
+    except ValueError:
+        return None
+
+def _migrate_event_keys(c: sqlite3.Cursor) -> None:
+    """
+    start_key/end_key/has_pattern on events (older dbs don't have them),
+    so date-range lookups are an index range instead of parsing every
+    start in Python. Rows written before the columns existed are
+    backfilled here; validation keeps them current after that. A start
+    that isn't a real date (validation used to let 20260231 through) has
+    no key, so that row is marked invalid rather than left NULL, which
+    would have it re-selected here on every run.
+    """
+    cols = {r[1] for r in c.execute("PRAGMA table_info(events)")}
+    for col, decl in (("start_key", "TEXT"), ("end_key", "TEXT"), ("has_pattern", "INTEGER NOT NULL DEFAULT 0")):
+        if col not in cols:
+            c.execute(f"ALTER TABLE events ADD COLUMN {col} {decl}")
+
+    c.execute("CREATE INDEX IF NOT EXISTS events_start_key ON events(has_pattern, start_key)")
+
+    stale = c.execute("SELECT id, start, end, pattern FROM events WHERE start_key IS NULL AND valid = 1").fetchall()
+    if not stale:
+        return
+    log("info", f"Backfilling start_key/end_key/has_pattern for {len(stale)} events")
+    keyed, unparseable = [], []
+    for r in stale:
+        start_key = event_time_key(r[1])
+        if start_key is None:
+            unparseable.append((r[0],))
+        else:
+            keyed.append((start_key, event_time_key(r[2]), 1 if r[3] else 0, r[0]))
+
+    c.executemany("UPDATE events SET start_key = ?, end_key = ?, has_pattern = ? WHERE id = ?", keyed)
+    if unparseable:
+        log("warning", f"Marking {len(unparseable)} events with an unparseable start invalid")
+        c.executemany("UPDATE events SET valid = 0 WHERE id = ?", unparseable)
+
+def set_note_tags(c: sqlite3.Cursor, note_id: str, tags: tp.Any) -> None:
+    """
+    Replace a note's rows in note_tags with its tags (a list, or the JSON
+    stored in notes.tags), normalised the way tags are compared everywhere.
+    """
+    from .commands.system.cli_helpers import norm_tag
+
+    if isinstance(tags, str):
+        try:
+            tags = json.loads(tags)
+        except ValueError:
+            tags = []
+    if not isinstance(tags, list):
+        tags = []
+    normed = {norm_tag(t) for t in tags if isinstance(t, str)} - {""}
+
+    c.execute("DELETE FROM note_tags WHERE note_id = ?", (note_id,))
+    c.executemany("INSERT INTO note_tags (note_id, tag) VALUES (?, ?)", [(note_id, t) for t in sorted(normed)])
+
+def _migrate_note_tags(c: sqlite3.Cursor) -> None:
+    """
+    note_tags: a row per (note, normalised tag), indexed by tag, so picking
+    notes by tag (publish) is an index lookup instead of parsing every
+    note's JSON tags. Validation keeps it current (set_note_tags); a db
+    from before it existed is filled in here, once.
+    """
+    existed = c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'note_tags'").fetchone()
+    c.execute("CREATE TABLE IF NOT EXISTS note_tags (note_id TEXT NOT NULL, tag TEXT NOT NULL, PRIMARY KEY (note_id, tag))")
+    c.execute("CREATE INDEX IF NOT EXISTS note_tags_tag ON note_tags(tag, note_id)")
+    if existed:
+        return
+
+    notes = c.execute("SELECT id, tags FROM notes WHERE id IS NOT NULL").fetchall()
+    log("info", f"Filling note_tags for {len(notes)} notes")
+    for note_id, tags in notes:
+        set_note_tags(c, note_id, tags)
+
 def _scan_disk(root: Path, file_types: list[str]) -> tp.Tuple[tp.Dict[Path, float], list[Path]]:
     """
     Scan all files in a directory to get paths and mtime for certain file types.
@@ -505,7 +619,11 @@ def validate_notes(conn: sqlite3.Connection, c: sqlite3.Cursor, cfg: Config, to_
             now_ts = datetime.now().timestamp()
             file_mtimes[p] = now_ts
 
-            # 19. upsert into DB
+            # 19. upsert into DB (and its tags; a rewritten id leaves the old ones behind)
+            c.execute(
+                "DELETE FROM note_tags WHERE note_id IN (SELECT id FROM notes WHERE path = ? AND id IS NOT ?)",
+                (str(p), yaml_meta.get("id")),
+            )
             c.execute(
                 "INSERT OR REPLACE INTO notes "
                 "(path, title, tags, description, authour, creation, mtime, id, valid) "
@@ -521,6 +639,7 @@ def validate_notes(conn: sqlite3.Connection, c: sqlite3.Cursor, cfg: Config, to_
                     yaml_meta.get("id"),                     # None if missing
                 ),
             )
+            set_note_tags(c, yaml_meta.get("id"), yaml_meta.get("tags", []))
             conn.commit()
 
     log("info", f"Validation for {len(to_check)} notes complete")
@@ -907,7 +1026,7 @@ def check_format(
         property: the property name (str) for which a value is being validated
         value: the value in question. type unknown. this concerns next validation step.
         format_string: str: a str encoding of the format required
-        file_type: str: the file type (not required for anything except logs)
+        file_type: str: the file type (for logs, and the .ev-only date check)
         valids: a dict of bools which stores any validation success/failure
         auto_assign: a dict of bools which stores any defaulting flags
         errors: a dict of a list of strs which will store any errors
@@ -930,6 +1049,14 @@ def check_format(
 
         # if format matches pattern
         if pattern.fullmatch(value):
+
+            # the regex lets through 20260231 and 2500 o'clock
+            if file_type == ".ev" and property in _EVENT_TIME_PROPERTIES and event_time_key(value) is None:
+                error = f"Value for {property} ({value}) is not a real date/time"
+                valids.append(False)
+                errors.append(error)
+                return valids, errors
+
             valids.append(True)
             return valids, errors
 
@@ -1005,6 +1132,34 @@ def _fmt_deadline(dt: datetime) -> str:
     # Always date-only to satisfy your regex and keep it simple
     return dt.strftime("%Y%m%d")
 
+def _priority_band(pval, delta_days: float):
+    """
+    Priority after the urgency bands, for a deadline delta_days away
+    (negative = overdue). Shared by validation and the as-of versions in
+    cli_helpers, so they can't drift apart.
+    """
+    # future: 4–2 weeks
+    if 14 <= delta_days <= 28:
+        if pval > 2:
+            return 2
+
+    # future: 2–0 weeks
+    elif 0 <= delta_days < 14:
+        if pval > 1:
+            return 1
+
+    # past: 2–4 weeks overdue
+    elif -28 <= delta_days <= -14:
+        if pval < 2:
+            return 2
+
+    # past: more than 4 weeks overdue
+    elif delta_days < -28:
+        if pval < 3:
+            return 3
+
+    return pval
+
 def normalise_priority_and_deadline(metadata_dict: dict[str, list]) -> dict[str, list]:
     now = datetime.now()
 
@@ -1028,26 +1183,7 @@ def normalise_priority_and_deadline(metadata_dict: dict[str, list]) -> dict[str,
 
     # 2) Deadline exists: normalise urgency bands
     delta_days = (deadline_dt - now).total_seconds() / 86400.0
-
-    # future: 4–2 weeks
-    if 14 <= delta_days <= 28:
-        if pval > 2:
-            metadata_dict["priority"][0] = 2
-
-    # future: 2–0 weeks
-    elif 0 <= delta_days < 14:
-        if pval > 1:
-            metadata_dict["priority"][0] = 1
-
-    # past: 2–4 weeks overdue
-    elif -28 <= delta_days <= -14:
-        if pval < 2:
-            metadata_dict["priority"][0] = 2
-
-    # past: more than 4 weeks overdue
-    elif delta_days < -28:
-        if pval < 3:
-            metadata_dict["priority"][0] = 3
+    metadata_dict["priority"][0] = _priority_band(pval, delta_days)
 
     return metadata_dict
     
@@ -1300,6 +1436,8 @@ def _set_operations(c: sqlite3.Cursor, db_scan: dict[Path, float], file_type: st
 
     # 4.2. remove redundant notes/todos/events
     for p in redundant_files:
+        if table == "notes":
+            c.execute("DELETE FROM note_tags WHERE note_id IN (SELECT id FROM notes WHERE path=?)", (str(p),))
         c.execute(f"DELETE FROM {table} WHERE path=?", (str(p),))
 
         # remove redundant .td or .ev paths if applicable
@@ -1342,6 +1480,44 @@ def _set_operations(c: sqlite3.Cursor, db_scan: dict[Path, float], file_type: st
 
     return to_check, new_files
 
+# in-line .td/.ev metadata symbols, in the order lines are written back
+LINE_SYMBOLS: dict[str, str] = {
+    "start": ">",
+    "authour": "$",
+    "status": "=",
+    "priority": "!",
+    "creation": "~",
+    "end": "<",
+    "deadline": "%",
+    "pattern": "^",
+    "tags": "#",
+    "assignees": "@",
+    "id": "id/",
+}
+
+def build_line(prefix: str, content: str, values: dict[str, tp.Any]) -> str:
+    """
+    The canonical form of a todo/event line: prefix ("* t: ") + content,
+    then " // " and every LINE_SYMBOLS property that has a value, list
+    properties once per element. tidy rebuilds lines with this too, so
+    a file validation just wrote compares equal.
+    """
+    line = prefix + content
+    parts = []
+    for key, symbol in LINE_SYMBOLS.items():
+        value = values.get(key)
+        if value is None:
+            continue
+        if isinstance(value, list):
+            parts.extend(f"{symbol}{v}" for v in value)
+        else:
+            parts.append(f"{symbol}{value}")
+
+    # glue on the metadata with “//”
+    if parts:
+        line += " // " + " ".join(parts)
+    return line
+
 def undefined(conn: sqlite3.Connection, c: sqlite3.Cursor, to_check: set[Path], metadata_dict, cfg, disk_scan):
     """
     """
@@ -1357,19 +1533,7 @@ def undefined(conn: sqlite3.Connection, c: sqlite3.Cursor, to_check: set[Path],
 
         log("info", f"Processing file: {p}")
 
-        lookup = {
-            "start": ">",
-            "authour": "$",
-            "status": "=",
-            "priority": "!",
-            "creation": "~",
-            "end": "<",
-            "deadline": "%",
-            "pattern": "^",
-            "tags": "#",
-            "assignees": "@",
-            "id": "id/",
-        }
+        lookup = LINE_SYMBOLS
 
         # get filetype name
         lookup_two: dict = {
@@ -1469,22 +1633,7 @@ def undefined(conn: sqlite3.Connection, c: sqlite3.Cursor, to_check: set[Path],
                 prefix = f"* {lookup_two[p.suffix][1]}: "
 
             # start building the rebuilt line
-            rebuilt = prefix + meta[f"{item}"][0]
-            parts = []
-
-            for key, prefix in lookup.items():
-                value = meta[key][0]
-                if value is None:
-                    continue
-                if isinstance(value, list):
-                    for i in value:
-                        parts.append(f"{prefix}{i}")
-                else:
-                    parts.append(f"{prefix}{value}")
-
-            # glue on the metadata with “//”
-            if parts:
-                rebuilt += " // " + " ".join(parts)
+            rebuilt = build_line(prefix, meta[f"{item}"][0], {k: v[0] for k, v in meta.items()})
 
             # 2) choose between original or rebuilt
             if rebuilt.strip() == line.strip():
@@ -1533,13 +1682,16 @@ def undefined(conn: sqlite3.Connection, c: sqlite3.Cursor, to_check: set[Path],
 
                 c.execute("""
                     INSERT OR REPLACE INTO events(
-                        id, event, path, tags, authour, status, assignees, priority, creation, start, end, pattern, valid)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
+                        id, event, path, tags, authour, status, assignees, priority, creation, start, end, pattern,
+                        start_key, end_key, has_pattern, valid)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
                 """, (
                     meta["id"][0], meta["event"][0], str(p), json.dumps(meta["tags"][0]),
                     meta["authour"][0], meta["status"][0], json.dumps(meta["assignees"][0]),
                     meta["priority"][0], meta["creation"][0], meta["start"][0],
-                    meta["end"][0], meta["pattern"][0]
+                    meta["end"][0], meta["pattern"][0],
+                    event_time_key(meta["start"][0]), event_time_key(meta["end"][0]),
+                    1 if meta["pattern"][0] else 0,
                 ))
                 conn.commit()
 
@@ -1567,10 +1719,102 @@ def undefined(conn: sqlite3.Connection, c: sqlite3.Cursor, to_check: set[Path],
         log("info", f"updated lines: {updated_lines}")
         if orig_lines != updated_lines:
             full.write_text("\n".join(updated_lines) + "\n", encoding="utf-8")
+            # the rewrite is ours: record its mtime, or the next run
+            # takes the file for modified and validates it all over again
+            c.execute("UPDATE files SET mtime = ? WHERE path = ?", (full.stat().st_mtime, str(p)))
 
     return invalid, collected
 
+def _up_to_date() -> bool:
+    """
+    True if validating now would change nothing: every .txt/.td/.ev file
+    is in the db with the mtime it has on disk, there are no errors to
+    recheck, no todo is due a priority/deadline bump, the derived tables
+    exist, and the event occurrences are filled for today's window.
+
+    Only reads (the db read-only), so it's fine under a shared lock.
+    Anything it can't tell about counts as a change.
+    """
+    from .commands.system.occurrences import occurrence_horizon
+
+    if not DB_PATH.exists() or not CONFIG_PATH.exists() or (ROOT / "org_errors").exists():
+        return False
+
+    try:
+        cfg = json.loads(CONFIG_PATH.read_text(encoding="utf-8"))
+        conn = sqlite3.connect(DB_PATH.as_uri() + "?mode=ro", uri=True)
+    except (ValueError, OSError, sqlite3.Error):
+        return False
+
+    try:
+        c = conn.cursor()
+
+        # 1. files: nothing new, gone or modified
+        disk_scan, _ = _scan_disk(ROOT, [".txt", ".td", ".ev"])
+        db_scan: dict[Path, float] = {Path(p): m for p, m in c.execute("SELECT path, mtime FROM notes")}
+        for p, m in c.execute("SELECT path, mtime FROM files"):
+            if p.endswith((".td", ".ev")):
+                db_scan[Path(p)] = m
+        if db_scan.keys() != disk_scan.keys():
+            return False
+        if any(disk_scan[p] > db_scan[p] for p in disk_scan):
+            return False
+
+        # 2. todos whose priority or deadline normalisation would rewrite them
+        now = datetime.now()
+        for priority, deadline in c.execute("""
+            SELECT priority, deadline FROM todos
+             WHERE valid = 1 AND ((deadline IS NOT NULL AND TRIM(deadline) <> '') OR priority IN (1, 2))
+        """):
+            deadline_dt = _parse_deadline(deadline) if deadline else None
+            if deadline_dt is None:
+                if priority in (1, 2):
+                    return False
+                continue
+            delta_days = (deadline_dt - now).total_seconds() / 86400.0
+            if _priority_band(priority, delta_days) != priority:
+                return False
+
+        # 3. event keys backfilled (see _migrate_event_keys)
+        cols = {r[1] for r in c.execute("PRAGMA table_info(events)")}
+        if not {"start_key", "end_key", "has_pattern"} <= cols:
+            return False
+        if c.execute("SELECT 1 FROM events WHERE start_key IS NULL AND valid = 1 LIMIT 1").fetchone():
+            return False
+
+        # 4. note_tags filled in (see _migrate_note_tags)
+        if not c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'note_tags'").fetchone():
+            return False
+
+        # 5. occurrence window is today's
+        back, ahead = occurrence_horizon(cfg)
+        today = datetime.now().date()
+        window = c.execute("SELECT window_from, window_to FROM event_occurrences_meta WHERE id = 1").fetchone()
+        if window != ((today + timedelta(days=back)).isoformat(), (today + timedelta(days=ahead)).isoformat()):
+            return False
+    except sqlite3.Error:
+        return False
+    finally:
+        conn.close()
+
+    return True
+
 def main(metadata_dict: dict[str,list]):
+    lock = workspace_lock()
+
+    # the usual case is that nothing changed since the last command, and
+    # checking that only reads, so it doesn't need to keep everyone else out
+    with lock.hold(SHARED):
+        if _up_to_date():
+            log("info", "Validation: nothing changed since the last run")
+            return {"notes": [], "todos": [], "events": []}
+
+    # validation rewrites files and the db, so nobody else
+    # gets to read or tidy the workspace while it runs
+    with lock.hold(EXCLUSIVE):
+        return _validate(metadata_dict)
+
+def _validate(metadata_dict: dict[str,list]):
 
     # 0. ground zero operations
     cfg = load_or_create_config()
@@ -1656,6 +1900,19 @@ def main(metadata_dict: dict[str,list]):
     # moved outside of functions
     conn.commit()
 
+    # keep materialised event instances in step with the events table
+    from .commands.system.occurrences import refresh_occurrences
+    _, occ_errors = refresh_occurrences(conn, cfg)
+
+    # events whose instances can't be generated (refresh marked them
+    # invalid) are errors on their line like any other
+    for event_id, err in occ_errors:
+        row = c.execute("SELECT path FROM events WHERE id = ?", (event_id,)).fetchone()
+        p = Path(row["path"])
+        token = f"{LINE_SYMBOLS['id']}{event_id}"
+        line = next((l for l in _parse_lines(ROOT / p) if token in l.split()), token)
+        t_e_errors.append((p, line, [err]))
+
     # ?. delete redundant files
     for l in redundant:
         for p in l:
@@ -0,0 +1,28 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+def run_org(ws: Path, *args: str, stdin: str = "", check: bool = True) -> subprocess.CompletedProcess:
+    """`org <args>` in ws, as its own process (org reads the cwd at import time)."""
+    env = dict(os.environ, PYTHONPATH=str(SRC))
+    proc = subprocess.run(
+        [sys.executable, "-m", "org.org", *args],
+        cwd=ws, env=env, input=stdin, text=True, capture_output=True,
+    )
+    if check and proc.returncode != 0:
+        raise AssertionError(f"org {' '.join(args)} exited {proc.returncode}:\n{proc.stdout}{proc.stderr}")
+    return proc
+
+@pytest.fixture
+def workspace(tmp_path: Path) -> Path:
+    """An initialised, empty org workspace."""
+    ws = tmp_path / "ws"
+    ws.mkdir()
+    (ws / ".config.json").write_text('{"name": "tester"}', encoding="utf-8")
+    run_org(ws, "init", stdin="tester\n")
+    return ws
@@ -0,0 +1,202 @@
+function esc(s) {
+  gsub(/&/, "\\&amp;", s)
+  gsub(/</, "\\&lt;", s)
+  gsub(/>/, "\\&gt;", s)
+  return s
+}
+
+function apply_links(s,    pre, mid, post, t, u) {
+  while (match(s, /\[[^]]+\]\([^)]+\)/)) {
+    pre = substr(s, 1, RSTART-1)
+    mid = substr(s, RSTART, RLENGTH)
+    post = substr(s, RSTART+RLENGTH)
+
+    t = mid
+    sub(/^\[/, "", t)
+    sub(/\]\([^)]+\)$/, "", t)
+
+    u = mid
+    sub(/^\[[^]]+\]\(/, "", u)
+    sub(/\)$/, "", u)
+
+    s = pre "<a href=\"" u "\">" t "</a>" post
+  }
+  return s
+}
+
+function apply_bold_italic(s,    pre, mid, post, inner) {
+  while (match(s, /\*\*[^*]+\*\*/)) {
+    pre = substr(s, 1, RSTART-1)
+    mid = substr(s, RSTART, RLENGTH)
+    post = substr(s, RSTART+RLENGTH)
+    inner = substr(mid, 3, length(mid)-4)
+    s = pre "<strong>" inner "</strong>" post
+  }
+  while (match(s, /__[^_]+__/)) {
+    pre = substr(s, 1, RSTART-1)
+    mid = substr(s, RSTART, RLENGTH)
+    post = substr(s, RSTART+RLENGTH)
+    inner = substr(mid, 3, length(mid)-4)
+    s = pre "<strong>" inner "</strong>" post
+  }
+  while (match(s, /\*[^*]+\*/)) {
+    pre = substr(s, 1, RSTART-1)
+    mid = substr(s, RSTART, RLENGTH)
+    post = substr(s, RSTART+RLENGTH)
+    inner = substr(mid, 2, length(mid)-2)
+    s = pre "<em>" inner "</em>" post
+  }
+  while (match(s, /_[^_]+_/)) {
+    pre = substr(s, 1, RSTART-1)
+    mid = substr(s, RSTART, RLENGTH)
+    post = substr(s, RSTART+RLENGTH)
+    inner = substr(mid, 2, length(mid)-2)
+    s = pre "<em>" inner "</em>" post
+  }
+  return s
+}
+
+function inline(s) {
+  s = esc(s)
+  s = apply_bold_italic(s)
+  s = apply_links(s)
+  return s
+}
+
+function slugify(s,    t) {
+  t = tolower(s)
+  gsub(/<[^>]*>/, "", t)
+  gsub(/&[a-zA-Z]+;/, "", t)
+  gsub(/[^a-z0-9]+/, "-", t)
+  gsub(/^-+|-+$/, "", t)
+  if (t == "") t = "section"
+  return "h-" t
+}
+
+function heading(text, level,    id) {
+  id = slugify(text)
+  print "<h" level " id=\"" id "\">" inline(text) "</h" level ">"
+}
+
+function print_line_as_linebreak(line) {
+  print inline(line) "<br>"
+}
+
+function close_p()  { if (in_p)  { print "</p>";        in_p=0 } }
+function close_ul() { if (in_ul) { print "</ul>";       in_ul=0 } }
+function close_ol() { if (in_ol) { print "</ol>";       in_ol=0 } }
+function close_bq() { if (in_bq) { close_p(); print "</blockquote>"; in_bq=0 } }
+
+BEGIN {
+  in_p=0; in_ul=0; in_ol=0; in_bq=0;
+  prev_nonempty="";
+  prev_was_blank=1;
+  pending_hr=0;
+}
+
+{
+  line = $0
+
+  if (pending_hr) {
+    pending_hr = 0
+    if (line ~ /^[[:space:]]*$/) {
+      close_p(); close_ul(); close_ol(); close_bq()
+      print "<hr>"
+    } else {
+      if (!in_p) { print "<p>"; in_p=1 }
+      print inline("---") "<br>"
+    }
+  }
+
+  if (line ~ /^[[:space:]]*$/) {
+    prev_was_blank = 1
+    if (in_ul) close_ul()
+    if (in_ol) close_ol()
+    if (in_bq) close_bq()
+    if (!in_p) { print "<p>"; in_p=1 }
+    print "<br>"
+    next
+  }
+
+  # Structural HR rule
+  if (line ~ /^[[:space:]]*---[[:space:]]*$/) {
+    if (prev_was_blank) {
+      pending_hr = 1
+      prev_was_blank = 0
+      next
+    } else {
+      if (!in_p) { print "<p>"; in_p=1 }
+      print inline("---") "<br>"
+      prev_was_blank = 0
+      next
+    }
+  }
+
+  # Ordered list
+  if (line ~ /^[[:space:]]*[0-9]+\.[[:space:]]+/) {
+    prev_was_blank = 0
+    close_p()
+    close_ul()
+    if (!in_ol) { print "<ol>"; in_ol=1 }
+    sub(/^[[:space:]]*[0-9]+\.[[:space:]]+/, "", line)
+    print "<li>" inline(line) "</li>"
+    trimmed = line
+    sub(/^[[:space:]]+/, "", trimmed); sub(/[[:space:]]+$/, "", trimmed)
+    if (trimmed != "") prev_nonempty = trimmed
+    next
+  } else if (in_ol) {
+    close_ol()
+  }
+
+  # Unordered list
+  if (line ~ /^[[:space:]]*[-*][[:space:]]+/) {
+    prev_was_blank = 0
+    close_p()
+    close_ol()
+    if (!in_ul) { print "<ul>"; in_ul=1 }
+    sub(/^[[:space:]]*[-*][[:space:]]+/, "", line)
+    print "<li>" inline(line) "</li>"
+    trimmed = line
+    sub(/^[[:space:]]+/, "", trimmed); sub(/[[:space:]]+$/, "", trimmed)
+    if (trimmed != "") prev_nonempty = trimmed
+    next
+  } else if (in_ul) {
+    close_ul()
+  }
+
+  # Headings
+  if (line ~ /^###[[:space:]]+/) {
+    prev_was_blank = 0
+    close_p(); close_ul(); close_ol(); close_bq()
+    sub(/^###[[:space:]]+/, "", line)
+    heading(line, 3)
+    next
+  }
+  if (line ~ /^##[[:space:]]+/) {
+    prev_was_blank = 0
+    close_p(); close_ul(); close_ol(); close_bq()
+    sub(/^##[[:space:]]+/, "", line)
+    heading(line, 2)
+    next
+  }
+  if (line ~ /^#[[:space:]]+/) {
+    prev_was_blank = 0
+    close_p(); close_ul(); close_ol(); close_bq()
+    sub(/^#[[:space:]]+/, "", line)
+    heading(line, 1)
+    next
+  }
+
+  # Plain text
+  prev_was_blank = 0
+  if (!in_p) { print "<p>"; in_p=1 }
+  print_line_as_linebreak(line)
+}
+
+END {
+  if (pending_hr) {
+    if (!in_p) { print "<p>"; in_p=1 }
+    print inline("---") "<br>"
+  }
+  close_bq(); close_ul(); close_ol(); close_p()
+}
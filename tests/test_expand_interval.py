@@ -0,0 +1,127 @@
+"""
+expand_interval jumps straight to the last period start instead of
+stepping there one period at a time. These check it against the stepping
+loop it replaced, on seeded random anchors (month ends and Feb 29
+included) and interval mixes, and that the day-by-day and range
+generators agree.
+"""
+import random
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from org.commands.system.cli_helpers import (
+    _day_is_stable,
+    _shift_months,
+    add_intervals,
+    expand_interval,
+    generate_instances_between,
+    generate_instances_for_date,
+    parse_pattern,
+)
+
+SEEDS = range(8)
+
+def stepping_expand_interval(start, intervals, target_dt, anchored):
+    # the original: step one period at a time until the next would pass target_dt
+    curr = datetime(start.year, 1, 1, start.hour, start.minute) if anchored else start
+    while True:
+        nxt = add_intervals(curr, intervals)
+        if nxt > target_dt:
+            return curr
+        curr = nxt
+
+def random_start(rng):
+    d = date(2015, 1, 1) + timedelta(days=rng.randint(0, 4000))
+    r = rng.random()
+    if r < 0.3:
+        # month ends, where month steps clamp
+        try:
+            d = d.replace(day=rng.choice([29, 30, 31]))
+        except ValueError:
+            pass
+    elif r < 0.4:
+        d = date(rng.choice([2016, 2020, 2024]), 2, 29)
+    t = time(0, 0) if rng.random() < 0.6 else time(rng.randint(0, 23), rng.choice([0, 15, 30, 45]))
+    return datetime.combine(d, t)
+
+def random_intervals(rng):
+    r = rng.random()
+    if r < 0.4:
+        units = "ym"            # month path
+    elif r < 0.8:
+        units = "wdhn"          # fixed-length path
+    else:
+        units = "ymwdhn"        # mixed, always steps
+    return [(rng.randint(1, 4), rng.choice(units)) for _ in range(rng.choice([1, 1, 1, 2, 3]))]
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_expand_interval_matches_stepping(seed):
+    rng = random.Random(seed)
+    for _ in range(300):
+        start = random_start(rng)
+        intervals = random_intervals(rng)
+        anchored = rng.random() < 0.2
+        # keep the stepping reference cheap: years out for months, less
+        # for days and weeks, a couple of days for hours and minutes
+        units = {u for _, u in intervals}
+        span = 2 if units & {"h", "n"} else 400 if units & {"w", "d"} else 3000
+        for _ in range(4):
+            target = start + timedelta(days=rng.randint(-10, span), minutes=rng.randint(0, 1439))
+            expected = stepping_expand_interval(start, intervals, target, anchored)
+            got = expand_interval(start, intervals, target, anchored)
+            assert got == expected, (start, intervals, target, anchored)
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_stable_day_never_clamps(seed):
+    # once _day_is_stable says so, _shift_months is exact month stepping
+    rng = random.Random(seed)
+    for _ in range(2000):
+        dt = random_start(rng)
+        steps = [rng.randint(1, 24) for _ in range(rng.choice([1, 2]))]
+        offsets = [sum(steps[:i + 1]) for i in range(len(steps))]
+        total = offsets[-1]
+        if not _day_is_stable(dt, offsets, total):
+            continue
+        intervals = [(n, "m") for n in steps]
+        curr = dt
+        for k in range(1, 25):
+            curr = add_intervals(curr, intervals)
+            assert curr.day == dt.day, (dt, steps, k)
+            assert _shift_months(dt, k * total) == curr, (dt, steps, k)
+
+def random_pattern(rng):
+    s = "." if rng.random() < 0.2 else ""
+    for _ in range(rng.choice([1, 1, 1, 2])):
+        s += f"{rng.randint(1, 4)}{rng.choice('ymwdwdmd' if rng.random() < 0.8 else 'ymwdhn')}"
+    for _ in range(rng.choice([0, 0, 1, 1, 2])):
+        r = rng.random()
+        if r < 0.35:
+            s += "@wd" + ",".join(str(rng.randint(1, 7)) for _ in range(rng.randint(1, 3)))
+        elif r < 0.55:
+            s += "@m" + ",".join(str(rng.randint(1, 31)) for _ in range(rng.randint(1, 3)))
+        elif r < 0.75:
+            s += "@h" + ",".join(str(rng.randint(0, 23)) for _ in range(rng.randint(1, 2)))
+        else:
+            s += rng.choice(["~wd6,7", "~m1", f"~wd{rng.randint(1, 7)}"])
+    if rng.random() < 0.3:
+        s += "+" + str(rng.randint(1, 90)) + rng.choice(["", "n", "h", "d"])
+    return s
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_range_matches_day_by_day(seed):
+    rng = random.Random(seed)
+    for _ in range(150):
+        pattern = random_pattern(rng)
+        pat = parse_pattern(pattern)
+        start = random_start(rng)
+        lo = start.date() + timedelta(days=rng.randint(-5, 2000))
+        hi = lo + timedelta(days=rng.randint(0, 40))
+
+        expected = []
+        day = lo
+        while day <= hi:
+            expected += generate_instances_for_date(pat, start, day)
+            day += timedelta(days=1)
+        got = list(generate_instances_between(pat, start, lo, hi))
+        assert got == expected, (pattern, start, lo, hi)
@@ -0,0 +1,41 @@
+import fcntl
+import json
+import os
+import time
+
+import pytest
+
+from conftest import run_org
+
+TODOS = "* t: buy milk // #shopping !3\n"
+
+@pytest.fixture
+def shared_holder(workspace):
+    # another org process reading (or a pager it's writing to) holds it shared
+    (workspace / "a.td").write_text(TODOS, encoding="utf-8")
+    run_org(workspace, "todos")
+    cfg = json.loads((workspace / ".config.json").read_text(encoding="utf-8"))
+    cfg["lock_timeout"] = 2
+    (workspace / ".config.json").write_text(json.dumps(cfg), encoding="utf-8")
+
+    fd = os.open(workspace / ".org.lock", os.O_RDWR)
+    fcntl.flock(fd, fcntl.LOCK_SH)
+    yield workspace
+    fcntl.flock(fd, fcntl.LOCK_UN)
+    os.close(fd)
+
+def test_readers_dont_wait_on_each_other(shared_holder):
+    out = run_org(shared_holder, "todos").stdout
+    assert "buy milk" in out
+
+def test_changes_still_wait_for_readers(shared_holder):
+    later = time.time() + 5
+    os.utime(shared_holder / "a.td", (later, later))
+    proc = run_org(shared_holder, "todos", check=False)
+    assert proc.returncode != 0
+    assert "waiting for an exclusive lock" in proc.stderr
+
+def test_holder_cleared_on_release(workspace):
+    (workspace / "a.td").write_text(TODOS, encoding="utf-8")
+    run_org(workspace, "todo", "walk the dog")
+    assert (workspace / ".org.lock").read_text(encoding="utf-8") == ""
@@ -0,0 +1,37 @@
+import sqlite3
+
+from conftest import run_org
+
+EVENTS = """\
+* e: standup // >20261019T0930 <20261019T1000 ^1d@wd1,2,3,4,5 #work
+* e: forever // >20261019 ^1d+99999y #broken
+* e: party // >20261021T1900 #fun
+"""
+
+def test_bad_pattern_is_an_error_not_a_crash(workspace):
+    # the pattern is well-formed, but its duration runs off the calendar
+    (workspace / "e.ev").write_text(EVENTS, encoding="utf-8")
+    proc = run_org(workspace, "events", check=False)
+    assert "Traceback" not in proc.stderr, proc.stderr
+    assert "You have errors in your repo" in proc.stderr
+
+    errors = (workspace / "org_errors").read_text(encoding="utf-8")
+    assert "e.ev" in errors and "* e: forever" in errors and "99999y" in errors, errors
+    assert "standup" not in errors and "party" not in errors
+
+    conn = sqlite3.connect(workspace / ".org.db")
+    valid = dict(conn.execute("SELECT event, valid FROM events"))
+    assert valid == {"standup": 1, "forever": 0, "party": 1}
+    occurring = {r[0] for r in conn.execute("""
+        SELECT DISTINCT e.event FROM event_occurrences o JOIN events e ON e.id = o.event_id
+    """)}
+    assert occurring == {"standup", "party"}
+
+    # fixed, it validates and gets its occurrences like the rest
+    text = (workspace / "e.ev").read_text(encoding="utf-8").replace("+99999y", "+2h")
+    (workspace / "e.ev").write_text(text, encoding="utf-8")
+    run_org(workspace, "events")
+    assert not (workspace / "org_errors").exists()
+    assert conn.execute("""
+        SELECT COUNT(*) FROM event_occurrences o JOIN events e ON e.id = o.event_id WHERE e.event = 'forever'
+    """).fetchone()[0] > 0
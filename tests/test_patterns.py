@@ -0,0 +1,211 @@
+"""
+Event patterns: whatever validation lets through, parse_pattern's
+precompiled selectors have to expand the same as the generator they
+replaced, and what it can't read, validation has to reject.
+"""
+import random
+import re
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from org.commands.system.cli_helpers import add_intervals, generate_instances_for_date, parse_duration, parse_pattern
+from org.validate import PATTERN_FORMAT as PATTERN_RE
+SEEDS = range(6)
+
+# ----------------------------
+# The generator before precompiled selectors
+# ----------------------------
+
+def baseline_parse_pattern(pat):
+    anchored = pat.startswith('.')
+    if anchored: pat = pat[1:]
+    m = re.search(r"\+(\d+(?:[ymwdhn])?)$", pat)
+    dur = m.group(1) if m else None
+    if m: pat = pat[:m.start()]
+    intervals = [(int(n), u) for n, u in re.findall(r"(\d+)([ymwdhn])", pat)]
+    selectors = re.findall(r"@([^@~]+)", pat)
+    exclusions = re.findall(r"~([^@~]+)", pat)
+    return {
+        'anchored': anchored,
+        'intervals': intervals,
+        'selectors': selectors,
+        'exclusions': exclusions,
+        'duration': dur
+    }
+
+def baseline_matches_selector(dt, sel):
+    if sel.startswith('wd'):
+        parts = sel[2:].split(',')
+        wd = dt.isoweekday()
+        for p in parts:
+            if '-' in p:
+                lo, hi = map(int, p.split('-'))
+                if lo <= wd <= hi: return True
+            elif wd == int(p): return True
+        return False
+    if sel.startswith('m'):
+        parts = sel[1:].split(',')
+        day = dt.day
+        for p in parts:
+            if '-' in p:
+                lo, hi = map(int, p.split('-'))
+                if lo <= day <= hi: return True
+            elif day == int(p): return True
+        return False
+    return False
+
+def baseline_expand_interval(start, intervals, target_dt, anchored):
+    anchor = datetime(start.year, 1, 1, start.hour, start.minute) if anchored else start
+    curr = anchor
+    while True:
+        nxt = add_intervals(curr, intervals)
+        if nxt > target_dt: break
+        curr = nxt
+    return curr
+
+def baseline_instances_for_date(pat_def, start_dt, target_date):
+    ps = baseline_expand_interval(
+        start=start_dt,
+        intervals=pat_def['intervals'],
+        target_dt=datetime.combine(target_date, time.min),
+        anchored=pat_def['anchored']
+    )
+    if ps.date() > target_date or target_date < start_dt.date():
+        return []
+
+    has_time = start_dt.time() != time(0, 0)
+    dur = parse_duration(pat_def['duration'], has_time)
+
+    wday_selectors = [sel for sel in pat_def['selectors'] if sel.startswith('wd')]
+    cands = []
+    if wday_selectors:
+        wdays = []
+        for sel in wday_selectors:
+            for part in sel[2:].split(','):
+                if '-' in part:
+                    lo, hi = map(int, part.split('-'))
+                    wdays.extend(range(lo, hi + 1))
+                else:
+                    wdays.append(int(part))
+        week_start = ps.date()
+        for wd in set(wdays):
+            offset = (wd - week_start.isoweekday()) % 7
+            d = week_start + timedelta(days=offset)
+            if d == target_date:
+                cands.append(datetime.combine(d, start_dt.time()))
+    else:
+        if ps.date() == target_date:
+            cands = [datetime.combine(ps.date(), start_dt.time())]
+
+    cands = [
+        dt for dt in cands
+        if all(
+            baseline_matches_selector(dt, s)
+            for s in pat_def['selectors']
+            if not s.startswith(('h', 'n'))
+        )
+    ]
+
+    times = []
+    for dt in cands:
+        hs = None
+        ns = None
+        for sel in pat_def["selectors"]:
+            if sel.startswith("h"):
+                hs = [int(x) for x in sel[1:].split(",") if x.strip()]
+            elif sel.startswith("n"):
+                ns = [int(x) for x in sel[1:].split(",") if x.strip()]
+        if hs is None and ns is None:
+            times.append(dt)
+            continue
+        if hs is None:
+            hs = [dt.hour]
+        if ns is None:
+            ns = [dt.minute]
+        for h in hs:
+            for n in ns:
+                if 0 <= h <= 23 and 0 <= n <= 59:
+                    times.append(datetime.combine(dt.date(), time(h, n)))
+    if times:
+        cands = times
+
+    cands = [
+        dt for dt in cands
+        if not any(baseline_matches_selector(dt, ex) for ex in pat_def['exclusions'])
+    ]
+
+    instances = [(s, s + dur) for s in cands if s.date() == target_date]
+    instances.sort(key=lambda pair: pair[0])
+    return instances
+
+# ----------------------------
+# Patterns validation accepts
+# ----------------------------
+
+def numbers(rng, lo, hi, ranges):
+    # repeats and backwards ranges included
+    parts = []
+    for _ in range(rng.randint(1, 3)):
+        a = rng.randint(lo, hi)
+        if ranges and rng.random() < 0.3:
+            parts.append(f"{a}-{rng.randint(lo, hi)}")
+        else:
+            parts.append(str(a))
+    return ",".join(parts)
+
+def random_pattern(rng):
+    s = "." if rng.random() < 0.15 else ""
+    for _ in range(rng.choice([1, 1, 1, 2])):
+        s += f"{rng.randint(1, 3)}{rng.choice('ymwwdddd')}"
+    for _ in range(rng.choice([0, 1, 1, 2, 3])):
+        kind = rng.choice(["wd", "wd", "m", "h", "n"])
+        if kind == "wd":
+            s += "@wd" + numbers(rng, 1, 7, True)
+        elif kind == "m":
+            s += "@m" + numbers(rng, 1, 31, True)
+        elif kind == "h":
+            s += "@h" + numbers(rng, 0, 23, False)
+        else:
+            s += "@n" + numbers(rng, 0, 59, False)
+    for _ in range(rng.choice([0, 0, 1, 2])):
+        kind = rng.choice(["wd", "m"])
+        s += f"~{kind}" + numbers(rng, 1, 7 if kind == "wd" else 31, True)
+    if rng.random() < 0.3:
+        s += "+" + str(rng.randint(1, 90)) + rng.choice(["", "n", "h", "d"])
+    return s
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_accepted_patterns_expand_like_the_baseline(seed):
+    rng = random.Random(seed)
+    for _ in range(150):
+        pattern = random_pattern(rng)
+        assert re.fullmatch(PATTERN_RE, pattern), pattern
+
+        start = datetime.combine(
+            date(2020, 1, 1) + timedelta(days=rng.randint(0, 2000)),
+            time(0, 0) if rng.random() < 0.5 else time(rng.randint(0, 23), rng.choice([0, 30])),
+        )
+        pat, old = parse_pattern(pattern), baseline_parse_pattern(pattern)
+        first = start.date() + timedelta(days=rng.randint(-3, 400))
+        for k in range(21):
+            day = first + timedelta(days=k)
+            assert generate_instances_for_date(pat, start, day) == baseline_instances_for_date(old, start, day), (pattern, start, day)
+
+@pytest.mark.parametrize("pattern", [
+    "1w@mon,wed",    # the baseline read this as @m "on,wed" and failed on int()
+    "1w@wdmon",
+    "1d@m1,,3",
+    "1d@wd1-",
+    "1d@h9-11",      # @h/@n take no ranges
+    "1d@wd8",        # out of range: the baseline aliased @wd0/8 to Sunday/Monday
+    "1d@wd0-3",
+    "1d@m32",
+    "1d@h24",
+    "1d@n60",
+    "1d@x5",         # unknown selector kinds
+    "1d~h9",         # ~ only excludes days
+    "1d@",
+])
+def test_selectors_parse_pattern_cant_read_are_rejected(pattern):
+    assert not re.fullmatch(PATTERN_RE, pattern)
@@ -0,0 +1,87 @@
+import json
+import sqlite3
+import time
+
+from conftest import run_org
+
+def note(body: str) -> str:
+    return f"---\ntitle: Hello\ntags: [blog]\n---\n\n{body}\n"
+
+def test_auto_publish_only_spawns_when_something_changed(workspace):
+    (workspace / "n.txt").write_text(note("hi"), encoding="utf-8")
+    (workspace / ".publish").write_text("blog\n", encoding="utf-8")
+    assert "Published" in run_org(workspace, "publish").stdout
+
+    cfg = json.loads((workspace / ".config.json").read_text(encoding="utf-8"))
+    cfg["auto_publish"] = True
+    (workspace / ".config.json").write_text(json.dumps(cfg), encoding="utf-8")
+    log = workspace / ".org.publish.log"
+
+    run_org(workspace, "todos")
+    assert not log.exists()
+
+    (next(workspace.rglob("*.txt"))).write_text(note("hi there"), encoding="utf-8")
+    run_org(workspace, "todos")
+    assert log.exists()
+
+    # let the detached publish finish before the workspace goes away
+    deadline = time.monotonic() + 10
+    while "Published" not in log.read_text(encoding="utf-8") and time.monotonic() < deadline:
+        time.sleep(0.1)
+    assert "Published" in log.read_text(encoding="utf-8")
+
+def test_publish_set_comes_from_note_tags(workspace):
+    notes = {
+        "a.txt": "[blog]",
+        "b.txt": "[Blog]",
+        "c.txt": "[blog, nopublish]",
+        "d.txt": "[other]",
+    }
+    for name, tags in notes.items():
+        (workspace / name).write_text(f"---\ntitle: {name}\ntags: {tags}\n---\n\nhi\n", encoding="utf-8")
+    (workspace / ".publish").write_text("blog\n", encoding="utf-8")
+    run_org(workspace, "publish")
+
+    conn = sqlite3.connect(workspace / ".org.db")
+    tags = sorted(conn.execute("SELECT n.title, t.tag FROM note_tags t JOIN notes n ON n.id = t.note_id"))
+    assert tags == [("a.txt", "blog"), ("b.txt", "blog"), ("c.txt", "blog"), ("c.txt", "nopublish"), ("d.txt", "other")]
+
+    def published():
+        return sorted(p.name for p in (workspace / "docs" / "pages").glob("*.html"))
+    assert published() == ["ws__a.html", "ws__b.html"]
+
+    # retagging (and removing) notes is picked up on the next publish
+    b = next(p for p in workspace.rglob("b.txt"))
+    b.write_text(b.read_text(encoding="utf-8").replace("Blog", "other"), encoding="utf-8")
+    d = next(p for p in workspace.rglob("d.txt"))
+    d.write_text(d.read_text(encoding="utf-8").replace("[other]", "[publish]"), encoding="utf-8")
+    next(p for p in workspace.rglob("a.txt")).unlink()
+    run_org(workspace, "publish")
+    assert published() == ["ws__d.html"]
+    assert conn.execute("SELECT COUNT(*) FROM note_tags").fetchone()[0] == 4
+
+def test_tags_named_like_generated_dirs_get_their_own(workspace):
+    for name in ("pages", "search", "assets", "tag-x"):
+        (workspace / f"{name}.txt").write_text(f"---\ntitle: {name}\ntags: [blog, {name}]\n---\n\nhi\n", encoding="utf-8")
+    (workspace / ".publish").write_text("blog\n", encoding="utf-8")
+    run_org(workspace, "publish")
+    docs = workspace / "docs"
+
+    # the generated dirs hold only what publish puts there
+    assert sorted(p.name for p in (docs / "pages").iterdir()) == ["ws__assets.html", "ws__pages.html", "ws__search.html", "ws__tag-x.html"]
+    assert not (docs / "search" / "tag_home.html").exists()
+    assert not (docs / "assets" / "tag_home.html").exists()
+
+    for name in ("pages", "search", "assets", "tag-x"):
+        assert (docs / f"tag-{name}" / f"{name}.html").is_file()
+        assert (docs / f"tag-{name}" / "tag_home.html").is_file()
+    index = (docs / "index.html").read_text(encoding="utf-8")
+    assert 'href="tag-pages/tag_home.html">#pages<' in index
+    assert 'href="tag-tag-x/tag_home.html">#tag-x<' in index
+
+    # dropping the tag removes its entry, not the canonical page
+    p = next(workspace.rglob("pages.txt"))
+    p.write_text(p.read_text(encoding="utf-8").replace("[blog, pages]", "[blog]"), encoding="utf-8")
+    run_org(workspace, "publish")
+    assert (docs / "pages" / "ws__pages.html").is_file()
+    assert not (docs / "tag-pages").exists()
@@ -0,0 +1,79 @@
+import os
+import subprocess
+import sys
+
+from conftest import SRC, run_org
+
+TODOS = """\
+* t: buy milk // #shopping !1 %20261025
+* t: write report // #work !3 %20261101
+* t: later // #work !4 %20261115T1200
+"""
+
+EVENTS = """\
+* e: standup // >20261019T0930 <20261019T1000 ^1d@wd1,2,3,4,5 #work
+* e: party // >20261021T1900 #fun
+"""
+
+NOTE = "---\ntitle: Hello World\ntags: [general]\n---\n\nsome text\n"
+
+def line_files(ws):
+    return sorted(p for p in ws.rglob("*") if p.suffix in (".td", ".ev"))
+
+def test_second_tidy_writes_nothing(workspace):
+    (workspace / "a.td").write_text(TODOS, encoding="utf-8")
+    (workspace / "e.ev").write_text(EVENTS, encoding="utf-8")
+    (workspace / "n.txt").write_text(NOTE, encoding="utf-8")
+
+    run_org(workspace, "tidy")
+    stamps = {p: p.stat().st_mtime_ns for p in line_files(workspace)}
+    assert stamps
+
+    plan = run_org(workspace, "tidy", "--plan").stdout
+    assert "tidy: nothing to do" in plan, plan
+
+    run_org(workspace, "tidy")
+    assert {p: p.stat().st_mtime_ns for p in line_files(workspace)} == stamps
+
+PLAN_ONLY = """
+import sqlite3
+from org.commands.tidy import build_plan, write_journal
+plan = build_plan(sqlite3.connect('.org.db', isolation_level=None).cursor())
+write_journal(plan)
+print('\\n'.join(str(p) for p in plan.deletes))
+"""
+
+def journal_without_applying(ws):
+    # what a tidy that died right after writing its journal leaves behind
+    env = dict(os.environ, PYTHONPATH=str(SRC))
+    proc = subprocess.run([sys.executable, "-c", PLAN_ONLY], cwd=ws, env=env, text=True, capture_output=True, check=True)
+    return proc.stdout.split()
+
+def test_interrupted_tidy_is_replayed(workspace):
+    (workspace / "a.td").write_text(TODOS, encoding="utf-8")
+    (workspace / "e.ev").write_text(EVENTS, encoding="utf-8")
+    run_org(workspace, "todos")
+
+    assert journal_without_applying(workspace)
+    out = run_org(workspace, "todos").stdout
+    assert "Finishing an interrupted 'org tidy'" in out
+    assert not (workspace / ".org.tidy.journal").exists()
+    assert "tidy: nothing to do" in run_org(workspace, "tidy", "--plan").stdout
+
+def test_journal_not_replayed_over_changed_files(workspace):
+    (workspace / "a.td").write_text(TODOS, encoding="utf-8")
+    (workspace / "e.ev").write_text(EVENTS, encoding="utf-8")
+    run_org(workspace, "todos")
+
+    deletes = journal_without_applying(workspace)
+    assert "a.td" in deletes
+    edited = (workspace / "a.td").read_text(encoding="utf-8") + "* t: added since // !3\n"
+    (workspace / "a.td").write_text(edited, encoding="utf-8")
+
+    proc = run_org(workspace, "todos", check=False)
+    assert proc.returncode != 0
+    assert "changed since the tidy was planned" in proc.stderr and "a.td" in proc.stderr
+    # nothing touched, and it keeps saying so until someone looks
+    assert (workspace / "a.td").read_text(encoding="utf-8") == edited
+    assert (workspace / "e.ev").exists()
+    assert (workspace / ".org.tidy.journal").exists()
@@ -0,0 +1,20 @@
+from conftest import run_org
+
+def test_event_times_must_be_real_dates(workspace):
+    (workspace / "e.ev").write_text(
+        "* e: nope // >20260231\n"
+        "* e: fine // >20260228T0930 <20260228T1000\n",
+        encoding="utf-8",
+    )
+    proc = run_org(workspace, "events", check=False)
+    assert proc.returncode != 0
+    errors = (workspace / "org_errors").read_text(encoding="utf-8")
+    assert "start (20260231) is not a real date/time" in errors
+    assert "fine" not in errors
+
+def test_todo_deadline_keeps_its_format_check_only(workspace):
+    # the real-date check is for event start/end, which start_key/end_key
+    # are made from; deadlines are checked as before, by format only
+    (workspace / "a.td").write_text("* t: later // !3 %20261131\n", encoding="utf-8")
+    run_org(workspace, "todos")
+    assert not (workspace / "org_errors").exists()